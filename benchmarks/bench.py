@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Latenz- und Durchsatz-Benchmark der Flask-Routen
+Misst /, /summary, /current_duration, /start_timer/<ticket_name> und
+/save_ticket_order auf einer Kopie einer mit seed.py erzeugten Datenbank:
+
+- client: nacheinander über den Flask-Test-Client (ohne Netzwerk)
+- server: über einen echten HTTP-Server mit --concurrency parallelen Clients
+
+Pro Route werden p50/p95/p99, Anfragen pro Sekunde und SQL-Statements pro
+Anfrage ausgegeben. Mit --baseline werden die Werte gegen eine gespeicherte
+Messung verglichen; Regressionen führen zu Exit-Code 1.
+
+Aufruf: python benchmarks/bench.py --db /tmp/bench.db --baseline benchmarks/baseline.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+# seed legt volumes/app in den Suchpfad
+from seed import PASSWORD, USERNAME, copy_database
+
+import timesheet_app
+
+MODES = ('client', 'server')
+
+# Statements der Transaktionssteuerung zählen nicht als Abfrage
+_TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK')
+
+class QueryCounter:
+    """Zählt SQL-Statements über den sqlite3-Trace-Callback.
+
+    ``total`` zählt prozessweit (für den Server-Modus), ``local`` pro
+    Thread (für Einzelanfragen über den Test-Client).
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def __call__(self, statement):
+        if statement.lstrip().upper().startswith(_TRANSACTION_STATEMENTS):
+            return
+        with self.lock:
+            self.total += 1
+        self.local.count = getattr(self.local, 'count', 0) + 1
+
+    def take(self):
+        """Statements dieses Threads seit dem letzten Aufruf."""
+        count, self.local.count = getattr(self.local, 'count', 0), 0
+        return count
+
+def install_query_counter(pool, counter):
+    """Trace-Callback auf allen Verbindungen des Pools setzen."""
+    pool.close_all()
+    connect = pool._connect
+
+    def traced_connect():
+        conn = connect()
+        conn.set_trace_callback(counter)
+        return conn
+    pool._connect = traced_connect
+
+# ===== SZENARIEN =====
+#
+# Jedes Szenario liefert pro Aufruf (method, path, json_body) für einen
+# Benutzer; ``state`` hält dessen Ticket-Namen und -IDs.
+
+def _index(state, rng):
+    return 'GET', '/', None
+
+def _summary(state, rng):
+    return 'GET', '/summary?' + urlencode({'period': 'this_month'}), None
+
+def _summary_year(state, rng):
+    return 'GET', '/summary?' + urlencode({'period': 'custom', 'start_date': state['year_start'],
+                                           'end_date': state['today']}), None
+
+def _current_duration(state, rng):
+    return 'GET', '/current_duration', None
+
+def _start_timer(state, rng):
+    return 'GET', '/start_timer/' + rng.choice(state['ticket_names']).replace(' ', '%20'), None
+
+def _save_ticket_order(state, rng):
+    order = list(state['ticket_ids'])
+    rng.shuffle(order)
+    return 'POST', '/save_ticket_order', {'ticket_order': order}
+
+SCENARIOS = {
+    'index': _index,
+    'summary': _summary,
+    'summary_year': _summary_year,
+    'current_duration': _current_duration,
+    'start_timer': _start_timer,
+    'save_ticket_order': _save_ticket_order,
+}
+
+def user_states(manager, users):
+    today = time.strftime('%Y-%m-%d')
+    states = []
+    for user in users:
+        tickets = manager.get_tickets(user.id)
+        states.append({
+            'username': user.username,
+            'ticket_names': [ticket.name for ticket in tickets],
+            'ticket_ids': [ticket.id for ticket in tickets],
+            'today': today,
+            'year_start': f"{int(today[:4]) - 1}{today[4:]}",
+        })
+    return states
+
+# ===== MESSUNG =====
+
+def percentile(sorted_values, pct):
+    """Nearest-rank-Perzentil einer sortierten Liste."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+def summarize(latencies, wall, queries, errors):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'rps': round(len(latencies) / wall, 1) if wall > 0 else 0.0,
+        'queries': round(queries / len(latencies), 2) if latencies else 0.0,
+    }
+
+def run_client(app, counter, states, scenarios, requests, warmup, seed_value):
+    """Alle Szenarien nacheinander über den Flask-Test-Client."""
+    clients = []
+    for state in states:
+        client = app.test_client()
+        response = client.post('/login', data={'username': state['username'], 'password': PASSWORD})
+        if response.status_code != 302:
+            raise SystemExit(f"Login von {state['username']} fehlgeschlagen")
+        clients.append((client, state))
+
+    results = {}
+    for name in scenarios:
+        rng = random.Random(seed_value)
+        latencies, queries, errors = [], 0, 0
+        wall_started = time.perf_counter()
+        for i in range(warmup + requests):
+            client, state = clients[i % len(clients)]
+            method, path, body = SCENARIOS[name](state, rng)
+            counter.take()
+            started = time.perf_counter()
+            response = client.open(path, method=method, json=body)
+            elapsed = time.perf_counter() - started
+            count = counter.take()
+            if i == warmup - 1:
+                wall_started = time.perf_counter()
+            if i < warmup:
+                continue
+            latencies.append(elapsed)
+            queries += count
+            errors += response.status_code >= 400
+        results[name] = summarize(latencies, time.perf_counter() - wall_started, queries, errors)
+    return results
+
+class HttpUser:
+    """Ein angemeldeter HTTP-Client mit eigener Session."""
+
+    def __init__(self, host, port, state):
+        self.host, self.port, self.state = host, port, state
+        self.cookie = None
+        status, headers = self.request('POST', '/login', form={'username': state['username'], 'password': PASSWORD})
+        cookie = headers.get('Set-Cookie', '')
+        if status != 302 or not cookie:
+            raise SystemExit(f"Login von {state['username']} fehlgeschlagen")
+        self.cookie = cookie.split(';', 1)[0]
+
+    def request(self, method, path, body=None, form=None):
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        elif form is not None:
+            payload = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status, dict(response.getheaders())
+        finally:
+            conn.close()
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Kein Zugriffslog pro Anfrage - das würde die Messung verfälschen."""
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+def run_server(app, counter, states, scenarios, requests, warmup, concurrency, seed_value):
+    """Alle Szenarien über einen echten Server mit parallelen Clients."""
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        users = [HttpUser('127.0.0.1', server.server_port, state) for state in states]
+        results = {}
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for name in scenarios:
+                rng_lock = threading.Lock()
+                rng = random.Random(seed_value)
+
+                def call(i):
+                    user = users[i % len(users)]
+                    with rng_lock:
+                        method, path, body = SCENARIOS[name](user.state, rng)
+                    started = time.perf_counter()
+                    status, _ = user.request(method, path, body=body)
+                    return time.perf_counter() - started, status
+
+                list(pool.map(call, range(warmup)))
+                queries_before = counter.total
+                wall_started = time.perf_counter()
+                measured = list(pool.map(call, range(requests)))
+                wall = time.perf_counter() - wall_started
+                results[name] = summarize([elapsed for elapsed, _ in measured], wall,
+                                          counter.total - queries_before,
+                                          sum(1 for _, status in measured if status >= 400))
+        return results
+    finally:
+        server.shutdown()
+
+# ===== BASELINE =====
+
+def compare(results, baseline, threshold):
+    """Regressionen gegenüber der Baseline als Liste von Meldungen.
+
+    Latenz (p95) und Durchsatz dürfen um ``threshold`` schwanken. Jedes
+    zusätzliche SQL-Statement pro Anfrage gilt als Regression; die halbe
+    Anfrage Spielraum fängt Cache-Effekte paralleler Clients ab.
+    """
+    regressions = []
+    for mode, routes in results.items():
+        for name, current in routes.items():
+            before = baseline.get(mode, {}).get(name)
+            if not before:
+                continue
+            if current['p95_ms'] > before['p95_ms'] * (1 + threshold):
+                regressions.append(f"{mode}/{name}: p95 {before['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+            if current['rps'] < before['rps'] * (1 - threshold):
+                regressions.append(f"{mode}/{name}: {before['rps']:.0f} -> {current['rps']:.0f} Anfragen/s")
+            if current['queries'] > before['queries'] + 0.5:
+                regressions.append(f"{mode}/{name}: {before['queries']} -> {current['queries']} Statements/Anfrage")
+    return regressions
+
+def print_results(results, baseline):
+    for mode, routes in results.items():
+        print(f"\n{mode}")
+        print(f"  {'Route':<18} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Anfr./s':>9} {'SQL':>6} {'Fehler':>6}  Δp95")
+        for name, r in routes.items():
+            before = baseline.get(mode, {}).get(name) if baseline else None
+            delta = f"{(r['p95_ms'] / before['p95_ms'] - 1) * 100:+.0f}%" if before and before['p95_ms'] else ''
+            print(f"  {name:<18} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+                  f"{r['rps']:>9.0f} {r['queries']:>6} {r['errors']:>6}  {delta}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Latenz-Benchmark der Flask-Routen')
+    parser.add_argument('--db', required=True, help='Mit seed.py erzeugte Datenbank (wird nicht verändert)')
+    parser.add_argument('--mode', choices=MODES + ('both',), default='both')
+    parser.add_argument('--routes', default=','.join(SCENARIOS), help='Kommagetrennte Auswahl der Szenarien')
+    parser.add_argument('--requests', type=int, default=200, help='Gemessene Anfragen pro Route')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=8, help='Parallele Clients im Server-Modus')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Ergebnis zusätzlich als JSON schreiben')
+    parser.add_argument('--baseline', help='JSON einer früheren Messung zum Vergleich')
+    parser.add_argument('--save-baseline', action='store_true', help='Ergebnis als neue Baseline speichern')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Erlaubte Abweichung (0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    scenarios = [name.strip() for name in args.routes.split(',') if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unbekannte Route(n): {', '.join(unknown)}")
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} fehlt - zuerst benchmarks/seed.py ausführen")
+
+    # Jeder Lauf startet auf einer frischen Kopie: start_timer und
+    # save_ticket_order schreiben, die Ausgangsdaten bleiben gleich.
+    workdir = tempfile.mkdtemp(prefix='timesheet-bench-')
+    try:
+        db_path = os.path.join(workdir, 'bench.db')
+        copy_database(args.db, db_path)
+        app = timesheet_app.create_app({'DATABASE': db_path})
+        counter = QueryCounter()
+        install_query_counter(timesheet_app.timesheet.db, counter)
+        users = [user for user in timesheet_app.timesheet.get_users() if user.username.startswith(USERNAME[:5])]
+        if not users:
+            raise SystemExit(f"Keine Benchmark-Benutzer in {args.db}")
+        states = user_states(timesheet_app.timesheet, users)
+
+        results = {}
+        if args.mode in ('client', 'both'):
+            results['client'] = run_client(app, counter, states, scenarios, args.requests, args.warmup, args.seed)
+        if args.mode in ('server', 'both'):
+            results['server'] = run_server(app, counter, states, scenarios, args.requests, args.warmup,
+                                           args.concurrency, args.seed)
+        timesheet_app.timesheet.db.close_all()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+    print(f"Python {platform.python_version()}, SQLite {timesheet_app.sqlite3.sqlite_version}, "
+          f"{len(users)} Benutzer, {args.requests} Anfragen pro Route")
+    print_results(results, baseline)
+
+    document = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'settings': {key: getattr(args, key) for key in ('requests', 'warmup', 'concurrency', 'seed')},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+    if args.save_baseline:
+        if not args.baseline:
+            parser.error('--save-baseline braucht --baseline PFAD')
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        print(f"\nBaseline gespeichert: {args.baseline}")
+        return
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} Regression(en) gegenüber {args.baseline}:")
+            for message in regressions:
+                print(f"  - {message}")
+            sys.exit(1)
+        print(f"\n✅ Keine Regression gegenüber {args.baseline} (Toleranz {args.threshold:.0%})")
+
+if __name__ == '__main__':
+    main()
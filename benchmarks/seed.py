@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Synthetische Datenbank für die Benchmarks
+Legt Benutzer mit Tickets und mehreren Jahren lückenloser Arbeitstage an.
+Mit gleichem --seed entsteht immer dieselbe Datenbank (bis auf UUIDs),
+damit Messungen verschiedener Stände vergleichbar bleiben.
+
+Aufruf: python benchmarks/seed.py --db /tmp/bench.db --users 5 --tickets 20 --years 3
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'volumes', 'app')
+sys.path.insert(0, APP_DIR)
+
+import timesheet_app  # noqa: E402
+
+PASSWORD = 'bench123'
+USERNAME = 'bench{:02d}'
+COLORS = ['#0969da', '#1a7f37', '#cf222e', '#8250df', '#bf8700', '#656d76']
+BATCH_SIZE = 1000
+
+def workdays(years, today):
+    """Alle Werktage der letzten ``years`` Jahre bis gestern, älteste zuerst."""
+    day = today - timedelta(days=int(years * 365))
+    while day < today:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+def day_entries(rng, day, ticket_names, entries_per_day):
+    """Lückenlose Einträge ab 08:00 mit 15-90 Minuten Dauer."""
+    start = datetime.combine(day, datetime.min.time()).replace(hour=8)
+    for _ in range(entries_per_day):
+        end = start + timedelta(minutes=rng.choice(range(15, 91, 15)))
+        yield {
+            'op': 'create',
+            'ticket_name': rng.choice(ticket_names),
+            'start_time': start.isoformat(),
+            'end_time': end.isoformat(),
+            'memo': rng.choice(['', '', 'Meeting', 'Review', 'Support-Anfrage', 'Doku']),
+        }
+        start = end
+
+def seed(db_path, users, tickets, years, entries_per_day, seed_value):
+    """Datenbank neu anlegen und füllen; gibt die Anzahl Einträge zurück."""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    app = timesheet_app.create_app({'DATABASE': db_path})
+    manager = timesheet_app.timesheet
+    rng = random.Random(seed_value)
+    today = datetime.now().date()
+    total = 0
+
+    with app.app_context():
+        for u in range(users):
+            user_id = manager.add_user(USERNAME.format(u), PASSWORD)
+            ticket_names = [f"Projekt {u:02d}-{t:02d}" for t in range(tickets)]
+            for t, name in enumerate(ticket_names):
+                manager.add_ticket(user_id, name, COLORS[t % len(COLORS)], f"BENCH-{u * 100 + t}", "")
+
+            batch = []
+            for day in workdays(years, today):
+                batch.extend(day_entries(rng, day, ticket_names, entries_per_day))
+                if len(batch) >= BATCH_SIZE:
+                    manager.apply_entry_batch(user_id, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                manager.apply_entry_batch(user_id, batch)
+                total += len(batch)
+
+        manager.optimize_database()
+        manager.checkpoint_wal()
+        manager.db.close_all()
+    return total
+
+def copy_database(source, target):
+    """Konsistente Kopie über die Backup-API (inkl. WAL-Inhalt)."""
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Synthetische Benchmark-Datenbank erzeugen')
+    parser.add_argument('--db', required=True, help='Pfad der Datenbank (wird überschrieben)')
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--tickets', type=int, default=20, help='Tickets pro Benutzer')
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--entries-per-day', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    started = time.monotonic()
+    total = seed(args.db, args.users, args.tickets, args.years, args.entries_per_day, args.seed)
+    print(f"✅ {args.users} Benutzer, {args.users * args.tickets} Tickets, {total:,} Einträge "
+          f"in {time.monotonic() - started:.1f}s -> {args.db}")
+    print(f"   Login: {USERNAME.format(0)} ... {USERNAME.format(args.users - 1)} / {PASSWORD}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Asset-Build für die Timesheet App
+Bündelt und minifiziert CSS/JS pro Seite, versieht die Dateien mit einem
+Content-Hash im Namen und legt gzip- (und, falls installiert, Brotli-)
+Varianten daneben. Das Ergebnis landet in static/dist/ zusammen mit einer
+manifest.json, über die die Templates die gehashten Namen auflösen.
+
+Aufruf: python build_assets.py [STATIC_DIR]
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+
+try:
+    import brotli
+except ImportError:  # optional, gzip allein reicht auch
+    brotli = None
+
+try:
+    from PIL import Image, features
+except ImportError:  # optional, ohne Pillow wird das Bild nur kopiert
+    Image = None
+
+# Ein Bundle pro Seitentyp: jede Seite lädt genau ein CSS- und ein JS-Bundle.
+# summary.css und timesheet.css teilen sich Selektoren (.entries-table, ...),
+# deshalb gibt es kein gemeinsames Bundle für alle Seiten.
+BUNDLES = {
+    'base.css': ['css/base.css'],
+    'timesheet.css': ['css/base.css', 'css/timesheet.css', 'css/modal.css'],
+    'summary.css': ['css/base.css', 'css/summary.css'],
+    'base.js': ['js/main.js'],
+    'timesheet.js': ['js/main.js', 'js/modal.js', 'js/timer.js', 'js/drag-drop.js', 'js/actions.js'],
+}
+
+# Bilder, die aus dem CSS per url(/static/...) referenziert werden
+IMAGES = ['img/bg.png']
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+COMPRESSIBLE = ('.css', '.js', '.svg')
+
+# ===== MINIFIER =====
+
+_CSS_STRINGS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+
+def minify_css(source):
+    """Kommentare und überflüssige Leerzeichen entfernen; Strings bleiben unverändert."""
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    parts = _CSS_STRINGS.split(source)
+    for i in range(0, len(parts), 2):
+        code = re.sub(r'\s+', ' ', parts[i])
+        code = re.sub(r'\s*([{};,])\s*', r'\1', code)
+        # Nur nach dem Doppelpunkt kürzen: "a :hover" ist nicht "a:hover"
+        code = re.sub(r':\s+', ':', code)
+        parts[i] = code.replace(';}', '}')
+    return ''.join(parts).strip()
+
+def minify_js(source):
+    """Konservative Zeilen-Minifizierung ohne Parser.
+
+    Entfernt Einrückung, Leerzeilen und Kommentare, die eine ganze Zeile
+    einnehmen. Zeilenumbrüche bleiben erhalten, damit die automatische
+    Semikolon-Einfügung unverändert greift; mehrzeilige Template-Literale
+    werden unverändert übernommen.
+    """
+    lines = []
+    in_template = False
+    in_comment = False
+    for line in source.splitlines():
+        if in_template:
+            lines.append(line)
+            in_template = line.count('`') % 2 == 0
+            continue
+        stripped = line.strip()
+        if in_comment:
+            in_comment = '*/' not in stripped
+            continue
+        if not stripped or stripped.startswith('//'):
+            continue
+        if stripped.startswith('/*'):
+            in_comment = '*/' not in stripped
+            continue
+        lines.append(stripped)
+        in_template = stripped.count('`') % 2 == 1
+    return '\n'.join(lines)
+
+# ===== BUILD =====
+
+def _fingerprint(name, data):
+    root, ext = os.path.splitext(name)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+def _write(dist, name, data):
+    path = os.path.join(dist, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    if name.endswith(COMPRESSIBLE):
+        # mtime=0 hält die .gz-Dateien reproduzierbar
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(data, 9, mtime=0))
+        if brotli is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(data, quality=11))
+
+def recompress_image(data):
+    """Hintergrundbild neu kodieren; liefert (bytes, Dateiendung).
+
+    Mit Pillow wird WebP erzeugt (bzw. ein optimiertes PNG, falls Pillow
+    ohne WebP-Support gebaut wurde). Ohne Pillow bleibt das Original.
+    """
+    if Image is None:
+        return data, '.png'
+    image = Image.open(io.BytesIO(data))
+    out = io.BytesIO()
+    if features.check('webp'):
+        image.save(out, 'WEBP', quality=80, method=6)
+        ext = '.webp'
+    else:
+        image.save(out, 'PNG', optimize=True)
+        ext = '.png'
+    if out.tell() >= len(data):
+        return data, '.png'
+    return out.getvalue(), ext
+
+def build(static_dir):
+    """Alle Bundles und Bilder nach static/dist/ schreiben; gibt das Manifest zurück."""
+    dist = os.path.join(static_dir, DIST_DIR)
+    # Alte Hash-Dateien nicht ansammeln: das Manifest ist die einzige Referenz
+    shutil.rmtree(dist, ignore_errors=True)
+    os.makedirs(dist)
+    manifest = {}
+
+    for image in IMAGES:
+        with open(os.path.join(static_dir, image), 'rb') as f:
+            data, ext = recompress_image(f.read())
+        name = _fingerprint(os.path.splitext(image)[0] + ext, data)
+        _write(dist, name, data)
+        manifest[image] = name
+
+    def rewrite_urls(css):
+        # url('/static/img/bg.png') -> url('/static/dist/img/bg.<hash>.webp')
+        def replace(match):
+            target = manifest.get(match.group(2))
+            if target is None:
+                return match.group(0)
+            return f"url({match.group(1)}/static/{DIST_DIR}/{target}{match.group(1)})"
+        return re.sub(r"url\((['\"]?)/static/([^'\")]+)\1\)", replace, css)
+
+    for bundle, sources in BUNDLES.items():
+        contents = []
+        for source in sources:
+            with open(os.path.join(static_dir, source), encoding='utf-8') as f:
+                contents.append(f.read())
+        if bundle.endswith('.css'):
+            text = rewrite_urls(minify_css('\n'.join(contents)))
+        else:
+            # Semikolon zwischen den Dateien, falls eine ohne endet
+            text = '\n;\n'.join(minify_js(content) for content in contents)
+        data = text.encode('utf-8')
+        name = _fingerprint(bundle, data)
+        _write(dist, name, data)
+        manifest[bundle] = name
+
+    with open(os.path.join(dist, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+def main():
+    static_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    manifest = build(static_dir)
+    dist = os.path.join(static_dir, DIST_DIR)
+
+    print(f"Assets gebaut in {dist}" + ("" if brotli else " (ohne Brotli)") + ("" if Image else " (ohne Pillow)"))
+    for source, name in sorted(manifest.items()):
+        size = os.path.getsize(os.path.join(dist, name))
+        gz = os.path.join(dist, name + '.gz')
+        gz_info = f", gzip {os.path.getsize(gz):>8,} B" if os.path.exists(gz) else ""
+        print(f"  {source:<15} -> {name:<32} {size:>9,} B{gz_info}")
+
+if __name__ == '__main__':
+    main()
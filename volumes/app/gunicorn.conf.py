@@ -0,0 +1,40 @@
+# Gunicorn configuration for the timesheet app (used by start.sh in production)
+#
+# Every worker process opens its own SQLite connection pool after the fork.
+# The database runs in WAL mode, so readers in all workers proceed in
+# parallel while writes are serialized by SQLite's write lock (busy_timeout
+# waits for it instead of failing).
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# One process per core; override with WEB_CONCURRENCY
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+# Threaded workers. An open /events stream keeps its thread busy, so only a
+# quarter of the threads may hold streams; further tabs get a 503 and fall
+# back to polling, and the remaining threads stay free for normal requests.
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '16'))
+os.environ.setdefault('SSE_MAX_STREAMS', str(max(1, threads // 4)))
+
+# Each worker imports the app itself - nothing SQLite-related crosses a fork
+preload_app = False
+
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+# Heartbeat files in RAM instead of the container's overlay filesystem
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info')
+
+# The running-timer registry is per process. With several workers a timer
+# switched in one worker must become visible in the others, so cached
+# entries are re-validated against the database after a few seconds.
+if workers > 1:
+    os.environ.setdefault('RUNNING_REGISTRY_TTL', '2')
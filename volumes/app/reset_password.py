@@ -30,6 +30,12 @@ DATABASE = os.environ.get('DATABASE_PATH', '/app/data/timesheet.db')
 
 
 
+# Gleiches Hash-Verfahren wie die App (siehe PASSWORD_HASH_METHOD)
+
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+
+
+
 def connect_db():
 
     """Verbindung zur Datenbank herstellen."""
@@ -140,7 +146,7 @@ def reset_password(user_id, new_password):
 
         # Passwort hashen
 
-        password_hash = generate_password_hash(new_password)
+        password_hash = generate_password_hash(new_password, PASSWORD_HASH_METHOD)
 
         
 
@@ -230,7 +236,7 @@ def reset_password_by_username(username, new_password):
 
         # Passwort hashen
 
-        password_hash = generate_password_hash(new_password)
+        password_hash = generate_password_hash(new_password, PASSWORD_HASH_METHOD)
 
         
 
@@ -320,7 +326,7 @@ def set_default_password_for_all():
 
         # Standard-Passwort hashen
 
-        password_hash = generate_password_hash('password')
+        password_hash = generate_password_hash('password', PASSWORD_HASH_METHOD)
 
         
 
@@ -1,6 +1,12 @@
 #!/bin/bash
 cd /app
 if [ -f /app/timesheet_app.py ]; then
+    if [ "$FLASK_ENV" = "production" ]; then
+        echo "Building static assets..."
+        python /app/build_assets.py || echo "Asset build failed, serving unbundled files"
+        echo "Starting timesheet app with gunicorn..."
+        exec gunicorn -c /app/gunicorn.conf.py wsgi:app
+    fi
     echo "Starting timesheet app from data volume..."
     exec python /app/timesheet_app.py
 else
@@ -0,0 +1,234 @@
+// AJAX actions module
+//
+// Timer, ticket and entry actions call the JSON endpoints under /api and
+// patch the page with the fragments they return (changed rows, ticket
+// buttons, day totals, timer state) instead of reloading it. The plain
+// links and forms stay in the markup as the fallback without JavaScript.
+const ActionsModule = {
+    init: function() {
+        const grid = document.querySelector('.tickets-grid');
+        if (!grid) {
+            return;
+        }
+
+        grid.addEventListener('click', (event) => {
+            const stopButton = event.target.closest('#stopButton');
+            if (stopButton) {
+                event.preventDefault();
+                this.request('POST', '/api/timer/switch', { ticket_name: null }, stopButton);
+                return;
+            }
+
+            const link = event.target.closest('a.ticket-link');
+            if (link) {
+                event.preventDefault();
+                const button = link.closest('.ticket-btn');
+                this.request('POST', '/api/timer/switch', { ticket_name: button.dataset.ticketName }, button);
+            }
+        });
+
+        const form = document.getElementById('ticketForm');
+        if (form) {
+            form.addEventListener('submit', (event) => {
+                event.preventDefault();
+                this.saveTicket(form);
+            });
+        }
+    },
+
+    // Send a JSON request and apply the returned changes to the page
+    request: function(method, url, body, busyElement) {
+        const options = { method: method, headers: {} };
+        if (body !== undefined) {
+            options.headers['Content-Type'] = 'application/json';
+            options.body = JSON.stringify(body);
+        }
+        if (busyElement) {
+            busyElement.classList.add('busy');
+        }
+
+        return fetch(url, options)
+            .then(response => response.json().then(data => {
+                if (!response.ok || !data.success) {
+                    throw new Error(data.error || 'HTTP ' + response.status);
+                }
+                return data;
+            }))
+            .then(data => {
+                this.apply(data);
+                return data;
+            })
+            .catch(error => {
+                console.error('ActionsModule: ' + method + ' ' + url + ' failed:', error);
+                alert('Fehler: ' + error.message);
+                // Fall back to the server's view of the page
+                window.location.reload();
+            })
+            .finally(() => {
+                if (busyElement) {
+                    busyElement.classList.remove('busy');
+                }
+            });
+    },
+
+    saveEntry: function(form) {
+        const data = Object.fromEntries(new FormData(form));
+        this.request('POST', '/api/entries/' + encodeURIComponent(data.entry_id), data, form.closest('tr'));
+    },
+
+    saveTicket: function(form) {
+        const data = Object.fromEntries(new FormData(form));
+        const url = data.ticket_id ? '/api/tickets/' + encodeURIComponent(data.ticket_id) : '/api/tickets';
+        this.request('POST', url, data).then(result => {
+            if (result) {
+                closeTicketModal();
+            }
+        });
+    },
+
+    apply: function(data) {
+        (data.removed_entries || []).forEach(id => this.removeEntryRow(id));
+        (data.entries || []).forEach(entry => this.placeEntryRow(entry));
+
+        Object.entries(data.day_totals || {}).forEach(([date, total]) => {
+            const totalEl = document.getElementById('total-' + date);
+            if (totalEl) {
+                totalEl.textContent = total.hours > 0 ? '- ' + total.label : '';
+            }
+        });
+
+        (data.removed_tickets || []).forEach(id => this.removeTicket(id));
+        (data.tickets || []).forEach(ticket => this.placeTicket(ticket));
+
+        if (data.timer) {
+            this.applyTimer(data.timer);
+        }
+    },
+
+    // ===== Entries =====
+
+    removeEntryRow: function(entryId) {
+        const row = document.querySelector('tr[data-entry-id="' + CSS.escape(entryId) + '"]');
+        if (row) {
+            row.remove();
+        }
+    },
+
+    placeEntryRow: function(entry) {
+        // Remove and re-insert: a new start time can move it within or across days
+        this.removeEntryRow(entry.id);
+
+        const container = document.getElementById('entries-' + entry.date) || this.addTodaySection(entry.date);
+        if (!container) {
+            // A day without a section yet; only worth a reload if it falls into the shown range
+            const sections = document.querySelectorAll('.date-section[data-date]');
+            const oldest = sections.length ? sections[sections.length - 1].dataset.date : null;
+            if (oldest && entry.date > oldest) {
+                window.location.reload();
+            }
+            return;
+        }
+        if (container.dataset.loaded === 'false') {
+            // Collapsed and never loaded - the row comes with the day when it is expanded
+            return;
+        }
+
+        const tbody = container.querySelector('tbody');
+        const row = this.createElement(entry.html, 'tr');
+        const next = Array.from(tbody.querySelectorAll('tr[data-start]'))
+            .find(tr => tr.dataset.start < entry.start_time);
+        tbody.insertBefore(row, next || null);
+    },
+
+    addTodaySection: function(date) {
+        const template = document.getElementById('todaySectionTemplate');
+        const section = template && template.content.querySelector('.date-section[data-date="' + date + '"]');
+        if (!section) {
+            return null;
+        }
+
+        const entriesSection = document.getElementById('entriesSection');
+        const emptyNotice = entriesSection.querySelector('.no-tickets');
+        if (emptyNotice) {
+            emptyNotice.remove();
+        }
+        // Today is the newest day, so it goes on top
+        entriesSection.querySelector('h2').after(section);
+        template.remove();
+        return document.getElementById('entries-' + date);
+    },
+
+    // Rows show the ticket's name, so a rename reloads every day already shown
+    reloadEntries: function() {
+        document.querySelectorAll('.date-entries').forEach(container => {
+            if (container.dataset.loaded !== 'false') {
+                loadDateEntries(container.id.substring('entries-'.length), container);
+            }
+        });
+    },
+
+    // ===== Tickets =====
+
+    removeTicket: function(ticketId) {
+        document.querySelectorAll('[data-ticket-id="' + CSS.escape(ticketId) + '"]').forEach(el => el.remove());
+        this.updateArchivedSection();
+    },
+
+    placeTicket: function(ticket) {
+        const selector = '[data-ticket-id="' + CSS.escape(ticket.id) + '"]';
+        const element = this.createElement(ticket.html, selector);
+
+        if (ticket.archived) {
+            document.querySelectorAll(selector).forEach(el => el.remove());
+            document.querySelector('#archivedSection .archived-tickets').appendChild(element);
+        } else {
+            const button = document.querySelector('.ticket-btn' + selector);
+            if (button) {
+                const renamed = button.dataset.ticketName !== ticket.name;
+                button.replaceWith(element);
+                if (renamed) {
+                    this.reloadEntries();
+                }
+            } else {
+                document.querySelectorAll(selector).forEach(el => el.remove());
+                const addButton = document.querySelector('.tickets-grid .add-btn');
+                addButton.parentNode.insertBefore(element, addButton);
+            }
+            if (typeof DragDropModule !== 'undefined') {
+                DragDropModule.setupButton(element);
+            }
+        }
+        this.updateArchivedSection();
+    },
+
+    updateArchivedSection: function() {
+        const section = document.getElementById('archivedSection');
+        if (!section) {
+            return;
+        }
+        const count = section.querySelectorAll('.archived-ticket').length;
+        document.getElementById('archivedCount').textContent = count;
+        section.style.display = count ? '' : 'none';
+    },
+
+    // ===== Timer =====
+
+    applyTimer: function(timer) {
+        const stopButton = document.getElementById('stopButton');
+        if (stopButton) {
+            stopButton.classList.toggle('disabled', !timer.running);
+        }
+        document.querySelectorAll('.ticket-btn[data-ticket-id]').forEach(button => {
+            button.classList.toggle('active', timer.running && button.dataset.ticketName === timer.ticket_name);
+        });
+        if (typeof TimerModule !== 'undefined') {
+            TimerModule.applyState(timer);
+        }
+    },
+
+    createElement: function(html, selector) {
+        const template = document.createElement('template');
+        template.innerHTML = html.trim();
+        return template.content.querySelector(selector);
+    }
+};
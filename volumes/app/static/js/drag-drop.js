@@ -48,45 +48,53 @@ const DragDropModule = {
 
             console.log(`DragDropModule: Setting up ticket ${index}:`, button.dataset.ticketId);
 
-            
+            this.setupButton(button);
 
-            // Make the entire button draggable
+        });
 
-            button.draggable = true;
+    },
 
-            
+    
 
-            // Add all drag event listeners to the button itself
+    // Also called by ActionsModule for buttons added after page load
 
-            button.addEventListener('dragstart', this.handleDragStart.bind(this));
+    setupButton: function(button) {
 
-            button.addEventListener('dragend', this.handleDragEnd.bind(this));
+        // Make the entire button draggable
 
-            button.addEventListener('dragover', this.handleDragOver.bind(this));
+        button.draggable = true;
 
-            button.addEventListener('drop', this.handleDrop.bind(this));
+        
 
-            button.addEventListener('dragenter', this.handleDragEnter.bind(this));
+        // Add all drag event listeners to the button itself
 
-            button.addEventListener('dragleave', this.handleDragLeave.bind(this));
+        button.addEventListener('dragstart', this.handleDragStart.bind(this));
 
-            
+        button.addEventListener('dragend', this.handleDragEnd.bind(this));
 
-            // Prevent link navigation during drag
+        button.addEventListener('dragover', this.handleDragOver.bind(this));
 
-            const link = button.querySelector('a');
+        button.addEventListener('drop', this.handleDrop.bind(this));
 
-            if (link) {
+        button.addEventListener('dragenter', this.handleDragEnter.bind(this));
 
-                link.addEventListener('dragstart', (e) => {
+        button.addEventListener('dragleave', this.handleDragLeave.bind(this));
 
-                    e.preventDefault();
+        
 
-                });
+        // Prevent link navigation during drag
 
-            }
+        const link = button.querySelector('a');
 
-        });
+        if (link) {
+
+            link.addEventListener('dragstart', (e) => {
+
+                e.preventDefault();
+
+            });
+
+        }
 
     },
 
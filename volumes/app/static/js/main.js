@@ -36,6 +36,12 @@ document.addEventListener('DOMContentLoaded', function() {
 
     }
 
+    if (typeof ActionsModule !== 'undefined') {
+
+        ActionsModule.init();
+
+    }
+
 });
 
 
@@ -98,6 +104,12 @@ function toggleDateSection(date) {
 
     if (entries.style.display === 'none') {
 
+        if (entries.dataset.loaded === 'false') {
+
+            loadDateEntries(date, entries);
+
+        }
+
         entries.style.display = 'block';
 
         header.classList.remove('collapsed');
@@ -111,3 +123,99 @@ function toggleDateSection(date) {
     }
 
 }
+
+
+
+// Fetch the rows of a collapsed day the first time it is expanded
+
+function loadDateEntries(date, container) {
+
+    const tbody = container.querySelector('tbody');
+
+    container.dataset.loaded = 'loading';
+
+    tbody.innerHTML = '<tr><td colspan="6" class="loading-row">Lädt...</td></tr>';
+
+
+
+    fetch('/entries/day/' + encodeURIComponent(date))
+
+        .then(response => {
+
+            if (!response.ok) {
+
+                throw new Error('HTTP ' + response.status);
+
+            }
+
+            return response.text();
+
+        })
+
+        .then(html => {
+
+            tbody.innerHTML = html;
+
+            container.dataset.loaded = 'true';
+
+        })
+
+        .catch(error => {
+
+            console.error('Error loading entries for ' + date + ':', error);
+
+            tbody.innerHTML = '<tr><td colspan="6" class="loading-row">Fehler beim Laden</td></tr>';
+
+            container.dataset.loaded = 'false';
+
+        });
+
+}
+
+
+
+
+
+
+
+// Load the next batch of older days below the already rendered ones
+
+function loadOlderEntries(button, before) {
+
+    button.disabled = true;
+
+    button.textContent = 'Lädt...';
+
+
+
+    fetch('/entries/older?before=' + encodeURIComponent(before))
+
+        .then(response => {
+
+            if (!response.ok) {
+
+                throw new Error('HTTP ' + response.status);
+
+            }
+
+            return response.text();
+
+        })
+
+        .then(html => {
+
+            button.closest('.load-older').outerHTML = html;
+
+        })
+
+        .catch(error => {
+
+            console.error('Error loading older entries:', error);
+
+            button.disabled = false;
+
+            button.textContent = 'Ältere Einträge laden';
+
+        });
+
+}
\ No newline at end of file
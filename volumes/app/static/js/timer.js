@@ -1,55 +1,100 @@
 // Timer functionality module
+//
+// The running entry is pushed over /events (server-sent events) when the page
+// loads and whenever a timer is started, stopped or edited. In between, the
+// display ticks locally - there is no per-second request to the server.
 const TimerModule = {
     currentTimerInterval: null,
-    
+    pollInterval: null,
+    eventSource: null,
+    startedAt: null,
+    entryId: null,
+
     init: function() {
-        this.startTimerUpdates();
+        if (!document.getElementById('currentTimer')) {
+            return;
+        }
+
+        if (window.EventSource) {
+            this.connect();
+        } else {
+            this.startPolling();
+        }
+    },
+
+    connect: function() {
+        // EventSource reconnects by itself after network errors
+        this.eventSource = new EventSource('/events');
+        this.eventSource.addEventListener('timer', (event) => {
+            this.applyState(JSON.parse(event.data));
+        });
+        this.eventSource.addEventListener('error', () => {
+            // CLOSED means no reconnect, e.g. a 503 when the server has no stream slot left
+            if (this.eventSource.readyState === EventSource.CLOSED) {
+                this.eventSource = null;
+                this.startPolling();
+            }
+        });
+    },
+
+    startPolling: function() {
+        // Fallback for browsers without EventSource support or without a free stream
+        const poll = () => {
+            fetch('/current_duration')
+                .then(response => response.json())
+                .then(data => {
+                    this.applyState(data.duration > 0
+                        ? { running: true, elapsed: data.duration }
+                        : { running: false });
+                })
+                .catch(error => console.error('Timer update error:', error));
+        };
+        poll();
+        this.pollInterval = setInterval(poll, 30000);
     },
-    
-    startTimerUpdates: function() {
-        // Check if there's a current entry running
-        const currentTimer = document.getElementById('currentTimer');
-        if (currentTimer && currentTimer.textContent.includes('läuft')) {
+
+    applyState: function(state) {
+        if (state.running) {
+            // Anchor on the local clock so client/server clock skew doesn't matter
+            this.startedAt = Date.now() - state.elapsed * 1000;
+            this.entryId = state.entry_id || null;
             this.updateRunningTimer();
-            this.currentTimerInterval = setInterval(() => {
-                this.updateRunningTimer();
-            }, 1000);
+            if (!this.currentTimerInterval) {
+                this.currentTimerInterval = setInterval(() => {
+                    this.updateRunningTimer();
+                }, 1000);
+            }
+        } else {
+            this.stopTimer();
+            const currentTimerEl = document.getElementById('currentTimer');
+            if (currentTimerEl) {
+                currentTimerEl.innerHTML = 'Bereit für neue Zeiterfassung';
+            }
         }
     },
-    
+
     updateRunningTimer: function() {
-        fetch('/current_duration')
-            .then(response => response.json())
-            .then(data => {
-                if (data.duration > 0) {
-                    const timeString = formatTimeHHMM(data.duration);
-                    
-                    const currentTimerEl = document.getElementById('currentTimer');
-                    if (currentTimerEl) {
-                        currentTimerEl.innerHTML = '🟢 Timer läuft: ' + timeString;
-                    }
-                    
-                    // Update running entries in table
-                    const runningElements = document.querySelectorAll('[id^="running-"]');
-                    runningElements.forEach(el => {
-                        el.innerHTML = timeString;
-                    });
-                } else {
-                    // Timer stopped, clear interval
-                    if (this.currentTimerInterval) {
-                        clearInterval(this.currentTimerInterval);
-                        this.currentTimerInterval = null;
-                    }
-                }
-            })
-            .catch(error => console.error('Timer update error:', error));
+        const timeString = formatTimeHHMM((Date.now() - this.startedAt) / 1000);
+
+        const currentTimerEl = document.getElementById('currentTimer');
+        if (currentTimerEl) {
+            currentTimerEl.innerHTML = '🟢 Timer läuft: ' + timeString;
+        }
+
+        // Update running entries in table
+        const selector = this.entryId ? '[id="running-' + this.entryId + '"]' : '[id^="running-"]';
+        document.querySelectorAll(selector).forEach(el => {
+            el.innerHTML = timeString;
+        });
     },
-    
+
     stopTimer: function() {
         if (this.currentTimerInterval) {
             clearInterval(this.currentTimerInterval);
             this.currentTimerInterval = null;
         }
+        this.startedAt = null;
+        this.entryId = null;
     }
 };
 
@@ -57,6 +102,6 @@ const TimerModule = {
 function formatTimeHHMM(seconds) {
     const hours = Math.floor(seconds / 3600);
     const minutes = Math.floor((seconds % 3600) / 60);
-    
+
     return String(hours).padStart(2, '0') + ':' + String(minutes).padStart(2, '0');
 }
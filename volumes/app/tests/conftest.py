@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+# Cheap hashes: the default PBKDF2 cost would make every login in the suite take ~0.3s
+os.environ.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+os.environ.setdefault('MAINTENANCE_ENABLED', 'false')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import timesheet_app  # noqa: E402
+
+DEMO_USER = ('demoUser', 'demo123')
+
+@pytest.fixture
+def app(tmp_path):
+    app = timesheet_app.create_app({'DATABASE': str(tmp_path / 'timesheet.db'),
+                                      'IMPORT_DIR': str(tmp_path / 'imports'), 'TESTING': True})
+    timesheet_app.login_limiter.reset()
+    timesheet_app.instrumentation.reset()
+    yield app
+    timesheet_app.timesheet.db.close_all()
+
+@pytest.fixture
+def manager(app):
+    return timesheet_app.timesheet
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def add_entry(manager, start_time, end_time, ticket_name='Alpha', user_id=1, memo=''):
+    """Create one finished entry through the batch API; returns its id."""
+    results, _ = manager.apply_entry_batch(user_id, [{
+        'op': 'create', 'ticket_name': ticket_name, 'start_time': start_time, 'end_time': end_time,
+        'memo': memo}])
+    assert results[0]['success'], results
+    return results[0]['id']
+
+def login(client, username=DEMO_USER[0], password=DEMO_USER[1]):
+    response = client.post('/login', data={'username': username, 'password': password})
+    assert response.status_code == 302, response.status_code
+    return response
+
+@pytest.fixture
+def user_client(client):
+    """Test client logged in as the demo user."""
+    login(client)
+    return client
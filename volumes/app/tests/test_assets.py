@@ -0,0 +1,93 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+import pytest
+
+import build_assets
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+
+class FakeBrotli:
+    """Stands in for the optional brotli package."""
+    @staticmethod
+    def compress(data, quality):
+        return b'BR' + data
+
+@pytest.fixture
+def built(tmp_path, monkeypatch):
+    static_dir = tmp_path / 'static'
+    shutil.copytree(STATIC_DIR, static_dir)
+    monkeypatch.setattr(build_assets, 'brotli', FakeBrotli)
+    manifest = build_assets.build(str(static_dir))
+    return static_dir, manifest
+
+def test_minify_css_keeps_strings_and_selectors():
+    css = '/* c */ a :hover , b { color:  red ;\n content: "a  ;  b"; }'
+    assert build_assets.minify_css(css) == 'a :hover,b{color:red;content:"a  ;  b"}'
+
+def test_minify_js_keeps_template_literals():
+    js = 'function f() {\n    // note\n    /* block\n       comment */\n    return `a\n    b`;\n}\n'
+    assert build_assets.minify_js(js) == 'function f() {\nreturn `a\n    b`;\n}'
+
+def test_build_writes_fingerprinted_bundles(built):
+    static_dir, manifest = built
+    dist = static_dir / build_assets.DIST_DIR
+    assert set(manifest) == set(build_assets.BUNDLES) | set(build_assets.IMAGES)
+    assert json.loads((dist / build_assets.MANIFEST).read_text(encoding='utf-8')) == manifest
+
+    for bundle, name in manifest.items():
+        data = (dist / name).read_bytes()
+        assert re.search(r'\.([0-9a-f]{12})\.\w+$', name).group(1) == hashlib.sha256(data).hexdigest()[:12]
+        if name.endswith(build_assets.COMPRESSIBLE):
+            assert gzip.decompress((dist / f'{name}.gz').read_bytes()) == data
+            assert (dist / f'{name}.br').read_bytes() == b'BR' + data
+
+    # The CSS points at the fingerprinted background image
+    css = (dist / manifest['timesheet.css']).read_text(encoding='utf-8')
+    assert f"/static/dist/{manifest['img/bg.png']}" in css
+    assert '/static/img/bg.png' not in css
+
+def test_build_is_reproducible(built):
+    static_dir, manifest = built
+    assert build_assets.build(str(static_dir)) == manifest
+
+@pytest.fixture
+def served(app, built, monkeypatch):
+    static_dir, manifest = built
+    monkeypatch.setattr(app, 'static_folder', str(static_dir))
+    app.extensions['assets'] = manifest
+    return manifest
+
+def test_pages_link_the_bundles(user_client, served):
+    html = user_client.get('/').get_data(as_text=True)
+    assert f"/static/dist/{served['timesheet.css']}" in html
+    assert f"/static/dist/{served['timesheet.js']}" in html
+
+def test_dist_asset_negotiates_encoding(client, served, built):
+    static_dir, _ = built
+    name = served['timesheet.js']
+    plain = (static_dir / build_assets.DIST_DIR / name).read_bytes()
+
+    response = client.get(f'/static/dist/{name}')
+    assert response.data == plain
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.mimetype in ('application/javascript', 'text/javascript')
+
+    gz = client.get(f'/static/dist/{name}', headers={'Accept-Encoding': 'gzip'})
+    assert gz.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(gz.data) == plain
+    assert gz.mimetype == response.mimetype
+
+    br = client.get(f'/static/dist/{name}', headers={'Accept-Encoding': 'gzip, br'})
+    assert br.headers['Content-Encoding'] == 'br'
+    assert br.data == b'BR' + plain
+
+@pytest.mark.parametrize('filename', ['missing.js', '../css/base.css', 'img'])
+def test_dist_asset_404(client, served, filename):
+    assert client.get(f'/static/dist/{filename}').status_code == 404
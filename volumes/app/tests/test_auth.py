@@ -0,0 +1,95 @@
+import threading
+
+from werkzeug.security import generate_password_hash
+
+import timesheet_app
+from conftest import DEMO_USER, login
+from timesheet_app import PasswordHasher, canonical_hash_method, login_limiter
+
+def post_login(client, username, password, **kwargs):
+    return client.post('/login', data={'username': username, 'password': password}, **kwargs)
+
+def test_failed_logins_per_user_are_limited(client, monkeypatch):
+    monkeypatch.setattr(login_limiter, 'max_failures_per_user', 3)
+    codes = [post_login(client, DEMO_USER[0], 'wrong').status_code for _ in range(4)]
+    assert codes == [200, 200, 200, 429]
+
+    # The right password doesn't get through either until the window has passed
+    response = post_login(client, *DEMO_USER)
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+    assert 'Zu viele' in response.get_data(as_text=True)
+
+def test_successful_login_clears_failures(client, monkeypatch):
+    monkeypatch.setattr(login_limiter, 'max_failures_per_user', 2)
+    post_login(client, DEMO_USER[0], 'wrong')
+    login(client)
+    assert post_login(client, DEMO_USER[0], 'wrong').status_code == 200
+    assert post_login(client, DEMO_USER[0], 'wrong').status_code == 200
+    assert post_login(client, DEMO_USER[0], 'wrong').status_code == 429
+
+def test_attempts_per_ip_are_limited(client, monkeypatch):
+    monkeypatch.setattr(login_limiter, 'max_per_ip', 2)
+    codes = [post_login(client, f'user{i}', 'secret').status_code for i in range(3)]
+    assert codes == [200, 200, 429]
+    other = post_login(client, 'user3', 'secret', environ_base={'REMOTE_ADDR': '203.0.113.7'})
+    assert other.status_code == 200
+
+def test_trusted_proxy_keys_limit_on_forwarded_address(tmp_path, monkeypatch):
+    app = timesheet_app.create_app({'DATABASE': str(tmp_path / 'proxied.db'), 'TRUSTED_PROXIES': 1})
+    login_limiter.reset()
+    monkeypatch.setattr(login_limiter, 'max_per_ip', 1)
+    client = app.test_client()
+    try:
+        assert post_login(client, 'a', 'x', headers={'X-Forwarded-For': '198.51.100.1'}).status_code == 200
+        assert post_login(client, 'b', 'x', headers={'X-Forwarded-For': '198.51.100.2'}).status_code == 200
+        assert post_login(client, 'c', 'x', headers={'X-Forwarded-For': '198.51.100.2'}).status_code == 429
+    finally:
+        timesheet_app.timesheet.db.close_all()
+
+def test_outdated_hash_is_replaced_on_login(manager):
+    user_id = manager.add_user('olduser', 'secret1')
+    with manager.db.connection() as conn:
+        conn.execute('UPDATE users SET password_hash = ? WHERE id = ?',
+                     (generate_password_hash('secret1', 'pbkdf2:sha256:2000'), user_id))
+
+    assert manager.authenticate_user('olduser', 'secret1').id == user_id
+    with manager.db.connection() as conn:
+        password_hash = conn.execute('SELECT password_hash FROM users WHERE id = ?', (user_id,)).fetchone()[0]
+    assert password_hash.startswith(manager.passwords.prefix + '$')
+    assert not manager.passwords.needs_rehash(password_hash)
+
+def test_canonical_hash_method():
+    assert canonical_hash_method('pbkdf2') == f'pbkdf2:sha256:{timesheet_app.DEFAULT_PBKDF2_ITERATIONS}'
+    assert canonical_hash_method('pbkdf2:sha512') == f'pbkdf2:sha512:{timesheet_app.DEFAULT_PBKDF2_ITERATIONS}'
+    assert canonical_hash_method('scrypt') == 'scrypt:32768:8:1'
+    assert canonical_hash_method('scrypt:16384:8:2') == 'scrypt:16384:8:2'
+
+def test_busy_hash_pool_returns_503(client, manager, monkeypatch):
+    hasher = PasswordHasher(method=manager.passwords.method, workers=1, backlog=0)
+    monkeypatch.setattr(manager, 'passwords', hasher)
+    # Occupy the only slot
+    done = threading.Event()
+    hasher._slots.acquire()
+    hasher._executor.submit(done.wait)
+    try:
+        response = post_login(client, *DEMO_USER)
+        assert response.status_code == 503
+        assert response.headers['Retry-After']
+        assert hasher.stats()['rejected'] == 1
+    finally:
+        done.set()
+        hasher._slots.release()
+    login(client)
+
+def test_change_password(user_client, manager):
+    response = user_client.post('/change_password', data={
+        'current_password': 'wrong', 'new_password': 'abcdef', 'new_password_confirm': 'abcdef'})
+    assert 'Aktuelles Passwort ist falsch' in response.get_data(as_text=True)
+    assert manager.authenticate_user(*DEMO_USER)
+
+    response = user_client.post('/change_password', data={
+        'current_password': DEMO_USER[1], 'new_password': 'abcdef', 'new_password_confirm': 'abcdef'})
+    assert response.status_code == 302
+    assert manager.authenticate_user(DEMO_USER[0], 'abcdef')
+    assert manager.authenticate_user(*DEMO_USER) is None
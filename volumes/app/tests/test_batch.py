@@ -0,0 +1,69 @@
+import timesheet_app
+from conftest import add_entry, login
+
+def post_batch(client, items, **options):
+    return client.post('/api/entries/batch', json={'items': items, **options})
+
+def test_batch_applies_all_ops(user_client, manager):
+    add_entry(manager, '2024-05-01T09:00:00', '2024-05-01T10:00:00')
+    add_entry(manager, '2024-05-02T09:00:00', '2024-05-02T10:00:00')
+    second, first = manager.get_entries(1)
+
+    response = post_batch(user_client, [
+        {'op': 'create', 'ticket_name': 'Beta', 'start_time': '2024-05-03T09:00:00',
+         'end_time': '2024-05-03T09:30:00', 'memo': 'neu'},
+        {'op': 'update', 'id': first.id, 'end_time': '2024-05-01T12:00:00'},
+        {'op': 'delete', 'id': second.id},
+    ])
+    data = response.get_json()
+    assert response.status_code == 200, data
+    assert (data['applied'], data['failed']) == (3, 0)
+
+    entries = {entry.id: entry for entry in manager.get_entries(1)}
+    assert set(entries) == {first.id, data['results'][0]['id']}
+    assert entries[first.id].duration == 3.0
+    assert entries[first.id].memo == first.memo
+    assert manager.get_time_summary(1, '2024-05-01', '2024-05-31') == ({'Alpha': 3.0, 'Beta': 0.5}, 3.5)
+
+def test_atomic_batch_rejects_everything_on_one_error(user_client, manager):
+    add_entry(manager, '2024-05-01T09:00:00', '2024-05-01T10:00:00')
+    entry = manager.get_entries(1)[0]
+
+    response = post_batch(user_client, [
+        {'op': 'update', 'id': entry.id, 'memo': 'changed'},
+        {'op': 'delete', 'id': 'missing'},
+    ])
+    assert response.status_code == 400
+    assert [result.get('error') for result in response.get_json()['results']] == [None, 'Entry not found']
+    assert manager.get_entries(1)[0].memo == ''
+
+def test_non_atomic_batch_applies_valid_items(user_client, manager):
+    add_entry(manager, '2024-05-01T09:00:00', '2024-05-01T10:00:00')
+    entry = manager.get_entries(1)[0]
+
+    data = post_batch(user_client, [
+        {'op': 'update', 'id': entry.id, 'memo': 'changed'},
+        {'op': 'update', 'id': entry.id, 'memo': 'twice'},
+        {'op': 'create', 'ticket_name': 'Beta', 'start_time': '2024-05-02T10:00:00',
+         'end_time': '2024-05-02T09:00:00'},
+        {'op': 'rename'},
+    ], atomic=False).get_json()
+    assert [result.get('error') for result in data['results']] == [
+        None, 'Duplicate id in batch', 'end_time before start_time', 'Unknown op']
+    assert (data['applied'], data['failed']) == (1, 3)
+    assert manager.get_entries(1)[0].memo == 'changed'
+
+def test_batch_only_touches_own_entries(client, manager):
+    alice = manager.add_user('alice', 'secret1')
+    add_entry(manager, '2024-05-01T09:00:00', '2024-05-01T10:00:00', user_id=alice)
+    entry = manager.get_entries(alice)[0]
+
+    login(client)
+    response = post_batch(client, [{'op': 'delete', 'id': entry.id}])
+    assert response.status_code == 400
+    assert manager.get_entries(alice) == [entry]
+
+def test_batch_size_is_limited(user_client, monkeypatch):
+    monkeypatch.setattr(timesheet_app, 'ENTRY_BATCH_MAX_ITEMS', 2)
+    assert post_batch(user_client, [{'op': 'delete', 'id': str(i)} for i in range(3)]).status_code == 413
+    assert post_batch(user_client, []).status_code == 400
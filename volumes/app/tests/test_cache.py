@@ -0,0 +1,57 @@
+import time
+
+from conftest import add_entry
+from timesheet_app import UserDataCache
+
+def test_summary_is_cached_until_entries_change(manager):
+    add_entry(manager, '2024-05-01T09:00:00', '2024-05-01T10:00:00')
+    assert manager.get_time_summary(1, '2024-05-01', '2024-05-31') == ({'Alpha': 1.0}, 1.0)
+    assert manager.get_time_summary(1, '2024-05-01', '2024-05-31') == ({'Alpha': 1.0}, 1.0)
+    assert manager.cache.stats()['by_kind']['summary'] == {'hits': 1, 'misses': 1}
+
+    add_entry(manager, '2024-05-02T09:00:00', '2024-05-02T09:30:00')
+    assert manager.get_time_summary(1, '2024-05-01', '2024-05-31') == ({'Alpha': 1.5}, 1.5)
+
+def test_writes_of_another_worker_invalidate(manager):
+    add_entry(manager, '2024-05-01T09:00:00', '2024-05-01T10:00:00')
+    assert manager.get_time_summary(1, '2024-05-01', '2024-05-31')[1] == 1.0
+
+    # Same as another process writing: only the database changes, not this cache
+    with manager.db.connection() as conn:
+        conn.execute('UPDATE daily_rollups SET seconds = 7200 WHERE user_id = 1')
+        manager._data_changed(conn.cursor(), 1, 'entries')
+    assert manager.get_time_summary(1, '2024-05-01', '2024-05-31')[1] == 2.0
+
+def test_users_are_invalidated_separately(manager):
+    alice = manager.add_user('alice', 'secret1')
+    add_entry(manager, '2024-05-01T09:00:00', '2024-05-01T10:00:00')
+    manager.get_time_summary(1, '2024-05-01', '2024-05-31')
+    add_entry(manager, '2024-05-01T09:00:00', '2024-05-01T10:00:00', user_id=alice)
+    manager.get_time_summary(1, '2024-05-01', '2024-05-31')
+    assert manager.cache.stats()['by_kind']['summary']['hits'] == 1
+
+def test_ticket_changes_invalidate_ticket_lists(manager):
+    manager.add_ticket(1, 'Alpha', '#ff0000')
+    assert [ticket.name for ticket in manager.get_tickets(1)] == ['Alpha']
+    manager.add_ticket(1, 'Beta', '#00ff00')
+    assert sorted(ticket.name for ticket in manager.get_tickets(1)) == ['Alpha', 'Beta']
+
+def test_cache_expires_and_evicts():
+    cache = UserDataCache(max_entries=2, ttl=0.05)
+    cache.put(1, 'summary', (), 'a', 1)
+    assert cache.get(1, 'summary', (), 1) == (True, 'a')
+    assert cache.get(1, 'summary', (), 2) == (False, None)
+
+    cache.put(1, 'summary', (), 'a', 1)
+    cache.put(2, 'summary', (), 'b', 1)
+    cache.put(3, 'summary', (), 'c', 1)
+    assert cache.stats()['evictions'] == 1
+    assert cache.get(1, 'summary', (), 1) == (False, None)
+
+    time.sleep(0.06)
+    assert cache.get(3, 'summary', (), 1) == (False, None)
+
+def test_stats_are_for_admins_only(app, user_client):
+    assert user_client.get('/api/stats').status_code == 403
+    app.config['ADMIN_USERS'] = {'demoUser'}
+    assert 'hits' in user_client.get('/api/stats').get_json()['cache']
@@ -0,0 +1,43 @@
+from conftest import login
+
+def test_index_revalidates_after_login(client):
+    login(client)
+
+    # The welcome message is shown once, without validators
+    first = client.get('/')
+    assert first.status_code == 200
+    assert 'Willkommen zurück' in first.get_data(as_text=True)
+    assert first.headers.get('ETag') is None
+
+    page = client.get('/')
+    assert page.status_code == 200
+    assert 'Willkommen zurück' not in page.get_data(as_text=True)
+    etag = page.headers['ETag']
+
+    cached = client.get('/', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == etag
+
+def test_json_validates_while_a_flash_is_pending(user_client):
+    # The login message is still pending; JSON responses never show it
+    response = user_client.get('/api/entries')
+    etag = response.headers['ETag']
+    assert user_client.get('/api/entries', headers={'If-None-Match': etag}).status_code == 304
+
+def test_changes_invalidate_the_etag(user_client, manager):
+    user_client.get('/')
+    etag = user_client.get('/').headers['ETag']
+    manager.add_ticket(1, 'Alpha', '#ff0000')
+
+    response = user_client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_if_modified_since_is_ignored(user_client):
+    user_client.get('/')
+    page = user_client.get('/')
+    assert 'Last-Modified' not in page.headers
+
+    # Only the ETag can tell a deploy or a new day apart
+    response = user_client.get('/', headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert response.status_code == 200
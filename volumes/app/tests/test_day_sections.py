@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import timesheet_app
+from conftest import add_entry
+
+def day(days_ago):
+    return (datetime.now() - timedelta(days=days_ago)).strftime('%Y-%m-%d')
+
+def add_entries(manager, dates):
+    for date in dates:
+        add_entry(manager, f'{date}T09:00:00', f'{date}T10:30:00', memo=f'memo {date}')
+
+def test_index_renders_headers_without_rows(user_client, manager):
+    yesterday = day(1)
+    add_entries(manager, [yesterday])
+    html = user_client.get('/').get_data(as_text=True)
+    assert f'data-date="{yesterday}"' in html
+    assert f'id="entries-{yesterday}" data-loaded="false"' in html
+    assert f'memo {yesterday}' not in html
+    assert 'load-older-btn' not in html
+
+def test_day_endpoint(user_client, manager):
+    yesterday = day(1)
+    add_entries(manager, [yesterday, yesterday, day(2)])
+    data = user_client.get(f'/entries/day/{yesterday}?format=json').get_json()
+    assert len(data['entries']) == 2
+    assert data['total_hours'] == 3.0
+
+    rows = user_client.get(f'/entries/day/{yesterday}').get_data(as_text=True)
+    assert rows.count('<tr') == 2
+    assert user_client.get('/entries/day/yesterday?format=json').status_code == 400
+
+def test_older_entries_are_loaded_on_demand(user_client, manager, monkeypatch):
+    monkeypatch.setattr(timesheet_app, 'INDEX_WINDOW_DAYS', 2)
+    old_days = [day(10), day(20), day(30)]
+    add_entries(manager, old_days)
+    html = user_client.get('/').get_data(as_text=True)
+    assert f"loadOlderEntries(this, '{day(1)}')" in html
+
+    first = user_client.get(f'/entries/older?before={day(1)}').get_data(as_text=True)
+    assert all(f'data-date="{date}"' in first for date in old_days[:2])
+    assert f'data-date="{old_days[2]}"' not in first
+    assert f"loadOlderEntries(this, '{old_days[1]}')" in first
+
+    last = user_client.get(f'/entries/older?before={old_days[1]}').get_data(as_text=True)
+    assert f'data-date="{old_days[2]}"' in last
+    assert 'load-older-btn' not in last
@@ -0,0 +1,94 @@
+import pytest
+
+from conftest import add_entry
+from timesheet_app import EntrySpanError
+
+def start_entry(manager, ticket='Alpha'):
+    manager.add_ticket(1, ticket, '#ff0000')
+    _, entry = manager.switch_timer(1, ticket)
+    manager.switch_timer(1, None)
+    return entry
+
+@pytest.mark.parametrize('start_time', ['bad', '', '2024-13-01T10:00:00'])
+def test_form_update_rejects_invalid_times(user_client, manager, start_time):
+    entry = start_entry(manager)
+    response = user_client.post('/update_entry', data={
+        'entry_id': entry.id, 'start_time': start_time, 'end_time': '', 'memo': 'changed'})
+    assert response.status_code == 302
+
+    unchanged = manager.get_entries(1)[0]
+    assert unchanged.start_time == entry.start_time
+    assert unchanged.memo == ''
+    with user_client.session_transaction() as session:
+        assert session['_flashes'][-1][0] == 'error'
+
+def test_form_update_changes_entry(user_client, manager):
+    entry = start_entry(manager)
+    response = user_client.post('/update_entry', data={
+        'entry_id': entry.id, 'start_time': '2024-03-04T09:00:00', 'end_time': '2024-03-04T10:30:00',
+        'memo': 'Review'})
+    assert response.status_code == 302
+
+    updated = manager.get_entries(1)[0]
+    assert (updated.start_time, updated.duration, updated.memo) == ('2024-03-04T09:00:00', 1.5, 'Review')
+
+def test_api_update_rejects_invalid_times(user_client, manager):
+    entry = start_entry(manager)
+    response = user_client.post(f'/api/entries/{entry.id}', json={'start_time': 'bad'})
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'error': 'Invalid time'}
+
+def test_end_before_start_is_rejected(user_client, manager):
+    start_entry(manager)
+    entry = manager.get_entries(1)[0]
+    times = {'start_time': '2024-03-04T10:00:00', 'end_time': '2024-03-04T09:00:00'}
+    with pytest.raises(EntrySpanError):
+        manager.update_entry(1, entry.id, times['start_time'], times['end_time'], '')
+
+    response = user_client.post(f'/api/entries/{entry.id}', json=times)
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'error': 'end_time before start_time'}
+
+    user_client.post('/update_entry', data={'entry_id': entry.id, 'memo': 'changed', **times})
+    with user_client.session_transaction() as session:
+        assert session['_flashes'][-1][0] == 'error'
+    assert manager.get_entries(1)[0] == entry
+    with manager.db.connection() as conn:
+        assert conn.execute('SELECT MIN(seconds) FROM daily_rollups').fetchone()[0] >= 0
+
+def test_missing_entries_return_none(manager):
+    assert manager.update_entry(1, 'missing', '2024-03-04T09:00:00', None, '') is None
+    assert manager.delete_entry(1, 'missing') is None
+
+def test_api_reports_missing_entries(user_client):
+    response = user_client.post('/api/entries/missing', json={'start_time': '2024-03-04T09:00:00'})
+    assert response.status_code == 404
+    assert user_client.delete('/api/entries/missing').status_code == 404
+
+def create_entries(manager, start_times):
+    return [add_entry(manager, start, start[:11] + '23:00:00') for start in start_times]
+
+def test_api_pages_through_entries(user_client, manager):
+    # Two entries share a start time, so the cursor has to break the tie by id
+    create_entries(manager, ['2024-05-01T09:00:00', '2024-05-02T09:00:00', '2024-05-02T09:00:00',
+                             '2024-05-03T09:00:00', '2024-05-04T09:00:00'])
+    seen, cursor = [], ''
+    while True:
+        response = user_client.get(f'/api/entries?limit=2&cursor={cursor}')
+        data = response.get_json()
+        assert len(data['entries']) <= 2
+        seen.extend(entry['id'] for entry in data['entries'])
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+    assert seen == [entry.id for entry in manager.get_entries(1)]
+    assert len(seen) == 5
+
+def test_api_filters_entries_by_date(user_client, manager):
+    ids = create_entries(manager, ['2024-05-01T09:00:00', '2024-05-02T09:00:00', '2024-05-03T09:00:00'])
+    data = user_client.get('/api/entries?start=2024-05-02&end=2024-05-02').get_json()
+    assert [entry['id'] for entry in data['entries']] == [ids[1]]
+    assert data['next_cursor'] is None
+
+def test_api_rejects_malformed_cursor(user_client):
+    assert user_client.get('/api/entries?cursor=nonsense').status_code == 400
@@ -0,0 +1,25 @@
+import timesheet_app
+
+def test_events_stream_sends_timer_state(user_client):
+    response = user_client.get('/events', buffered=False)
+    assert response.status_code == 200
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'retry:')
+    assert b'event: timer' in next(chunks)
+    response.close()
+
+def test_events_streams_are_limited(app, user_client):
+    timesheet_app.timesheet.timer_events.max_streams = 1
+    first = user_client.get('/events', buffered=False)
+    assert first.status_code == 200
+
+    refused = user_client.get('/events', buffered=False)
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After']
+
+    # Closing a stream frees its slot, even if it never sent anything
+    first.close()
+    assert timesheet_app.timesheet.timer_events.streams == 0
+    again = user_client.get('/events', buffered=False)
+    assert again.status_code == 200
+    again.close()
@@ -0,0 +1,39 @@
+import csv
+import io
+
+import pytest
+
+from conftest import login
+
+@pytest.fixture
+def entries(manager):
+    """One finished entry for the demo user and one for alice."""
+    alice = manager.add_user('alice', 'secret1')
+    for user_id in (1, alice):
+        manager.add_ticket(user_id, 'Alpha', '#ff0000')
+        _, entry = manager.switch_timer(user_id, 'Alpha')
+        manager.switch_timer(user_id, None)
+    return alice
+
+def exported_users(response):
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return sorted(row['user'] for row in csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+def test_export_defaults_to_own_entries(user_client, entries):
+    assert exported_users(user_client.get('/api/export')) == ['demoUser']
+
+def test_user_named_all_gets_only_own_entries(app, client, manager, entries):
+    manager.add_user('all', 'secret1')
+    manager.add_ticket(manager.get_user_by_username('all').id, 'Alpha', '#ff0000')
+    login(client, 'all', 'secret1')
+
+    assert exported_users(client.get('/api/export')) == []
+    assert exported_users(client.get('/api/export?user=all')) == []
+    assert client.get('/api/export?all=1').status_code == 403
+    assert client.get('/api/export?user=alice').status_code == 403
+
+def test_admin_exports_other_users(app, user_client, entries):
+    app.config['ADMIN_USERS'] = {'demoUser'}
+    assert exported_users(user_client.get('/api/export?user=alice')) == ['alice']
+    assert exported_users(user_client.get('/api/export?all=1')) == ['alice', 'demoUser']
+    assert user_client.get('/api/export?user=nobody').status_code == 404
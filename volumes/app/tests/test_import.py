@@ -0,0 +1,102 @@
+import io
+import json
+import os
+import time
+
+import pytest
+
+import timesheet_app
+from conftest import login
+
+CSV = (
+    'ticket,start_time,end_time,duration_hours,memo,jira_ticket\n'
+    'Alpha,2024-05-01T09:00:00,2024-05-01T10:00:00,,Planung,PROJ-1\n'
+    'Beta,2024-05-01T10:00:00,,0.5,,\n'
+    ',2024-05-01T11:00:00,2024-05-01T12:00:00,,,\n'
+    'Alpha,2024-05-02T09:00:00,2024-05-02T08:00:00,,,\n'
+)
+
+def upload(client, content, filename='entries.csv'):
+    return client.post('/api/import', data={'file': (io.BytesIO(content.encode()), filename)},
+                       content_type='multipart/form-data')
+
+def run_upload(client, content, filename='entries.csv'):
+    """Upload and poll the job until the background import has finished."""
+    response = upload(client, content, filename)
+    assert response.status_code == 202, response.get_json()
+    deadline = time.monotonic() + 10
+    while True:
+        data = client.get(response.get_json()['status_url']).get_json()
+        if data['job']['status'] != 'running' and data['report']:
+            return data
+        assert time.monotonic() < deadline, data
+        time.sleep(0.02)
+
+def test_import_csv(app, user_client, manager):
+    data = run_upload(user_client, CSV)
+    assert data['job']['status'] == 'done'
+    assert (data['job']['inserted'], data['job']['failed']) == (2, 2)
+    assert [error['record'] for error in data['report']['errors']] == [3, 4]
+    # The spooled upload is gone
+    assert os.listdir(app.config['IMPORT_DIR']) == []
+
+    assert manager.get_time_summary(1, '2024-05-01', '2024-05-31') == ({'Alpha': 1.0, 'Beta': 0.5}, 1.5)
+    tickets = {ticket.name: ticket for ticket in manager.get_tickets(1)}
+    assert tickets['Alpha'].jira_ticket == 'PROJ-1'
+
+def test_reimport_skips_duplicates(user_client, manager):
+    run_upload(user_client, CSV)
+    ndjson = '\n'.join(json.dumps(record) for record in [
+        {'ticket': 'Alpha', 'start_time': '2024-05-01T09:00:00', 'end_time': '2024-05-01T10:00:00'},
+        {'ticket': 'Alpha', 'start_time': '2024-05-03T09:00:00', 'duration_hours': 2},
+    ])
+    data = run_upload(user_client, ndjson, 'more.ndjson')
+    assert (data['job']['inserted'], data['job']['duplicates']) == (1, 1)
+    assert manager.get_time_summary(1, '2024-05-01', '2024-05-31')[1] == 3.5
+
+def test_failed_import_resumes_where_it_stopped(manager, monkeypatch):
+    records = [{'ticket': 'Alpha', 'start_time': f'2024-05-{day:02d}T09:00:00', 'duration_hours': 1}
+               for day in range(1, 6)]
+    job = manager.open_import_job('entries.json', 'json', 'checksum', user_id=1)
+
+    real_batch = manager.import_entry_batch
+    def failing_batch(job, rows, position, *args):
+        if position > 2:
+            raise RuntimeError('disk full')
+        return real_batch(job, rows, position, *args)
+    monkeypatch.setattr(manager, 'import_entry_batch', failing_batch)
+    with pytest.raises(RuntimeError):
+        timesheet_app.run_import(job, iter(records), batch_size=2)
+    assert (job.status, job.position) == ('failed', 2)
+    # The part that made it in is visible already
+    assert manager.get_time_summary(1, '2024-05-01', '2024-05-31')[1] == 2.0
+
+    monkeypatch.setattr(manager, 'import_entry_batch', real_batch)
+    resumed = manager.open_import_job('entries.json', 'json', 'checksum', user_id=1)
+    assert (resumed.id, resumed.position) == (job.id, 2)
+    report = timesheet_app.run_import(resumed, iter(records), batch_size=2)
+    assert (report['resumed_at'], report['records']) == (2, 3)
+    assert (resumed.status, resumed.inserted, resumed.duplicates) == ('done', 5, 0)
+    assert manager.get_time_summary(1, '2024-05-01', '2024-05-31')[1] == 5.0
+
+def test_import_rejects_unknown_format(user_client):
+    response = upload(user_client, 'x', 'entries.xlsx')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid format'
+
+def test_invalid_file_fails_the_job(user_client):
+    data = run_upload(user_client, '{"not": "a list"}', 'entries.json')
+    assert data['job']['status'] == 'failed'
+    assert 'Array' in data['job']['error']
+
+def test_jobs_of_other_users_are_hidden(client, manager):
+    job = manager.open_import_job('entries.csv', 'csv', 'checksum', user_id=1)
+    manager.add_user('alice', 'secret1')
+    login(client, 'alice', 'secret1')
+    assert client.get(f'/api/import/{job.id}').status_code == 404
+
+def test_upload_size_is_limited(app, user_client):
+    app.config['MAX_CONTENT_LENGTH'] = 1024
+    response = upload(user_client, CSV * 50)
+    assert response.status_code == 413
+    assert response.get_json()['success'] is False
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import timesheet_app
+from conftest import add_entry
+from timesheet_app import MaintenanceScheduler
+
+def add_archived_ticket(manager, user_id, name, last_entry_days_ago):
+    ticket_id = manager.add_ticket(user_id, name, '#ff0000')
+    if last_entry_days_ago is not None:
+        start = (datetime.now() - timedelta(days=last_entry_days_ago)).replace(microsecond=0)
+        add_entry(manager, start.isoformat(), (start + timedelta(hours=1)).isoformat(),
+                  ticket_name=name, user_id=user_id)
+    manager.archive_ticket(user_id, ticket_id)
+    return ticket_id
+
+def test_cleanup_deletes_only_stale_archived_tickets(manager):
+    alice = manager.add_user('alice', 'secret1')
+    stale = add_archived_ticket(manager, 1, 'Stale', 40)
+    unused = add_archived_ticket(manager, alice, 'Unused', None)
+    recent = add_archived_ticket(manager, 1, 'Recent', 3)
+    active = manager.add_ticket(1, 'Active', '#00ff00')
+
+    assert manager.cleanup_all_archived_tickets(batch_size=1) == 2
+    assert manager.get_ticket_by_id(1, stale) is None
+    assert manager.get_ticket_by_id(alice, unused) is None
+    assert manager.get_ticket_by_id(1, recent) is not None
+    assert manager.get_ticket_by_id(1, active) is not None
+    # Entries of a deleted ticket stay in the history
+    assert manager.get_time_summary(1, '2000-01-01', '2100-01-01')[0].keys() == {'Stale', 'Recent'}
+
+def test_pages_no_longer_run_the_cleanup(user_client, manager):
+    stale = add_archived_ticket(manager, 1, 'Stale', None)
+    assert user_client.get('/').status_code == 200
+    assert manager.get_ticket_by_id(1, stale) is not None
+
+def test_scheduler_runs_due_jobs_and_records_failures():
+    scheduler = MaintenanceScheduler()
+    calls = []
+    scheduler.add_job('ok', 60, lambda: calls.append('ok') or 3)
+    scheduler.add_job('broken', 60, lambda: 1 / 0)
+    scheduler.add_job('disabled', 0, lambda: calls.append('disabled'))
+
+    scheduler.run_pending()
+    scheduler.run_pending()
+    assert calls == ['ok']
+    stats = scheduler.stats()
+    assert 'disabled' not in stats
+    assert (stats['ok']['runs'], stats['ok']['last_result']) == (1, 3)
+    assert (stats['broken']['failures'], stats['broken']['last_error']) == (1, 'division by zero')
+
+@pytest.mark.skipif(timesheet_app.fcntl is None, reason='needs fcntl')
+def test_only_one_process_holds_the_lock(tmp_path):
+    first, second = MaintenanceScheduler(), MaintenanceScheduler()
+    first._lock_path = second._lock_path = str(tmp_path / 'maintenance.lock')
+    try:
+        assert first._is_leader()
+        assert not second._is_leader()
+        first.stop()
+        assert second._is_leader()
+    finally:
+        first.stop()
+        second.stop()
+
+def test_cleanup_only_invalidates_users_who_lost_tickets(manager):
+    alice = manager.add_user('alice', 'secret1')
+    add_archived_ticket(manager, 1, 'Stale', None)
+    add_archived_ticket(manager, alice, 'Recent', 3)
+    before = manager.get_data_versions(1), manager.get_data_versions(alice)
+
+    assert manager.cleanup_old_archived_tickets([1, alice]) == 1
+    assert manager.get_data_versions(1).tickets == before[0].tickets + 1
+    assert manager.get_data_versions(alice) == before[1]
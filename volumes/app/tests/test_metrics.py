@@ -0,0 +1,30 @@
+import pytest
+
+PUBLIC = {'REMOTE_ADDR': '203.0.113.7'}
+
+def test_metrics_without_token_only_for_localhost(user_client):
+    user_client.get('/')
+    response = user_client.get('/metrics')
+    assert response.status_code == 200
+    assert 'timesheet_http_requests_total{endpoint="main.index"' in response.get_data(as_text=True)
+
+    assert user_client.get('/metrics', environ_base=PUBLIC).status_code == 404
+
+@pytest.mark.parametrize('remote', [{}, PUBLIC])
+def test_metrics_token(app, client, remote):
+    app.config['METRICS_TOKEN'] = 's3cret'
+    assert client.get('/metrics', environ_base=remote).status_code == 401
+    assert client.get('/metrics', environ_base=remote,
+                      headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/metrics', environ_base=remote,
+                      headers={'Authorization': 'Bearer s3cret'}).status_code == 200
+
+def test_forwarded_loopback_address_is_not_trusted(tmp_path):
+    import timesheet_app
+    app = timesheet_app.create_app({'DATABASE': str(tmp_path / 'proxied.db'), 'TRUSTED_PROXIES': 1})
+    client = app.test_client()
+    # Traefik appends the real client; a forged first hop doesn't count
+    response = client.get('/metrics', environ_base=PUBLIC,
+                          headers={'X-Forwarded-For': '127.0.0.1, 203.0.113.7'})
+    assert response.status_code == 404
+    timesheet_app.timesheet.db.close_all()
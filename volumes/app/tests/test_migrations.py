@@ -0,0 +1,122 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import timesheet_app
+
+# Schema written by the release before versioned migrations (user_version 0)
+BASELINE_SCHEMA = '''
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE tickets (
+        id TEXT PRIMARY KEY,
+        user_id INTEGER,
+        name TEXT NOT NULL,
+        color TEXT NOT NULL,
+        jira_ticket TEXT DEFAULT '',
+        matrix_ticket TEXT DEFAULT '',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        sort_order INTEGER DEFAULT 0,
+        archived INTEGER DEFAULT 0,
+        archived_at TIMESTAMP
+    );
+    CREATE TABLE user_ticket_order (
+        user_id INTEGER PRIMARY KEY,
+        ticket_order TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE time_entries (
+        id TEXT PRIMARY KEY,
+        user_id INTEGER,
+        ticket_name TEXT NOT NULL,
+        start_time TIMESTAMP NOT NULL,
+        end_time TIMESTAMP,
+        memo TEXT DEFAULT '',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE current_entries (
+        user_id INTEGER PRIMARY KEY,
+        entry_id TEXT
+    );
+'''
+
+def make_baseline_database(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute("INSERT INTO users (id, username, password_hash) VALUES (1, 'alice', 'x')")
+    conn.execute("INSERT INTO tickets (id, user_id, name, color) VALUES ('t1', 1, 'Alpha', '#ff0000')")
+    conn.executemany('INSERT INTO time_entries (id, user_id, ticket_name, start_time, end_time, memo) '
+                     'VALUES (?, 1, ?, ?, ?, ?)', [
+                         ('e1', 'Alpha', '2024-03-04T09:00:00', '2024-03-04T10:30:00', 'a'),
+                         ('e2', 'Gone', '2024-03-04T11:00:00', '2024-03-04T11:45:00', ''),
+                         ('e3', 'Alpha', '2024-03-05T08:00:00', None, ''),
+                     ])
+    conn.execute("INSERT INTO current_entries (user_id, entry_id) VALUES (1, 'e3')")
+    conn.commit()
+    conn.close()
+
+def test_upgrade_from_baseline_schema(tmp_path):
+    path = str(tmp_path / 'old.db')
+    make_baseline_database(path)
+    manager = timesheet_app.TimesheetManager()
+    manager.open(path)
+    try:
+        with manager.db.connection() as conn:
+            assert timesheet_app.get_schema_version(conn) == timesheet_app.SCHEMA_VERSION
+
+        entries = {entry.id: entry for entry in manager.get_entries(1)}
+        assert entries['e1'].ticket_name == 'Alpha'
+        assert entries['e1'].duration == 1.5
+        assert entries['e2'].ticket_name == 'Gone'
+        assert manager.get_current_entry(1).id == 'e3'
+
+        summary, total = manager.get_time_summary(1, '2024-03-04', '2024-03-05')
+        assert summary == {'Alpha': 1.5, 'Gone': 0.75}
+        assert total == 2.25
+
+        # The existing ticket and its entries share one key
+        ticket = manager.get_ticket_by_id(1, 't1')
+        manager.update_ticket(1, 't1', 'Alpha 2', ticket.color)
+        assert {entry.ticket_name for entry in manager.get_entries(1)} == {'Alpha 2', 'Gone'}
+    finally:
+        manager.db.close_all()
+
+def test_upgrade_repairs_unparseable_times(tmp_path):
+    path = str(tmp_path / 'old.db')
+    make_baseline_database(path)
+    conn = sqlite3.connect(path)
+    # The baseline edit form stored empty fields as ''
+    conn.executemany("INSERT INTO time_entries (id, user_id, ticket_name, start_time, end_time, created_at) "
+                     "VALUES (?, 1, 'Alpha', ?, ?, ?)", [
+                         ('empty', '', '', '2024-03-06 08:00:00'),
+                         ('no-end', '2024-03-07T09:00:00', '', '2024-03-07 09:00:00'),
+                         ('garbage', 'bad', 'bad', None),
+                     ])
+    conn.commit()
+    conn.close()
+
+    manager = timesheet_app.TimesheetManager()
+    manager.open(path)
+    try:
+        entries = {entry.id: entry for entry in manager.get_entries(1)}
+        created = datetime(2024, 3, 6, 8, tzinfo=timezone.utc).astimezone()
+        assert entries['empty'].start_time == created.strftime('%Y-%m-%dT%H:%M:%S')
+        assert entries['empty'].end_time is None
+        assert entries['no-end'].end_time is None
+        assert 'garbage' not in entries
+        assert manager.get_time_summary(1, '2024-03-04', '2024-03-07') == ({'Alpha': 1.5, 'Gone': 0.75}, 2.25)
+    finally:
+        manager.db.close_all()
+
+def test_migrations_apply_once(tmp_path):
+    path = str(tmp_path / 'new.db')
+    manager = timesheet_app.TimesheetManager()
+    manager.open(path)
+    try:
+        with manager.db.connection() as conn:
+            assert timesheet_app.migrate_database(conn) == []
+    finally:
+        manager.db.close_all()
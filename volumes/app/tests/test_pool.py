@@ -0,0 +1,74 @@
+import sqlite3
+import threading
+
+import pytest
+
+from timesheet_app import ConnectionPool
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), size=2, timeout=0.1)
+    with pool.connection() as conn:
+        conn.execute('CREATE TABLE items (value INTEGER)')
+    yield pool
+    pool.close_all()
+
+def values(pool):
+    with pool.connection() as conn:
+        return [row[0] for row in conn.execute('SELECT value FROM items ORDER BY value')]
+
+def test_nested_blocks_share_one_transaction(pool):
+    with pytest.raises(RuntimeError):
+        with pool.connection() as outer:
+            outer.execute('INSERT INTO items VALUES (1)')
+            with pool.connection() as inner:
+                assert inner is outer
+                inner.execute('INSERT INTO items VALUES (2)')
+            raise RuntimeError
+    assert values(pool) == []
+
+def test_after_commit_callbacks(pool):
+    calls = []
+    with pool.connection() as conn:
+        conn.execute('INSERT INTO items VALUES (1)')
+        pool.after_commit(lambda: calls.append(values(pool)))
+        assert calls == []
+    assert calls == [[1]]
+
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            pool.after_commit(lambda: calls.append('rolled back'))
+            raise RuntimeError
+    assert calls == [[1]]
+
+def test_connections_are_reused_and_bounded(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as again:
+        assert again is first
+
+    held = threading.Event()
+    done = threading.Event()
+    def hold():
+        with pool.connection():
+            held.set()
+            done.wait()
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait()
+    try:
+        with pool.connection():
+            # Both slots are taken now: this thread's and the other thread's
+            with pytest.raises(sqlite3.OperationalError, match='exhausted'):
+                pool._acquire()
+    finally:
+        done.set()
+        thread.join()
+
+def test_reader_sees_one_snapshot(pool):
+    with pool.reader() as reader:
+        assert reader.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 0
+        with pool.connection() as conn:
+            conn.execute('INSERT INTO items VALUES (1)')
+        assert reader.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 0
+    assert values(pool) == [1]
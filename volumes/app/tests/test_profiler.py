@@ -0,0 +1,74 @@
+import cProfile
+import os
+
+import pytest
+
+from conftest import login
+from timesheet_app import collapsed_stacks, save_profile
+
+MAIN = ('/srv/app/timesheet_app.py', 10, 'main')
+A = ('/srv/app/timesheet_app.py', 20, 'a')
+B = ('~', 0, "<method 'execute' of 'sqlite3.Cursor' objects>")
+
+def test_collapsed_stacks_split_time_by_path():
+    # pstats layout: func -> (cc, nc, own, cumulative, {caller: (cc, nc, own, cumulative)})
+    stats = {
+        MAIN: (1, 1, 0.1, 1.0, {}),
+        # a also calls itself; the walk must not follow that edge
+        A: (2, 2, 0.4, 0.6, {MAIN: (1, 1, 0.4, 0.6), A: (1, 1, 0.0, 0.1)}),
+        B: (2, 2, 0.5, 0.5, {MAIN: (1, 1, 0.3, 0.3), A: (1, 1, 0.2, 0.2)}),
+    }
+    assert collapsed_stacks(stats) == [
+        'main (timesheet_app.py:10) 100000',
+        "main (timesheet_app.py:10);<method 'execute' of 'sqlite3.Cursor' objects> 300000",
+        'main (timesheet_app.py:10);a (timesheet_app.py:20) 400000',
+        "main (timesheet_app.py:10);a (timesheet_app.py:20);<method 'execute' of 'sqlite3.Cursor' objects> 200000",
+    ]
+    # Paths below min_fraction of the total are dropped
+    assert collapsed_stacks(stats, min_fraction=0.25) == [
+        "main (timesheet_app.py:10);<method 'execute' of 'sqlite3.Cursor' objects> 300000",
+        'main (timesheet_app.py:10);a (timesheet_app.py:20) 400000',
+    ]
+
+def test_save_profile_writes_and_prunes(tmp_path):
+    profiler = cProfile.Profile()
+    profiler.runcall(sorted, range(1000))
+    for name in ('p1', 'p2', 'p3'):
+        save_profile(profiler, name, str(tmp_path), keep=2)
+
+    assert sorted(os.listdir(tmp_path)) == ['p2.collapsed', 'p2.pstats', 'p3.collapsed', 'p3.pstats']
+    lines = (tmp_path / 'p3.collapsed').read_text(encoding='utf-8').splitlines()
+    assert any('sorted' in line for line in lines)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+@pytest.fixture
+def profile_dir(app, tmp_path):
+    app.config['PROFILE_DIR'] = str(tmp_path / 'profiles')
+    return tmp_path / 'profiles'
+
+def profiled(response, profile_dir):
+    name = response.headers.get('X-Profile')
+    if name is None:
+        assert not profile_dir.exists() or os.listdir(profile_dir) == []
+        return False
+    assert (profile_dir / f'{name}.pstats').exists()
+    assert (profile_dir / f'{name}.collapsed').exists()
+    return True
+
+def test_admins_can_profile_requests(app, user_client, profile_dir):
+    app.config['ADMIN_USERS'] = {'demoUser'}
+    assert profiled(user_client.get('/api/entries?profile=1'), profile_dir)
+    assert profiled(user_client.get('/api/entries', headers={'X-Profile': '1'}), profile_dir)
+
+def test_profile_requests_of_other_users_are_ignored(app, client, manager, profile_dir):
+    app.config['ADMIN_USERS'] = {'demoUser'}
+    assert not profiled(client.get('/login?profile=1'), profile_dir)
+
+    manager.add_user('alice', 'secret1')
+    login(client, 'alice', 'secret1')
+    assert not profiled(client.get('/api/entries?profile=1'), profile_dir)
+    assert not profiled(client.get('/api/entries', headers={'X-Profile': '1'}), profile_dir)
+
+def test_sampled_profiles(app, user_client, profile_dir):
+    app.config['PROFILE_SAMPLE_RATE'] = 1.0
+    assert profiled(user_client.get('/api/entries'), profile_dir)
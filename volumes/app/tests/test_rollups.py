@@ -0,0 +1,36 @@
+from conftest import add_entry
+
+def rollups(manager):
+    with manager.db.connection() as conn:
+        return sorted(conn.execute('SELECT user_id, day, ticket_key, seconds FROM daily_rollups').fetchall())
+
+def assert_rollups_match_entries(manager):
+    incremental = rollups(manager)
+    manager.rebuild_rollups()
+    assert rollups(manager) == incremental
+
+def test_rollups_follow_entry_changes(manager):
+    first = add_entry(manager, '2024-05-01T09:00:00', '2024-05-01T10:30:00')
+    add_entry(manager, '2024-05-01T11:00:00', '2024-05-01T11:30:00')
+    add_entry(manager, '2024-05-02T09:00:00', '2024-05-02T10:00:00', ticket_name='Beta')
+    assert_rollups_match_entries(manager)
+    assert manager.get_time_summary(1, '2024-05-01', '2024-05-02') == ({'Alpha': 2.0, 'Beta': 1.0}, 3.0)
+
+    # Moving an entry to another day refreshes both days
+    manager.update_entry(1, first, '2024-05-02T13:00:00', '2024-05-02T13:15:00', '')
+    assert_rollups_match_entries(manager)
+    assert manager.get_day_totals(1, '2024-05-01', '2024-05-02') == {'2024-05-01': 0.5, '2024-05-02': 1.25}
+
+    manager.delete_entry(1, first)
+    assert_rollups_match_entries(manager)
+    assert manager.get_time_summary(1, '2024-05-01', '2024-05-02') == ({'Alpha': 0.5, 'Beta': 1.0}, 1.5)
+
+def test_running_entries_are_not_rolled_up(manager):
+    _, started = manager.switch_timer(1, 'Alpha')
+    today = started.start_time[:10]
+    assert rollups(manager) == []
+    assert manager.get_day_totals(1, today, today) == {today: 0}
+
+    manager.switch_timer(1, None)
+    assert_rollups_match_entries(manager)
+    assert [row[1] for row in rollups(manager)] == [today]
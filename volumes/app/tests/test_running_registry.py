@@ -0,0 +1,83 @@
+import time
+import types
+
+import pytest
+
+import timesheet_app
+from timesheet_app import RunningEntryRegistry, TimeEntry
+
+def entry(user_id, entry_id):
+    return TimeEntry(id=entry_id, user_id=user_id, ticket_name='Alpha',
+                     start_time='2024-05-01T09:00:00', end_time=None)
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(timesheet_app, 'time', types.SimpleNamespace(monotonic=lambda: now[0], time=time.time))
+    return now
+
+def test_exact_without_ttl():
+    registry = RunningEntryRegistry()
+    assert registry.lookup(1) == (False, None)
+
+    registry.load([entry(1, 'a')])
+    assert registry.lookup(1) == (True, entry(1, 'a'))
+    # Not in the full load means not running
+    assert registry.lookup(2) == (True, None)
+
+def test_entries_expire_after_ttl(clock):
+    registry = RunningEntryRegistry(ttl=2)
+    registry.load([entry(1, 'a')])
+
+    clock[0] += 1
+    registry.set(2, entry(2, 'b'), registry.next_seq())
+    assert registry.lookup(1) == (True, entry(1, 'a'))
+    assert registry.lookup(3) == (True, None)
+
+    clock[0] += 1.5
+    assert registry.lookup(1) == (False, None)
+    assert registry.lookup(2) == (True, entry(2, 'b'))
+    assert registry.lookup(3) == (False, None)
+
+    registry.fill(1, None, registry.read_token(1))
+    assert registry.lookup(1) == (True, None)
+
+def test_older_write_does_not_overwrite_newer():
+    registry = RunningEntryRegistry()
+    first, second = registry.next_seq(), registry.next_seq()
+    registry.set(1, entry(1, 'new'), second)
+    registry.set(1, entry(1, 'old'), first)
+    assert registry.lookup(1) == (True, entry(1, 'new'))
+
+def test_fill_is_dropped_after_a_newer_write():
+    registry = RunningEntryRegistry()
+    token = registry.read_token(1)
+    registry.set(1, None, registry.next_seq())
+    # A read that started before the write must not bring back the old state
+    registry.fill(1, entry(1, 'stale'), token)
+    assert registry.lookup(1) == (True, None)
+
+    registry.fill(1, entry(1, 'current'), registry.read_token(1))
+    assert registry.lookup(1) == (True, entry(1, 'current'))
+
+def test_manager_writes_through(manager):
+    entry_id = manager.start_time_entry(1, 'Alpha')
+    with manager.db.connection() as conn:
+        conn.execute('DELETE FROM current_entries')
+    # Served from the registry, not the database
+    assert manager.get_current_entry(1).id == entry_id
+
+    with manager.db.connection() as conn:
+        conn.execute('INSERT INTO current_entries (user_id, entry_id) VALUES (1, ?)', (entry_id,))
+    manager.stop_current_entry(1)
+    assert manager.get_current_entry(1) is None
+
+def test_manager_rereads_after_ttl(manager, monkeypatch):
+    monkeypatch.setattr(manager, 'running', RunningEntryRegistry(ttl=0))
+    entry_id = manager.start_time_entry(1, 'Alpha')
+    assert manager.get_current_entry(1).id == entry_id
+
+    # Another worker stopped the timer
+    with manager.db.connection() as conn:
+        conn.execute('DELETE FROM current_entries')
+    assert manager.get_current_entry(1) is None
@@ -0,0 +1,52 @@
+import sqlite3
+
+import pytest
+
+def entry_key(manager, entry_id):
+    with manager.db.connection() as conn:
+        return conn.execute('SELECT ticket_key FROM time_entries WHERE id = ?', (entry_id,)).fetchone()[0]
+
+def ticket_key(manager, ticket_id):
+    with manager.db.connection() as conn:
+        return conn.execute('SELECT ticket_key FROM tickets WHERE id = ?', (ticket_id,)).fetchone()[0]
+
+def test_rename_follows_history(manager):
+    ticket_id = manager.add_ticket(1, 'Alpha', '#ff0000')
+    _, started = manager.switch_timer(1, 'Alpha')
+    manager.switch_timer(1, None)
+
+    manager.update_ticket(1, ticket_id, 'Beta', '#ff0000')
+    assert [entry.ticket_name for entry in manager.get_entries(1)] == ['Beta']
+    assert entry_key(manager, started.id) == ticket_key(manager, ticket_id)
+
+def test_rename_onto_an_old_name_uses_the_tickets_key(manager):
+    # The renamed ticket's key is older than the deleted ticket's
+    new_id = manager.add_ticket(1, 'Beta', '#00ff00')
+    old_id = manager.add_ticket(1, 'Alpha', '#ff0000')
+    _, old_entry = manager.switch_timer(1, 'Alpha')
+    manager.switch_timer(1, None)
+    manager.delete_ticket(1, old_id)
+
+    manager.update_ticket(1, new_id, 'Alpha', '#00ff00')
+    _, new_entry = manager.switch_timer(1, 'Alpha')
+    manager.switch_timer(1, None)
+
+    # New entries go to the renamed ticket, not to the deleted ticket's key
+    assert entry_key(manager, new_entry.id) == ticket_key(manager, new_id)
+    assert entry_key(manager, old_entry.id) != ticket_key(manager, new_id)
+    assert {entry.ticket_name for entry in manager.get_entries(1)} == {'Alpha'}
+
+def test_recreated_ticket_picks_up_its_history(manager):
+    old_id = manager.add_ticket(1, 'Alpha', '#ff0000')
+    _, entry = manager.switch_timer(1, 'Alpha')
+    manager.switch_timer(1, None)
+    manager.delete_ticket(1, old_id)
+
+    new_id = manager.add_ticket(1, 'Alpha', '#ff0000')
+    assert ticket_key(manager, new_id) == entry_key(manager, entry.id)
+
+def test_active_key_names_are_unique(manager):
+    manager.add_ticket(1, 'Alpha', '#ff0000')
+    with pytest.raises(sqlite3.IntegrityError):
+        with manager.db.connection() as conn:
+            conn.execute("INSERT INTO ticket_keys (user_id, name) VALUES (1, 'Alpha')")
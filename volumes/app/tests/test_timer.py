@@ -0,0 +1,46 @@
+import threading
+
+def running_entries(manager):
+    with manager.db.connection() as conn:
+        return conn.execute('SELECT COUNT(*) FROM time_entries WHERE user_id = 1 AND end_ts IS NULL').fetchone()[0]
+
+def test_switch_stops_running_timer(user_client, manager):
+    first = user_client.post('/api/timer/switch', json={'ticket_name': 'Alpha'}).get_json()
+    assert first['stopped'] is None
+    assert first['started']['ticket_name'] == 'Alpha'
+
+    second = user_client.post('/api/timer/switch', json={'ticket_name': 'Beta'}).get_json()
+    assert second['stopped']['id'] == first['started']['id']
+    assert second['stopped']['end_time'] == second['started']['start_time']
+    assert manager.get_current_entry(1).id == second['started']['id']
+    assert running_entries(manager) == 1
+
+    stopped = user_client.post('/api/timer/switch', json={'ticket_name': None}).get_json()
+    assert stopped['stopped']['id'] == second['started']['id']
+    assert stopped['started'] is None
+    assert manager.get_current_entry(1) is None
+    assert running_entries(manager) == 0
+
+def test_switch_rejects_invalid_ticket_names(user_client):
+    assert user_client.post('/api/timer/switch', json={}).status_code == 400
+    assert user_client.post('/api/timer/switch', json={'ticket_name': '  '}).status_code == 400
+    assert user_client.post('/api/timer/switch', json={'ticket_name': 7}).status_code == 400
+
+def test_concurrent_switches_leave_one_running_timer(manager):
+    names = [f'Ticket {i}' for i in range(8)]
+    barrier = threading.Barrier(len(names))
+
+    def switch(name):
+        barrier.wait()
+        manager.switch_timer(1, name)
+
+    threads = [threading.Thread(target=switch, args=(name,)) for name in names]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert running_entries(manager) == 1
+    with manager.db.connection() as conn:
+        current = conn.execute('SELECT entry_id FROM current_entries WHERE user_id = 1').fetchone()[0]
+    assert manager.get_current_entry(1).id == current
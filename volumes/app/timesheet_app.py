@@ -1,16 +1,46 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
+from flask import Blueprint, Flask, Response, abort, current_app, g, make_response, render_template, request, jsonify, redirect, send_file, url_for, session, flash
+from flask import before_render_template, template_rendered
 from datetime import datetime, timedelta
 import sqlite3
+import bisect
+import calendar
+import cProfile
+import csv
+import functools
+import hashlib
+import hmac
+import inspect
+import ipaddress
+import io
 import os
 import json
-from dataclasses import dataclass
-from typing import List, Optional
+import pstats
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import List, NamedTuple, Optional
 import uuid
-from collections import defaultdict
-from werkzeug.security import generate_password_hash, check_password_hash
+import itertools
+import mimetypes
+from collections import OrderedDict, defaultdict, deque
+import click
+from flask.cli import with_appcontext
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.utils import safe_join
+import build_assets
 
-app = Flask(__name__)
-app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production')
+try:
+    import fcntl
+except ImportError:  # Windows: no lock file, every process runs maintenance
+    fcntl = None
+
+SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production')
 
 # Use environment variable for database path, fallback to local
 DATABASE = os.environ.get('DATABASE_PATH', 'timesheet.db')
@@ -18,16 +48,533 @@ DATABASE = os.environ.get('DATABASE_PATH', 'timesheet.db')
 # REGISTRATION CONTROL - Set to False to disable new registrations
 ALLOW_REGISTRATION = os.environ.get('ALLOW_REGISTRATION', 'true').lower() == 'true'
 
-def init_database():
-    """Initialize the SQLite database with required tables."""
+# ADMINS - comma-separated usernames that may export the data of all users
+ADMIN_USERS = {name.strip() for name in os.environ.get('ADMIN_USERS', '').split(',') if name.strip()}
+
+# PASSWORDS - werkzeug hash method for new hashes; older hashes are replaced on the next login
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')  # e.g. scrypt:32768:8:1
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))  # hashes computed at once per process
+PASSWORD_HASH_BACKLOG = int(os.environ.get('PASSWORD_HASH_BACKLOG', '8'))  # further callers that may wait; more get 503
+PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', '10'))
+
+# LOGIN RATE LIMITS - checked before any hashing, per process (0 disables a limit)
+LOGIN_RATE_WINDOW = float(os.environ.get('LOGIN_RATE_WINDOW', '300'))  # seconds
+LOGIN_MAX_ATTEMPTS_PER_IP = int(os.environ.get('LOGIN_MAX_ATTEMPTS_PER_IP', '30'))
+LOGIN_MAX_FAILURES_PER_USER = int(os.environ.get('LOGIN_MAX_FAILURES_PER_USER', '10'))
+
+# REVERSE PROXY - number of proxies (e.g. Traefik) whose X-Forwarded-For/-Proto is trusted
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', '0'))
+
+# EXPORT - rows fetched per round trip while streaming /api/export
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '1000'))
+
+# IMPORT - input rows written per transaction by flask import-entries / POST /api/import
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '5000'))
+IMPORT_MAX_UPLOAD_MB = int(os.environ.get('IMPORT_MAX_UPLOAD_MB', '50'))  # larger request bodies get 413
+# Uploads wait here until the import thread has read them
+IMPORT_DIR = os.environ.get('IMPORT_DIR', os.path.join(os.path.dirname(os.path.abspath(DATABASE)), 'imports'))
+
+# ENTRY LOADING - days of history rendered up front; older days load on demand
+INDEX_WINDOW_DAYS = int(os.environ.get('INDEX_WINDOW_DAYS', '7'))
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', '100'))
+ENTRY_BATCH_MAX_ITEMS = int(os.environ.get('ENTRY_BATCH_MAX_ITEMS', '1000'))
+
+# TIMER EVENTS - /events stream re-checks the timer at least every heartbeat
+SSE_HEARTBEAT = float(os.environ.get('SSE_HEARTBEAT', '15'))
+SSE_MAX_LIFETIME = float(os.environ.get('SSE_MAX_LIFETIME', '600'))
+# Each open stream holds a request thread; streams beyond this get 503 and the page polls instead
+SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', '4'))
+
+# RUNNING TIMERS - seconds a cached lookup is trusted; unset = single process,
+# the in-memory registry is authoritative (see RunningEntryRegistry)
+RUNNING_REGISTRY_TTL = float(os.environ['RUNNING_REGISTRY_TTL']) if os.environ.get('RUNNING_REGISTRY_TTL') else None
+
+# MAINTENANCE - background jobs, intervals in seconds (0 disables a job)
+MAINTENANCE_ENABLED = os.environ.get('MAINTENANCE_ENABLED', 'true').lower() == 'true'
+MAINTENANCE_STARTUP_DELAY = float(os.environ.get('MAINTENANCE_STARTUP_DELAY', '60'))
+MAINTENANCE_ARCHIVE_CLEANUP_INTERVAL = float(os.environ.get('MAINTENANCE_ARCHIVE_CLEANUP_INTERVAL', '3600'))
+MAINTENANCE_ROLLUP_COMPACTION_INTERVAL = float(os.environ.get('MAINTENANCE_ROLLUP_COMPACTION_INTERVAL', '86400'))
+MAINTENANCE_OPTIMIZE_INTERVAL = float(os.environ.get('MAINTENANCE_OPTIMIZE_INTERVAL', '21600'))
+MAINTENANCE_WAL_CHECKPOINT_INTERVAL = float(os.environ.get('MAINTENANCE_WAL_CHECKPOINT_INTERVAL', '600'))
+MAINTENANCE_BATCH_SIZE = int(os.environ.get('MAINTENANCE_BATCH_SIZE', '100'))
+
+# READ CACHE - per-process cache of per-user read results (0 disables it)
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '2048'))
+CACHE_TTL = float(os.environ.get('CACHE_TTL', '300'))
+
+# STATIC ASSETS - fingerprinted bundles from build_assets.py (static/dist/)
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+# PROFILING - cProfile single requests: admins via "X-Profile: 1" or ?profile=1, others sampled
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))  # e.g. 0.001 = every 1000th request
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(DATABASE)), 'profiles'))
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '200'))  # newest profiles kept on disk
+
+# METRICS - per-process request/SQL instrumentation served at /metrics
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')  # /metrics requires "Authorization: Bearer <token>"; unset = localhost only
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '0'))  # log statements slower than this (0 = off)
+
+# DATABASE CONNECTIONS - shared pool used by every TimesheetManager method
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '8'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))
+DB_BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS', '5000'))
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get('DB_STATEMENT_CACHE_SIZE', '128'))
+DB_HEALTHCHECK_INTERVAL = float(os.environ.get('DB_HEALTHCHECK_INTERVAL', '30'))
+
+# ===== INSTRUMENTATION =====
+#
+# Counters for requests, TimesheetManager calls, SQL statements and pool
+# waits, kept per worker process and served by /metrics in the Prometheus
+# text format. Statements are measured by connection/cursor subclasses,
+# so no query needs to know about it; the per-statement cost is two
+# perf_counter() calls and a few additions on a thread-local stack.
+
+METRIC_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_HELP = {
+    'timesheet_http_requests_total': ('counter', 'HTTP requests by endpoint, method and status'),
+    'timesheet_http_request_duration_seconds': ('histogram', 'Time to build the response (without streaming)'),
+    'timesheet_http_sql_queries_total': ('counter', 'SQL statements run while handling requests'),
+    'timesheet_http_sql_rows_total': ('counter', 'Rows fetched while handling requests'),
+    'timesheet_http_sql_seconds_total': ('counter', 'Time spent in SQLite while handling requests'),
+    'timesheet_http_render_seconds_total': ('counter', 'Time spent rendering templates'),
+    'timesheet_http_pool_wait_seconds_total': ('counter', 'Time requests waited for a database connection'),
+    'timesheet_manager_calls_total': ('counter', 'TimesheetManager method calls'),
+    'timesheet_manager_call_duration_seconds': ('histogram', 'TimesheetManager method duration'),
+    'timesheet_manager_sql_queries_total': ('counter', 'SQL statements per TimesheetManager method'),
+    'timesheet_manager_sql_rows_total': ('counter', 'Rows fetched per TimesheetManager method'),
+    'timesheet_manager_sql_seconds_total': ('counter', 'Time in SQLite per TimesheetManager method'),
+    'timesheet_db_pool_wait_seconds': ('histogram', 'Wait for a free pooled connection'),
+    'timesheet_db_pool_timeouts_total': ('counter', 'Connection requests that gave up (pool exhausted)'),
+    'timesheet_db_slow_queries_total': ('counter', 'Statements slower than SLOW_QUERY_MS'),
+}
+
+class MetricsFrame:
+    """What happened during one request or manager call (nested frames all count)."""
+    __slots__ = ('started', 'queries', 'rows', 'sql_seconds', 'render_seconds', 'pool_wait_seconds')
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = self.rows = 0
+        self.sql_seconds = self.render_seconds = self.pool_wait_seconds = 0.0
+
+class Instrumentation:
+    """Per-process metrics registry plus the thread-local stack of open frames."""
+    
+    def __init__(self, enabled: bool = METRICS_ENABLED, slow_query_ms: float = SLOW_QUERY_MS):
+        self.enabled = enabled
+        self.slow_query_seconds = slow_query_ms / 1000
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+    
+    def _frames(self):
+        frames = getattr(self._local, 'frames', None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+    
+    def push(self):
+        frame = MetricsFrame()
+        self._frames().append(frame)
+        return frame
+    
+    def pop(self, frame: MetricsFrame):
+        """Close ``frame``; returns its duration in seconds."""
+        frames = self._frames()
+        if frame in frames:
+            frames.remove(frame)
+        return time.perf_counter() - frame.started
+    
+    def sql(self, seconds: float, queries: int = 0, rows: int = 0):
+        for frame in self._frames():
+            frame.queries += queries
+            frame.rows += rows
+            frame.sql_seconds += seconds
+    
+    def render(self, seconds: float):
+        for frame in self._frames():
+            frame.render_seconds += seconds
+    
+    def pool_wait(self, seconds: float, timed_out: bool = False):
+        for frame in self._frames():
+            frame.pool_wait_seconds += seconds
+        with self._lock:
+            self._observe('timesheet_db_pool_wait_seconds', (), seconds)
+            if timed_out:
+                self._counters['timesheet_db_pool_timeouts_total', ()] += 1
+    
+    def slow_query(self, sql: str, seconds: float):
+        with self._lock:
+            self._counters['timesheet_db_slow_queries_total', ()] += 1
+        print(f"🐢 Langsame SQL-Abfrage ({seconds * 1000:.1f} ms): {' '.join(sql.split())[:500]}", flush=True)
+    
+    def _observe(self, name: str, labels: tuple, value: float):
+        # Caller holds the lock; per bucket counts, the last one is +Inf
+        histogram = self._histograms.get((name, labels))
+        if histogram is None:
+            histogram = self._histograms[name, labels] = [0] * (len(METRIC_BUCKETS) + 1) + [0.0]
+        histogram[bisect.bisect_left(METRIC_BUCKETS, value)] += 1
+        histogram[-1] += value
+    
+    def record_request(self, endpoint: str, method: str, status: int, frame: MetricsFrame, seconds: float):
+        labels = (('endpoint', endpoint),)
+        with self._lock:
+            self._counters['timesheet_http_requests_total', labels + (('method', method), ('status', str(status)))] += 1
+            self._observe('timesheet_http_request_duration_seconds', labels, seconds)
+            self._counters['timesheet_http_sql_queries_total', labels] += frame.queries
+            self._counters['timesheet_http_sql_rows_total', labels] += frame.rows
+            self._counters['timesheet_http_sql_seconds_total', labels] += frame.sql_seconds
+            self._counters['timesheet_http_render_seconds_total', labels] += frame.render_seconds
+            self._counters['timesheet_http_pool_wait_seconds_total', labels] += frame.pool_wait_seconds
+    
+    def record_call(self, method: str, frame: MetricsFrame, seconds: float):
+        labels = (('method', method),)
+        with self._lock:
+            self._counters['timesheet_manager_calls_total', labels] += 1
+            self._observe('timesheet_manager_call_duration_seconds', labels, seconds)
+            self._counters['timesheet_manager_sql_queries_total', labels] += frame.queries
+            self._counters['timesheet_manager_sql_rows_total', labels] += frame.rows
+            self._counters['timesheet_manager_sql_seconds_total', labels] += frame.sql_seconds
+    
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+    
+    def prometheus(self, extra=()):
+        """All metrics in the Prometheus text format (version 0.0.4).
+        
+        ``extra`` are (name, type, help, labels, value) samples read from
+        other components at scrape time, e.g. cache sizes.
+        """
+        def fmt_labels(labels, extra=()):
+            pairs = tuple(labels) + tuple(extra)
+            if not pairs:
+                return ''
+            escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+                       for _, value in pairs)
+            return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+        
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(value)) for key, value in self._histograms.items())
+        
+        samples = defaultdict(list)
+        for (name, labels), value in counters:
+            samples[name].append(f"{name}{fmt_labels(labels)} {value:g}")
+        for (name, labels), histogram in histograms:
+            cumulative = 0
+            for bound, count in zip(METRIC_BUCKETS + ('+Inf',), histogram[:-1]):
+                cumulative += count
+                samples[name].append(f"{name}_bucket{fmt_labels(labels, (('le', bound),))} {cumulative}")
+            samples[name].append(f"{name}_sum{fmt_labels(labels)} {histogram[-1]:g}")
+            samples[name].append(f"{name}_count{fmt_labels(labels)} {cumulative}")
+        
+        help_texts = dict(METRIC_HELP)
+        for name, kind, help_text, labels, value in extra:
+            help_texts.setdefault(name, (kind, help_text))
+            samples[name].append(f"{name}{fmt_labels(labels)} {value:g}")
+        
+        lines = []
+        for name in sorted(samples):
+            kind, help_text = help_texts[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples[name])
+        return '\n'.join(lines) + '\n'
+
+instrumentation = Instrumentation()
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports statement count, fetched rows and time."""
+    _sql = ''
+    _elapsed = 0.0
+    _slow_logged = False
+    
+    def _measure(self, started, queries=0, rows=0):
+        elapsed = time.perf_counter() - started
+        instrumentation.sql(elapsed, queries, rows)
+        # A statement's time is its execute() plus all fetches
+        self._elapsed = elapsed if queries else self._elapsed + elapsed
+        threshold = instrumentation.slow_query_seconds
+        if threshold and self._elapsed >= threshold and not self._slow_logged:
+            self._slow_logged = True
+            instrumentation.slow_query(self._sql, self._elapsed)
+    
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        self._sql, self._slow_logged = sql, False
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._measure(started, queries=1)
+    
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        self._sql, self._slow_logged = sql, False
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._measure(started, queries=1)
+    
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._measure(started, rows=int(row is not None))
+        return row
+    
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._measure(started, rows=len(rows))
+        return rows
+    
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._measure(started, rows=len(rows))
+        return rows
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (also those of execute()) are instrumented."""
+    
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+    
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            instrumentation.sql(time.perf_counter() - started)
+
+def instrumented(cls):
+    """Class decorator: time every public method and attribute its SQL.
+    
+    Generator methods are left alone - their work happens after the call
+    returns, while the caller iterates.
+    """
+    def wrap(name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.enabled:
+                return method(*args, **kwargs)
+            frame = instrumentation.push()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                instrumentation.record_call(name, frame, instrumentation.pop(frame))
+        return wrapper
+    
+    for name, member in list(vars(cls).items()):
+        if not name.startswith('_') and inspect.isfunction(member) and not inspect.isgeneratorfunction(member):
+            setattr(cls, name, wrap(name, member))
+    return cls
+
+class ConnectionPool:
+    """Bounded pool of configured SQLite connections.
+
+    Connections are opened lazily up to ``size`` and set up once (WAL,
+    synchronous=NORMAL, busy_timeout, statement cache). A connection that sat
+    idle longer than ``healthcheck_interval`` is pinged before it is handed out
+    again and replaced if it is broken. A thread that already holds a connection
+    gets the same one back, so nested manager calls share one transaction.
+    """
+
+    def __init__(self, database: str, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT,
+                 busy_timeout_ms: int = DB_BUSY_TIMEOUT_MS, cached_statements: int = DB_STATEMENT_CACHE_SIZE,
+                 healthcheck_interval: float = DB_HEALTHCHECK_INTERVAL):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self.healthcheck_interval = healthcheck_interval
+        self._reset()
+    
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._local = threading.local()
+    
+    def _check_fork(self):
+        """Start over with an empty pool in a forked worker process.
+        
+        SQLite connections must not be used across fork(), so a child never
+        touches the parent's connections - it just drops the references.
+        """
+        if os.getpid() != self._pid:
+            self._reset()
+    
+    def _connect(self):
+        """Open and configure a new connection."""
+        conn = sqlite3.connect(self.database,
+                               timeout=self.busy_timeout_ms / 1000,
+                               cached_statements=self.cached_statements,
+                               check_same_thread=False,
+                               factory=InstrumentedConnection if instrumentation.enabled else sqlite3.Connection)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        return conn
+    
+    def _is_healthy(self, conn):
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def _acquire(self):
+        started = time.perf_counter()
+        acquired = self._slots.acquire(timeout=self.timeout)
+        if instrumentation.enabled:
+            instrumentation.pool_wait(time.perf_counter() - started, timed_out=not acquired)
+        if not acquired:
+            raise sqlite3.OperationalError('Database connection pool exhausted')
+        try:
+            while True:
+                try:
+                    conn, idle_since = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if time.monotonic() - idle_since < self.healthcheck_interval or self._is_healthy(conn):
+                    return conn
+                conn.close()
+        except BaseException:
+            self._slots.release()
+            raise
+    
+    def _release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put((conn, time.monotonic()))
+        except sqlite3.Error:
+            conn.close()
+        finally:
+            self._slots.release()
+    
+    @contextmanager
+    def connection(self, immediate: bool = False):
+        """Borrow a connection; commits on success and rolls back on error.
+        
+        ``immediate`` starts the transaction with BEGIN IMMEDIATE, taking the
+        write lock up front. Use it for read-then-write sequences, which could
+        otherwise fail with SQLITE_BUSY when upgrading to a writer.
+        """
+        self._check_fork()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            # Nested call on the same thread - the outermost block commits
+            yield conn
+            return
+        
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.after_commit = []
+        try:
+            if immediate:
+                conn.execute('BEGIN IMMEDIATE')
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            callbacks, self._local.after_commit = self._local.after_commit, []
+            self._local.conn = None
+            self._release(conn)
+        
+        for callback in callbacks:
+            callback()
+    
+    @contextmanager
+    def reader(self):
+        """Dedicated connection for one long read, outside the pool.
+        
+        The whole read runs in one transaction and therefore sees one
+        snapshot. In WAL mode that doesn't block writers, and since the
+        connection doesn't take a pool slot, a slow export client can't
+        starve the other requests of this worker.
+        """
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN')
+            yield conn
+        finally:
+            conn.close()
+    
+    def after_commit(self, callback):
+        """Run ``callback`` once the current transaction has committed.
+        
+        Without an open transaction on this thread it runs immediately;
+        if the transaction rolls back it is dropped.
+        """
+        if getattr(self._local, 'conn', None) is None:
+            callback()
+        else:
+            self._local.after_commit.append(callback)
+    
+    def close_all(self):
+        """Close all idle connections (e.g. on shutdown)."""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+
+def init_database(db: ConnectionPool):
+    """Initialize the SQLite database and apply pending schema migrations."""
     # Ensure directory exists
-    db_dir = os.path.dirname(DATABASE)
+    db_dir = os.path.dirname(db.database)
     if db_dir and not os.path.exists(db_dir):
         os.makedirs(db_dir, exist_ok=True)
     
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
+    with db.connection() as conn:
+        migrate_database(conn)
+        
+        # Create demo user with password "demo123" if no users exist
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM users')
+        if cursor.fetchone()[0] == 0:
+            demo_hash = generate_password_hash('demo123')
+            # Re-checked in the INSERT: another worker may be seeding concurrently
+            cursor.execute('''
+                INSERT INTO users (username, password_hash)
+                SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM users)
+            ''', ('demoUser', demo_hash))
+
+# ===== SCHEMA MIGRATIONS =====
+#
+# Each migration runs exactly once; the applied version is stored in
+# PRAGMA user_version. Append new migrations at the end - never edit or
+# reorder migrations that have already shipped.
+
+def _add_missing_columns(cursor, table: str, columns: dict):
+    """Add columns that databases created by older releases don't have yet."""
+    cursor.execute(f'PRAGMA table_info({table})')
+    existing = {column[1] for column in cursor.fetchall()}
+    added = []
+    for name, definition in columns.items():
+        if name not in existing:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+            added.append(name)
+    return added
+
+def _migration_001_baseline(cursor):
+    """Create the base tables and upgrade databases from before versioning."""
     # Users table - now with password hash
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -37,12 +584,7 @@ def init_database():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
-    
-    # Check if password_hash column exists, add if not (for migration)
-    cursor.execute('PRAGMA table_info(users)')
-    columns = [column[1] for column in cursor.fetchall()]
-    if 'password_hash' not in columns:
-        cursor.execute('ALTER TABLE users ADD COLUMN password_hash TEXT')
+    if _add_missing_columns(cursor, 'users', {'password_hash': 'TEXT'}):
         # Set default password for existing users (password: "password")
         default_hash = generate_password_hash('password')
         cursor.execute('UPDATE users SET password_hash = ? WHERE password_hash IS NULL', (default_hash,))
@@ -57,23 +599,17 @@ def init_database():
             jira_ticket TEXT DEFAULT '',
             matrix_ticket TEXT DEFAULT '',
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sort_order INTEGER DEFAULT 0,
+            archived INTEGER DEFAULT 0,
+            archived_at TIMESTAMP,
             FOREIGN KEY (user_id) REFERENCES users (id)
         )
     ''')
-    
-    # Add sort_order column to tickets table if it doesn't exist
-    cursor.execute('PRAGMA table_info(tickets)')
-    columns = [column[1] for column in cursor.fetchall()]
-    if 'sort_order' not in columns:
-        cursor.execute('ALTER TABLE tickets ADD COLUMN sort_order INTEGER DEFAULT 0')
-    
-    # Add archived column to tickets table if it doesn't exist
-    if 'archived' not in columns:
-        cursor.execute('ALTER TABLE tickets ADD COLUMN archived INTEGER DEFAULT 0')
-    
-    # Add archived_at column to tickets table if it doesn't exist
-    if 'archived_at' not in columns:
-        cursor.execute('ALTER TABLE tickets ADD COLUMN archived_at TIMESTAMP')
+    _add_missing_columns(cursor, 'tickets', {
+        'sort_order': 'INTEGER DEFAULT 0',
+        'archived': 'INTEGER DEFAULT 0',
+        'archived_at': 'TIMESTAMP',
+    })
     
     # User ticket order preferences table
     cursor.execute('''
@@ -108,33 +644,334 @@ def init_database():
             FOREIGN KEY (entry_id) REFERENCES time_entries (id)
         )
     ''')
+
+def _migration_002_entry_indexes(cursor):
+    """Secondary indexes for the per-user entry, summary and cleanup queries."""
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_time_entries_user_start
+        ON time_entries (user_id, start_time)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_time_entries_user_ticket_start
+        ON time_entries (user_id, ticket_name, start_time)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tickets_user_archived
+        ON tickets (user_id, archived)
+    ''')
+    cursor.execute('ANALYZE')
+
+def _repair_entry_times(cursor):
+    """Fix times that SQLite's date functions can't parse.
+    
+    Older releases saved empty or malformed times from the edit form. Such
+    a start falls back to the creation time (UTC -> local), such an end is
+    dropped; entries with no usable time at all are removed.
+    """
+    cursor.execute('''
+        UPDATE time_entries
+        SET start_time = coalesce(strftime('%Y-%m-%dT%H:%M:%S', created_at, 'localtime'), start_time)
+        WHERE strftime('%s', start_time) IS NULL
+    ''')
+    cursor.execute('''
+        DELETE FROM current_entries WHERE entry_id IN (
+            SELECT id FROM time_entries WHERE strftime('%s', start_time) IS NULL
+        )
+    ''')
+    cursor.execute("DELETE FROM time_entries WHERE strftime('%s', start_time) IS NULL")
+    cursor.execute("UPDATE time_entries SET end_time = NULL WHERE strftime('%s', end_time) IS NULL")
+
+def _migration_003_daily_rollups(cursor):
+    """Per-day, per-ticket totals of closed entries, backfilled from history."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_rollups (
+            user_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            ticket_name TEXT NOT NULL,
+            seconds REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day, ticket_name)
+        ) WITHOUT ROWID
+    ''')
+    _repair_entry_times(cursor)
+    # The rollup query as of this schema version; rebuild_rollups() has moved on
+    cursor.execute('''
+        INSERT INTO daily_rollups (user_id, day, ticket_name, seconds)
+        SELECT user_id, substr(start_time, 1, 10), ticket_name,
+               SUM((julianday(end_time) - julianday(start_time)) * 86400)
+        FROM time_entries
+        WHERE end_time IS NOT NULL
+        GROUP BY user_id, substr(start_time, 1, 10), ticket_name
+    ''')
+
+def _migration_004_ticket_keys(cursor):
+    """Reference tickets from entries and rollups by integer key instead of name.
+    
+    ticket_keys holds one row per (user, ticket name) ever used. Entries keep
+    their key when the ticket is renamed or deleted, so history follows a
+    rename and survives deletion.
+    """
+    cursor.execute('''
+        CREATE TABLE ticket_keys (
+            key INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    cursor.execute('CREATE INDEX idx_ticket_keys_user_name ON ticket_keys (user_id, name)')
+    cursor.execute('''
+        INSERT INTO ticket_keys (user_id, name)
+        SELECT user_id, ticket_name FROM time_entries
+        UNION
+        SELECT user_id, name FROM tickets
+    ''')
+    
+    _add_missing_columns(cursor, 'tickets', {'ticket_key': 'INTEGER REFERENCES ticket_keys (key)'})
+    cursor.execute('''
+        UPDATE tickets SET ticket_key = (
+            SELECT key FROM ticket_keys k WHERE k.user_id IS tickets.user_id AND k.name = tickets.name
+        )
+    ''')
+    
+    # Rebuild time_entries with ticket_key in place of ticket_name
+    cursor.execute('''
+        CREATE TABLE time_entries_new (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER,
+            ticket_key INTEGER NOT NULL,
+            start_time TIMESTAMP NOT NULL,
+            end_time TIMESTAMP,
+            memo TEXT DEFAULT '',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (ticket_key) REFERENCES ticket_keys (key)
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO time_entries_new (id, user_id, ticket_key, start_time, end_time, memo, created_at)
+        SELECT e.id, e.user_id, k.key, e.start_time, e.end_time, e.memo, e.created_at
+        FROM time_entries e
+        JOIN ticket_keys k ON k.user_id IS e.user_id AND k.name = e.ticket_name
+    ''')
+    cursor.execute('DROP TABLE time_entries')
+    cursor.execute('ALTER TABLE time_entries_new RENAME TO time_entries')
+    cursor.execute('CREATE INDEX idx_time_entries_user_start ON time_entries (user_id, start_time)')
+    cursor.execute('CREATE INDEX idx_time_entries_user_key_start ON time_entries (user_id, ticket_key, start_time)')
+    
+    cursor.execute('DROP TABLE daily_rollups')
+    cursor.execute('''
+        CREATE TABLE daily_rollups (
+            user_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            ticket_key INTEGER NOT NULL,
+            seconds REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day, ticket_key)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        INSERT INTO daily_rollups (user_id, day, ticket_key, seconds)
+        SELECT user_id, substr(start_time, 1, 10), ticket_key,
+               SUM((julianday(end_time) - julianday(start_time)) * 86400)
+        FROM time_entries
+        WHERE end_time IS NOT NULL
+        GROUP BY user_id, substr(start_time, 1, 10), ticket_key
+    ''')
+    cursor.execute('ANALYZE')
+
+def _migration_005_epoch_timestamps(cursor):
+    """Integer copies of start/end time for range filters, sorting and sums.
+    
+    The ISO strings stay for display; start_ts/end_ts hold the same local
+    wall-clock time as seconds since 1970-01-01 (see to_epoch()).
+    """
+    _add_missing_columns(cursor, 'time_entries', {
+        'start_ts': 'INTEGER NOT NULL DEFAULT 0',
+        'end_ts': 'INTEGER',
+    })
+    _repair_entry_times(cursor)
+    cursor.execute('''
+        UPDATE time_entries
+        SET start_ts = CAST(strftime('%s', start_time) AS INTEGER),
+            end_ts = CAST(strftime('%s', end_time) AS INTEGER)
+    ''')
+    cursor.execute('DROP INDEX IF EXISTS idx_time_entries_user_start')
+    cursor.execute('DROP INDEX IF EXISTS idx_time_entries_user_key_start')
+    cursor.execute('CREATE INDEX idx_time_entries_user_start_ts ON time_entries (user_id, start_ts)')
+    cursor.execute('CREATE INDEX idx_time_entries_user_key_start_ts ON time_entries (user_id, ticket_key, start_ts)')
+    cursor.execute('ANALYZE')
+
+def _migration_006_user_data_versions(cursor):
+    """Per-user change counters for HTTP validators and the read cache."""
+    cursor.execute('''
+        CREATE TABLE user_data_versions (
+            user_id INTEGER PRIMARY KEY,
+            tickets INTEGER NOT NULL DEFAULT 0,
+            entries INTEGER NOT NULL DEFAULT 0,
+            updated_ts INTEGER,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+def _migration_007_ticket_key_index(cursor):
+    """Exports look up the ticket metadata of each entry by its key."""
+    cursor.execute('CREATE INDEX idx_tickets_ticket_key ON tickets (ticket_key, archived)')
+
+def _migration_008_import_jobs(cursor):
+    """Progress of bulk imports, so an interrupted import can resume."""
+    cursor.execute('''
+        CREATE TABLE import_jobs (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER,
+            source TEXT NOT NULL,
+            format TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            position INTEGER NOT NULL DEFAULT 0,
+            inserted INTEGER NOT NULL DEFAULT 0,
+            duplicates INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            seconds REAL NOT NULL DEFAULT 0,
+            error TEXT,
+            created_ts INTEGER NOT NULL,
+            updated_ts INTEGER NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    cursor.execute('CREATE INDEX idx_import_jobs_checksum ON import_jobs (checksum, status)')
+
+def _migration_009_unique_active_ticket_keys(cursor):
+    """At most one active key per (user, ticket name).
     
-    # Create demo user with password "demo123" if no users exist
-    cursor.execute('SELECT COUNT(*) FROM users')
-    if cursor.fetchone()[0] == 0:
-        demo_hash = generate_password_hash('demo123')
-        cursor.execute('INSERT INTO users (username, password_hash) VALUES (?, ?)', 
-                      ('demoUser', demo_hash))
+    A key is retired when another key takes over its name (a ticket renamed
+    to a name used before). Its entries keep the key and still show the
+    name; only lookups by name ignore it. Of existing duplicates, the key a
+    ticket points to (else the newest) stays active.
+    """
+    _add_missing_columns(cursor, 'ticket_keys', {'retired': 'INTEGER NOT NULL DEFAULT 0'})
+    cursor.execute('''
+        UPDATE ticket_keys SET retired = 1
+        WHERE key <> (
+            SELECT k.key FROM ticket_keys k
+            WHERE k.user_id = ticket_keys.user_id AND k.name = ticket_keys.name
+            ORDER BY EXISTS (SELECT 1 FROM tickets t WHERE t.ticket_key = k.key) DESC, k.key DESC
+            LIMIT 1
+        )
+    ''')
+    cursor.execute('DROP INDEX IF EXISTS idx_ticket_keys_user_name')
+    cursor.execute('''
+        CREATE UNIQUE INDEX idx_ticket_keys_user_name_active
+        ON ticket_keys (user_id, name) WHERE retired = 0
+    ''')
+    cursor.execute('CREATE INDEX idx_tickets_user_name ON tickets (user_id, name)')
+
+MIGRATIONS = [
+    (1, 'Basis-Schema', _migration_001_baseline),
+    (2, 'Indizes für Zeiteinträge und Tickets', _migration_002_entry_indexes),
+    (3, 'Tages-Rollups pro Ticket', _migration_003_daily_rollups),
+    (4, 'Integer-Ticket-Schlüssel für Einträge', _migration_004_ticket_keys),
+    (5, 'Zeitstempel als Integer-Sekunden', _migration_005_epoch_timestamps),
+    (6, 'Datenversionen pro Benutzer', _migration_006_user_data_versions),
+    (7, 'Index für Ticket-Schlüssel', _migration_007_ticket_key_index),
+    (8, 'Fortschritt von Massenimporten', _migration_008_import_jobs),
+    (9, 'Eindeutige aktive Ticket-Schlüssel', _migration_009_unique_active_ticket_keys),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn):
+    """Return the schema version recorded in the database file."""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate_database(conn):
+    """Apply all pending migrations in a single write transaction."""
+    if get_schema_version(conn) >= SCHEMA_VERSION:
+        return []
+    
+    # BEGIN IMMEDIATE takes the write lock, so concurrently starting workers
+    # wait here and then see the version the first one recorded.
+    conn.commit()
+    conn.execute('BEGIN IMMEDIATE')
+    cursor = conn.cursor()
+    current = get_schema_version(conn)
+    applied = []
+    for version, description, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        migration(cursor)
+        cursor.execute(f'PRAGMA user_version = {version}')
+        applied.append(version)
+        print(f"Datenbank-Migration {version} angewendet: {description}")
     
+    # Rollups are derived data: rebuilt once more with the current queries,
+    # so upgraded databases get the same values as new ones (migration 5
+    # moved the sums from julianday() to integer seconds).
+    if applied:
+        rebuild_rollups(cursor)
     conn.commit()
-    conn.close()
+    return applied
 
-@dataclass
-class User:
+# ===== DAILY ROLLUPS =====
+#
+# daily_rollups holds the seconds of closed entries per (user, day, ticket_key),
+# with the day taken from the entry's start time. Every write that closes,
+# moves or removes an entry recomputes the affected days in the same
+# transaction, so summaries never need to touch time_entries.
+
+_ROLLUP_SELECT = '''
+    SELECT user_id, substr(start_time, 1, 10), ticket_key, SUM(end_ts - start_ts)
+    FROM time_entries
+    WHERE end_ts IS NOT NULL
+'''
+
+def refresh_rollups(cursor, user_id: int, days):
+    """Recompute the rollup rows of the given days for one user."""
+    days = sorted({day[:10] for day in days if day})
+    cursor.executemany('DELETE FROM daily_rollups WHERE user_id = ? AND day = ?',
+                       [(user_id, day) for day in days])
+    cursor.executemany(f'''
+        INSERT INTO daily_rollups (user_id, day, ticket_key, seconds)
+        {_ROLLUP_SELECT}
+            AND user_id = ? AND start_ts >= ? AND start_ts < ?
+        GROUP BY ticket_key
+    ''', [(user_id, day_start_ts(day), day_start_ts(day, offset_days=1)) for day in days])
+
+def rebuild_rollups(cursor, user_id: Optional[int] = None):
+    """Recompute all rollup rows, for one user or for everybody."""
+    if user_id is None:
+        cursor.execute('DELETE FROM daily_rollups')
+        cursor.execute(f'''
+            INSERT INTO daily_rollups (user_id, day, ticket_key, seconds)
+            {_ROLLUP_SELECT}
+            GROUP BY user_id, substr(start_time, 1, 10), ticket_key
+        ''')
+    else:
+        cursor.execute('DELETE FROM daily_rollups WHERE user_id = ?', (user_id,))
+        cursor.execute(f'''
+            INSERT INTO daily_rollups (user_id, day, ticket_key, seconds)
+            {_ROLLUP_SELECT}
+                AND user_id = ?
+            GROUP BY substr(start_time, 1, 10), ticket_key
+        ''', (user_id,))
+    return cursor.rowcount
+
+# Row types: immutable tuples whose fields follow the SELECT column order,
+# so a result set turns into objects with one _make() per row and no
+# per-instance __dict__. Templates use the same attribute names as before.
+
+class User(NamedTuple):
     id: int
     username: str
 
-@dataclass
-class TimeEntry:
+class TimeEntry(NamedTuple):
     id: str
     user_id: int
     ticket_name: str
     start_time: str
     end_time: Optional[str]
     memo: str = ""
+    duration: Optional[float] = None  # hours, None while running
     
-@dataclass
-class Ticket:
+class Ticket(NamedTuple):
     id: str
     user_id: int
     name: str
@@ -142,99 +979,679 @@ class Ticket:
     jira_ticket: str = ""
     matrix_ticket: str = ""
 
+def day_start(date: str, offset_days: int = 0):
+    """ISO timestamp of midnight on ``date`` (YYYY-MM-DD), optionally shifted."""
+    day = datetime.strptime(date, '%Y-%m-%d') + timedelta(days=offset_days)
+    return day.strftime('%Y-%m-%dT00:00:00')
+
+def to_epoch(timestamp: str):
+    """Integer seconds of an ISO timestamp, as stored in start_ts/end_ts.
+    
+    Timestamps are naive local time and are counted as if they were UTC,
+    matching SQLite's strftime('%s', ...), so dates and durations line up
+    with the ISO strings.
+    """
+    return calendar.timegm(datetime.fromisoformat(timestamp).timetuple())
+
+def day_start_ts(date: str, offset_days: int = 0):
+    """``day_start()`` as integer seconds."""
+    return to_epoch(day_start(date, offset_days))
+
+class EntrySpanError(ValueError):
+    """An entry would end before it starts."""
+
+def parse_entry_time(value, required: bool = True):
+    """(ISO string, epoch seconds) of a submitted entry time.
+    
+    An empty optional time gives (None, None); a missing required or a
+    malformed one raises ValueError (TypeError for non-strings).
+    """
+    if not value:
+        if required:
+            raise ValueError('missing time')
+        return None, None
+    return value, to_epoch(value)
+
+def check_entry_span(start_ts: int, end_ts: Optional[int]):
+    """Raise EntrySpanError unless an entry with these times ends at or after its start."""
+    if end_ts is not None and end_ts < start_ts:
+        raise EntrySpanError('end_time before start_time')
+
+def entry_cursor(entry: TimeEntry):
+    """Opaque keyset cursor pointing just after ``entry`` in newest-first order."""
+    return f"{to_epoch(entry.start_time)}|{entry.id}"
+
+def parse_entry_cursor(cursor: str):
+    """Split a cursor from ``entry_cursor()`` into (start_ts, id)."""
+    start_ts, sep, entry_id = cursor.partition('|')
+    if not sep or not start_ts.isdigit() or not entry_id:
+        raise ValueError(f"Invalid entry cursor: {cursor!r}")
+    return int(start_ts), entry_id
+
+def group_entries_by_date(entries):
+    """Group entries by the date of their start time."""
+    entries_by_date = defaultdict(list)
+    for entry in entries:
+        entries_by_date[entry.start_time[:10]].append(entry)
+    return dict(entries_by_date)
+
+class TimerEventBroker:
+    """In-process fan-out of "timer changed" notifications to /events streams.
+    
+    A notification carries no payload; each stream re-reads the timer state
+    and only sends it if it actually changed. Streams also re-check on every
+    heartbeat, which picks up changes made by other worker processes.
+    
+    Every stream occupies a server thread for its whole lifetime, so at
+    most ``max_streams`` may be open at once (see ``open_stream``).
+    """
+    
+    def __init__(self, max_streams: int = SSE_MAX_STREAMS):
+        self.max_streams = max_streams
+        self.streams = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+    
+    def open_stream(self):
+        """Reserve a stream slot; False when all are taken."""
+        with self._lock:
+            if self.streams >= self.max_streams:
+                self.rejected += 1
+                return False
+            self.streams += 1
+            return True
+    
+    def close_stream(self):
+        with self._lock:
+            self.streams -= 1
+    
+    def subscribe(self, user_id: int):
+        # maxsize=1 coalesces bursts of notifications into a single wake-up
+        channel = queue.Queue(maxsize=1)
+        with self._lock:
+            self._subscribers[user_id].add(channel)
+        return channel
+    
+    def unsubscribe(self, user_id: int, channel):
+        with self._lock:
+            self._subscribers[user_id].discard(channel)
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+    
+    def publish(self, user_id: int):
+        with self._lock:
+            channels = list(self._subscribers.get(user_id, ()))
+        for channel in channels:
+            try:
+                channel.put_nowait(True)
+            except queue.Full:
+                pass
+
+class RunningEntryRegistry:
+    """In-process map of user_id -> running TimeEntry, mirroring current_entries.
+    
+    Consistency model:
+    
+    * It is loaded from current_entries at startup and written through by
+      every TimesheetManager method that changes a running timer, after that
+      transaction commits. Each write draws a sequence number while it still
+      holds SQLite's write lock, so the numbers follow commit order and a
+      late callback can never overwrite a newer state.
+    * Lookups that miss (or are older than ``ttl``) read the database and
+      fill the registry, unless a write for that user landed in the meantime.
+    * With a single process (``ttl=None``) the registry is exact and lookups
+      never touch SQLite. With several worker processes each one only sees
+      its own writes, so set RUNNING_REGISTRY_TTL to the staleness you accept
+      (e.g. 2 seconds); cached answers older than that are re-read.
+    """
+    
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}  # user_id -> (entry or None, seq, checked_at)
+        self._loaded_at = None
+        self._seq = itertools.count(1)
+    
+    def _fresh(self, checked_at):
+        return self.ttl is None or time.monotonic() - checked_at < self.ttl
+    
+    def next_seq(self):
+        return next(self._seq)
+    
+    def load(self, entries):
+        """Replace the registry with all running entries."""
+        now = time.monotonic()
+        with self._lock:
+            self._entries = {entry.user_id: (entry, 0, now) for entry in entries}
+            self._loaded_at = now
+    
+    def lookup(self, user_id: int):
+        """Return (found, entry); found is False when the DB must be asked."""
+        with self._lock:
+            cached = self._entries.get(user_id)
+            loaded_at = self._loaded_at
+        if cached is not None:
+            if self._fresh(cached[2]):
+                return True, cached[0]
+        elif loaded_at is not None and self._fresh(loaded_at):
+            # Not in a fresh full load means not running
+            return True, None
+        return False, None
+    
+    def read_token(self, user_id: int):
+        """Sequence number to pass to ``fill`` after reading the database."""
+        with self._lock:
+            cached = self._entries.get(user_id)
+        return cached[1] if cached else 0
+    
+    def fill(self, user_id: int, entry, token: int):
+        """Store a value read from the database unless a write overtook it."""
+        with self._lock:
+            cached = self._entries.get(user_id)
+            if (cached[1] if cached else 0) == token:
+                self._entries[user_id] = (entry, token, time.monotonic())
+    
+    def set(self, user_id: int, entry, seq: int):
+        """Write-through after a committed change."""
+        with self._lock:
+            cached = self._entries.get(user_id)
+            if cached is None or seq > cached[1]:
+                self._entries[user_id] = (entry, seq, time.monotonic())
+
+class UserDataCache:
+    """LRU cache for per-user read results that only change when that user writes.
+    
+    Entries are keyed by (user_id, kind, args), bounded by ``max_entries``
+    and expire after ``ttl`` seconds. Each value is stamped with the user's
+    data version (see TimesheetManager.get_data_versions()) read before the
+    query, and only served while that version is current. Writes bump the
+    version in their transaction, so the cache stays correct across worker
+    processes and a read racing with a commit never serves the old result.
+    
+    Cached values are shared between requests and must not be mutated.
+    """
+    
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        self.evictions = 0
+    
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.ttl > 0
+    
+    def get(self, user_id: int, kind: str, args, version: int):
+        """Return (found, value) for a value cached at ``version``."""
+        key = (user_id, kind, args)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[1] == version and item[2] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits[kind] += 1
+                return True, item[0]
+            if item is not None:
+                del self._entries[key]
+            self.misses[kind] += 1
+            return False, None
+    
+    def put(self, user_id: int, kind: str, args, value, version: int):
+        key = (user_id, kind, args)
+        with self._lock:
+            self._entries[key] = (value, version, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        with self._lock:
+            kinds = sorted(set(self.hits) | set(self.misses))
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'evictions': self.evictions,
+                'hits': sum(self.hits.values()),
+                'misses': sum(self.misses.values()),
+                'by_kind': {kind: {'hits': self.hits[kind], 'misses': self.misses[kind]} for kind in kinds},
+            }
+
+# ===== PASSWORDS =====
+#
+# PBKDF2/scrypt cost tens to hundreds of milliseconds of CPU per hash. They
+# run on a small pool instead of the request threads, so a burst of logins
+# (or a brute-force run against /login) occupies at most PASSWORD_HASH_WORKERS
+# cores per process while timer clicks keep being served. The rate limits
+# below turn abusive clients away before they get that far.
+
+class PasswordHashBusy(Exception):
+    """The hashing pool and its backlog are full; retry later."""
+
+def canonical_hash_method(method: str):
+    """The prefix werkzeug writes into hashes made with ``method``.
+    
+    Fills in werkzeug's defaults, e.g. 'pbkdf2' -> 'pbkdf2:sha256:600000'
+    and 'scrypt' -> 'scrypt:32768:8:1', so a stored hash can be compared
+    with the configured method without hashing anything.
+    """
+    name, *args = method.split(':')
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    return method
+
+class PasswordHasher:
+    """Hashes and verifies passwords on a bounded thread pool.
+    
+    At most ``workers`` hashes run at once and up to ``backlog`` further
+    callers wait for a slot; anyone beyond that gets PasswordHashBusy right
+    away instead of queueing. A caller that waits longer than ``timeout``
+    gets it too - the hash still finishes in the background and only then
+    frees its slot, so the pool can't be overcommitted by giving up early.
+    """
+    
+    def __init__(self, method: str = PASSWORD_HASH_METHOD, workers: int = PASSWORD_HASH_WORKERS,
+                 backlog: int = PASSWORD_HASH_BACKLOG, timeout: float = PASSWORD_HASH_TIMEOUT):
+        self.method = method
+        self.prefix = canonical_hash_method(method)
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, backlog)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+    
+    def _release(self, future):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+    
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHashBusy()
+        with self._lock:
+            self.in_flight += 1
+        future = self._executor.submit(function, *args)
+        future.add_done_callback(self._release)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHashBusy() from None
+    
+    def hash(self, password: str):
+        return self._run(generate_password_hash, password, self.method)
+    
+    def verify(self, password_hash: str, password: str):
+        return self._run(check_password_hash, password_hash, password)
+    
+    def needs_rehash(self, password_hash: str):
+        """True if ``password_hash`` wasn't made with the configured method."""
+        return password_hash.split('$', 1)[0] != self.prefix
+    
+    def stats(self):
+        with self._lock:
+            return {'in_flight': self.in_flight, 'capacity': self.capacity,
+                    'completed': self.completed, 'rejected': self.rejected}
+
+class LoginRateLimiter:
+    """Sliding-window limits on login attempts, checked before any hashing.
+    
+    Every attempt counts against the client address (``max_per_ip``); failed
+    attempts also count against the username (``max_failures_per_user``) and
+    a successful login clears them. Refused attempts aren't counted, so a
+    blocked client is let in again once its window has passed.
+    
+    Counters live in this process only; with several workers the effective
+    limit is up to that many times higher. At most ``max_keys`` addresses
+    and usernames are tracked, the least recently seen are dropped first.
+    """
+    
+    def __init__(self, window: float = LOGIN_RATE_WINDOW, max_per_ip: int = LOGIN_MAX_ATTEMPTS_PER_IP,
+                 max_failures_per_user: int = LOGIN_MAX_FAILURES_PER_USER, max_keys: int = 10000):
+        self.window = window
+        self.max_per_ip = max_per_ip
+        self.max_failures_per_user = max_failures_per_user
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._hits = OrderedDict()  # ('ip' | 'user', value) -> deque of monotonic timestamps
+        self.refused = 0
+    
+    def _recent(self, key, now):
+        hits = self._hits.get(key)
+        if hits is None:
+            return None
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+        if not hits:
+            del self._hits[key]
+            return None
+        return hits
+    
+    def _add(self, key, now):
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = deque()
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+        else:
+            self._hits.move_to_end(key)
+        hits.append(now)
+    
+    def _wait(self, hits, limit, now):
+        if not limit or hits is None or len(hits) < limit:
+            return 0
+        return max(1, int(hits[-limit] + self.window - now) + 1)
+    
+    def attempt(self, ip: str, username: str):
+        """Count a login attempt; returns 0, or the seconds until it may be retried."""
+        now = time.monotonic()
+        with self._lock:
+            retry_after = max(self._wait(self._recent(('ip', ip), now), self.max_per_ip, now),
+                              self._wait(self._recent(('user', username), now),
+                                         self.max_failures_per_user, now))
+            if retry_after:
+                self.refused += 1
+                return retry_after
+            if self.max_per_ip:
+                self._add(('ip', ip), now)
+            return 0
+    
+    def failed(self, username: str):
+        if self.max_failures_per_user:
+            with self._lock:
+                self._add(('user', username), time.monotonic())
+    
+    def succeeded(self, username: str):
+        with self._lock:
+            self._hits.pop(('user', username), None)
+    
+    def reset(self):
+        with self._lock:
+            self._hits.clear()
+            self.refused = 0
+
+@dataclass
+class ImportJob:
+    """Row of import_jobs; the counters add up over all runs of the job."""
+    id: str
+    user_id: Optional[int]
+    source: str
+    format: str
+    checksum: str
+    status: str = 'running'
+    position: int = 0  # input records consumed (imported, duplicate or failed)
+    inserted: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+@dataclass
+class DataVersions:
+    """Change counters of one user's data; see _data_changed()."""
+    tickets: int = 0
+    entries: int = 0
+    updated_ts: Optional[int] = None
+
+# Data group (column of user_data_versions) each cache kind depends on
+CACHE_KIND_GROUPS = {
+    'tickets': 'tickets',
+    'archived_tickets': 'tickets',
+    'entries': 'entries',
+    'day_totals': 'entries',
+    'summary': 'entries',
+}
+
+@instrumented
 class TimesheetManager:
     def __init__(self):
-        init_database()
+        self.db = None
+        self.timer_events = TimerEventBroker()
+        self.running = RunningEntryRegistry(RUNNING_REGISTRY_TTL)
+        self.cache = UserDataCache()
+        self.passwords = PasswordHasher()
     
-    def authenticate_user(self, username: str, password: str):
-        """Authenticate user with username and password."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, username, password_hash FROM users WHERE username = ?', (username,))
+    def init_app(self, app):
+        """Open the database configured on ``app`` and bring it up to date."""
+        self.open(app.config['DATABASE'])
+        app.extensions['timesheet'] = self
+    
+    def open(self, database: str):
+        """Connect to ``database``, run pending migrations and load running timers."""
+        if self.db is not None:
+            self.db.close_all()
+        self.db = ConnectionPool(database)
+        self.timer_events = TimerEventBroker()
+        self.running = RunningEntryRegistry(RUNNING_REGISTRY_TTL)
+        self.cache = UserDataCache()
+        init_database(self.db)
+        self._load_running_entries()
+    
+    _CURRENT_ENTRY_SELECT = '''
+        SELECT t.id, t.user_id, k.name, t.start_time, t.end_time, t.memo,
+               (t.end_ts - t.start_ts) / 3600.0
+        FROM current_entries c
+        JOIN time_entries t ON t.id = c.entry_id
+        JOIN ticket_keys k ON k.key = t.ticket_key
+    '''
+    
+    def _load_running_entries(self):
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self._CURRENT_ENTRY_SELECT)
+            self.running.load(list(map(TimeEntry._make, cursor.fetchall())))
+    
+    def _read_current_entry(self, cursor, user_id: int):
+        cursor.execute(self._CURRENT_ENTRY_SELECT + ' WHERE c.user_id = ?', (user_id,))
         row = cursor.fetchone()
-        conn.close()
+        return TimeEntry._make(row) if row else None
+    
+    def _timer_changed(self, cursor, user_id: int):
+        """Write the user's running entry through to the registry and notify
+        /events streams, both once the current transaction commits."""
+        entry = self._read_current_entry(cursor, user_id)
+        seq = self.running.next_seq()
         
-        if row and check_password_hash(row[2], password):
-            return User(id=row[0], username=row[1])
-        return None
+        def publish():
+            self.running.set(user_id, entry, seq)
+            self.timer_events.publish(user_id)
+        self.db.after_commit(publish)
+    
+    def _data_changed(self, cursor, user_id: int, *groups: str):
+        """Bump the user's data version of ``groups`` ('tickets', 'entries').
+        
+        Runs inside the writing transaction, so the new version becomes
+        visible together with the data it describes.
+        """
+        cursor.execute('''
+            INSERT INTO user_data_versions (user_id, tickets, entries, updated_ts)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET
+                tickets = tickets + excluded.tickets,
+                entries = entries + excluded.entries,
+                updated_ts = excluded.updated_ts
+        ''', (user_id, int('tickets' in groups), int('entries' in groups), int(time.time())))
+    
+    def get_data_versions(self, user_id: int):
+        """Current DataVersions of a user (all zero before the first write)."""
+        with self.db.connection() as conn:
+            row = conn.execute('''
+                SELECT tickets, entries, updated_ts FROM user_data_versions WHERE user_id = ?
+            ''', (user_id,)).fetchone()
+        return DataVersions(*row) if row else DataVersions()
+    
+    def _cached(self, user_id: int, kind: str, args, load, cacheable=None):
+        """Serve ``load()`` from the cache while the user's data is unchanged."""
+        if not self.cache.enabled:
+            return load()
+        version = getattr(self.get_data_versions(user_id), CACHE_KIND_GROUPS[kind])
+        found, value = self.cache.get(user_id, kind, args, version)
+        if found:
+            return value
+        value = load()
+        if cacheable is None or cacheable(value):
+            self.cache.put(user_id, kind, args, value, version)
+        return value
+    
+    def _ticket_key(self, cursor, user_id: int, name: str):
+        """Key for ticket ``name`` of a user, created on first use.
+        
+        An existing ticket's own key wins, so entries always land where
+        archive cleanup and exports look for them. Names without a ticket
+        (deleted, or only seen in imports) use their active key.
+        """
+        cursor.execute('''
+            SELECT ticket_key FROM tickets
+            WHERE user_id = ? AND name = ? AND ticket_key IS NOT NULL
+            ORDER BY archived, created_at DESC LIMIT 1
+        ''', (user_id, name))
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+        cursor.execute('SELECT key FROM ticket_keys WHERE user_id = ? AND name = ? AND retired = 0',
+                       (user_id, name))
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+        cursor.execute('INSERT INTO ticket_keys (user_id, name) VALUES (?, ?)', (user_id, name))
+        return cursor.lastrowid
+    
+    def _rename_ticket_key(self, cursor, user_id: int, key: Optional[int], name: str):
+        """Give ``key`` (or a new key if None) the name ``name``; returns the key.
+        
+        Another active key with that name is retired first: its entries keep
+        showing the name, but new entries for ``name`` go to ``key``.
+        """
+        cursor.execute('''
+            UPDATE ticket_keys SET retired = 1
+            WHERE user_id = ? AND name = ? AND retired = 0 AND key IS NOT ?
+        ''', (user_id, name, key))
+        if key is None:
+            cursor.execute('INSERT INTO ticket_keys (user_id, name) VALUES (?, ?)', (user_id, name))
+            return cursor.lastrowid
+        cursor.execute('UPDATE ticket_keys SET name = ?, retired = 0 WHERE key = ?', (name, key))
+        return key
+    
+    def authenticate_user(self, username: str, password: str):
+        """Authenticate user with username and password.
+        
+        The hash is checked on the password pool and raises PasswordHashBusy
+        when that is saturated. A hash made with another method than
+        PASSWORD_HASH_METHOD is replaced while the password is at hand.
+        """
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id, username, password_hash FROM users WHERE username = ?', (username,))
+            row = cursor.fetchone()
+        
+        if not row or not self.passwords.verify(row[2], password):
+            return None
+        if self.passwords.needs_rehash(row[2]):
+            self._upgrade_password_hash(row[0], row[2], password)
+        return User(id=row[0], username=row[1])
+    
+    def _upgrade_password_hash(self, user_id: int, old_hash: str, password: str):
+        try:
+            password_hash = self.passwords.hash(password)
+        except PasswordHashBusy:
+            return  # the next login tries again
+        with self.db.connection() as conn:
+            # Only if unchanged, so a concurrent password change wins
+            conn.execute('UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?',
+                         (password_hash, user_id, old_hash))
     
     def get_users(self):
         """Get all users."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, username FROM users ORDER BY username')
-        users = [User(id=row[0], username=row[1]) for row in cursor.fetchall()]
-        conn.close()
-        return users
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id, username FROM users ORDER BY username')
+            return list(map(User._make, cursor.fetchall()))
+    
+    def get_user_by_username(self, username: str):
+        """Get user by username."""
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id, username FROM users WHERE username = ?', (username,))
+            row = cursor.fetchone()
+        return User._make(row) if row else None
     
     def get_user_by_id(self, user_id: int):
         """Get user by ID."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, username FROM users WHERE id = ?', (user_id,))
-        row = cursor.fetchone()
-        conn.close()
-        return User(id=row[0], username=row[1]) if row else None
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id, username FROM users WHERE id = ?', (user_id,))
+            row = cursor.fetchone()
+        return User._make(row) if row else None
     
     def add_user(self, username: str, password: str):
         """Add a new user with password."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
+        password_hash = self.passwords.hash(password)
         try:
-            password_hash = generate_password_hash(password)
-            cursor.execute('INSERT INTO users (username, password_hash) VALUES (?, ?)', 
-                         (username, password_hash))
-            user_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            return user_id
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('INSERT INTO users (username, password_hash) VALUES (?, ?)', 
+                             (username, password_hash))
+                return cursor.lastrowid
         except sqlite3.IntegrityError:
-            conn.close()
             return None  # Username already exists
     
     def change_password(self, user_id: int, new_password: str):
         """Change user password."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        password_hash = generate_password_hash(new_password)
-        cursor.execute('UPDATE users SET password_hash = ? WHERE id = ?', 
-                      (password_hash, user_id))
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        return success
+        password_hash = self.passwords.hash(new_password)
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('UPDATE users SET password_hash = ? WHERE id = ?', 
+                          (password_hash, user_id))
+            return cursor.rowcount > 0
     
     def get_tickets(self, user_id: int, include_archived: bool = False):
-        """Get all tickets for a specific user in the correct order."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        
-        # First, get the user's custom order if it exists
-        cursor.execute('SELECT ticket_order FROM user_ticket_order WHERE user_id = ?', (user_id,))
-        order_row = cursor.fetchone()
-        custom_order = json.loads(order_row[0]) if order_row and order_row[0] else []
-        
-        # Get all tickets (archived or not based on parameter)
-        if include_archived:
-            cursor.execute('''
-                SELECT id, user_id, name, color, jira_ticket, matrix_ticket, archived, archived_at
-                FROM tickets WHERE user_id = ?
-            ''', (user_id,))
-        else:
-            cursor.execute('''
-                SELECT id, user_id, name, color, jira_ticket, matrix_ticket, archived, archived_at
-                FROM tickets WHERE user_id = ? AND (archived = 0 OR archived IS NULL)
-            ''', (user_id,))
-        
-        all_tickets = {}
-        for row in cursor.fetchall():
-            ticket = Ticket(
-                id=row[0], user_id=row[1], name=row[2], color=row[3],
-                jira_ticket=row[4], matrix_ticket=row[5]
-            )
-            all_tickets[ticket.id] = ticket
-        
-        conn.close()
+        """Get all tickets for a specific user in the correct order (cached)."""
+        return self._cached(user_id, 'tickets', (include_archived,),
+                            lambda: self._query_tickets(user_id, include_archived))
+    
+    def _query_tickets(self, user_id: int, include_archived: bool):
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            
+            # First, get the user's custom order if it exists
+            cursor.execute('SELECT ticket_order FROM user_ticket_order WHERE user_id = ?', (user_id,))
+            order_row = cursor.fetchone()
+            custom_order = json.loads(order_row[0]) if order_row and order_row[0] else []
+            
+            # Get all tickets (archived or not based on parameter)
+            if include_archived:
+                cursor.execute('''
+                    SELECT id, user_id, name, color, jira_ticket, matrix_ticket
+                    FROM tickets WHERE user_id = ?
+                ''', (user_id,))
+            else:
+                cursor.execute('''
+                    SELECT id, user_id, name, color, jira_ticket, matrix_ticket
+                    FROM tickets WHERE user_id = ? AND (archived = 0 OR archived IS NULL)
+                ''', (user_id,))
+            
+            all_tickets = {ticket.id: ticket for ticket in map(Ticket._make, cursor.fetchall())}
         
         # Sort tickets according to custom order, then alphabetically for new ones
         ordered_tickets = []
@@ -252,305 +1669,1175 @@ class TimesheetManager:
         return ordered_tickets
     
     def get_archived_tickets(self, user_id: int):
-        """Get archived tickets for a user."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, user_id, name, color, jira_ticket, matrix_ticket
-            FROM tickets 
-            WHERE user_id = ? AND archived = 1
-            ORDER BY name
-        ''', (user_id,))
-        
-        archived_tickets = []
-        for row in cursor.fetchall():
-            archived_tickets.append(Ticket(
-                id=row[0], user_id=row[1], name=row[2], color=row[3],
-                jira_ticket=row[4], matrix_ticket=row[5]
-            ))
-        conn.close()
-        return archived_tickets
+        """Get archived tickets for a user (cached)."""
+        return self._cached(user_id, 'archived_tickets', (),
+                            lambda: self._query_archived_tickets(user_id))
+    
+    def _query_archived_tickets(self, user_id: int):
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, user_id, name, color, jira_ticket, matrix_ticket
+                FROM tickets 
+                WHERE user_id = ? AND archived = 1
+                ORDER BY name
+            ''', (user_id,))
+            return list(map(Ticket._make, cursor.fetchall()))
     
     def archive_ticket(self, user_id: int, ticket_id: str):
         """Archive a ticket instead of deleting it."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE tickets 
-            SET archived = 1, archived_at = ?
-            WHERE id = ? AND user_id = ?
-        ''', (datetime.now().isoformat(), ticket_id, user_id))
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        return success
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE tickets 
+                SET archived = 1, archived_at = ?
+                WHERE id = ? AND user_id = ?
+            ''', (datetime.now().isoformat(), ticket_id, user_id))
+            changed = cursor.rowcount > 0
+            if changed:
+                self._data_changed(cursor, user_id, 'tickets')
+            return changed
     
     def restore_ticket(self, user_id: int, ticket_id: str):
         """Restore an archived ticket."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE tickets 
-            SET archived = 0, archived_at = NULL
-            WHERE id = ? AND user_id = ?
-        ''', (ticket_id, user_id))
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        return success
-    
-    def cleanup_old_archived_tickets(self, user_id: int):
-        """Delete archived tickets with no entries in the last month."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE tickets 
+                SET archived = 0, archived_at = NULL
+                WHERE id = ? AND user_id = ?
+            ''', (ticket_id, user_id))
+            changed = cursor.rowcount > 0
+            if changed:
+                self._data_changed(cursor, user_id, 'tickets')
+            return changed
+    
+    def get_archived_ticket_owners(self):
+        """IDs of all users with at least one archived ticket."""
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT DISTINCT user_id FROM tickets WHERE archived = 1 ORDER BY user_id')
+            return [row[0] for row in cursor.fetchall()]
+    
+    def cleanup_old_archived_tickets(self, user_ids: List[int]):
+        """Delete archived tickets of ``user_ids`` with no entries in the last month."""
+        if not user_ids:
+            return 0
         one_month_ago = (datetime.now() - timedelta(days=30)).isoformat()
+        placeholders = ','.join('?' * len(user_ids))
         
-        # Find archived tickets
-        cursor.execute('''
-            SELECT id, name FROM tickets 
-            WHERE user_id = ? AND archived = 1
-        ''', (user_id,))
-        
-        archived_tickets = cursor.fetchall()
-        deleted_count = 0
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                DELETE FROM tickets
+                WHERE archived = 1 AND user_id IN ({placeholders})
+                  AND NOT EXISTS (
+                      SELECT 1 FROM time_entries e
+                      WHERE e.user_id = tickets.user_id
+                        AND e.ticket_key = tickets.ticket_key
+                        AND e.start_ts >= ?
+                  )
+                RETURNING user_id
+            ''', (*user_ids, to_epoch(one_month_ago)))
+            owners = [row[0] for row in cursor.fetchall()]
+            # Only users who lost a ticket get new versions (and lose their cache)
+            for user_id in sorted(set(owners)):
+                self._data_changed(cursor, user_id, 'tickets')
+            return len(owners)
+    
+    def cleanup_all_archived_tickets(self, batch_size: int = MAINTENANCE_BATCH_SIZE):
+        """Run the archive cleanup for every user, one transaction per batch."""
+        owners = self.get_archived_ticket_owners()
+        deleted = 0
+        for i in range(0, len(owners), batch_size):
+            deleted += self.cleanup_old_archived_tickets(owners[i:i + batch_size])
+        return deleted
+    
+    def compact_rollups(self):
+        """Drop rollup rows without any closed entry behind them.
         
-        for ticket_id, ticket_name in archived_tickets:
-            # Check if there are any entries in the last month
+        Such rows only appear after manual edits of time_entries or deleted
+        users; dropping them leaves every summary and day total unchanged.
+        """
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
             cursor.execute('''
-                SELECT COUNT(*) FROM time_entries
-                WHERE user_id = ? AND ticket_name = ? AND start_time >= ?
-            ''', (user_id, ticket_name, one_month_ago))
-            
-            count = cursor.fetchone()[0]
-            
-            if count == 0:
-                # No entries in last month, safe to delete
-                cursor.execute('DELETE FROM tickets WHERE id = ? AND user_id = ?', 
-                             (ticket_id, user_id))
-                deleted_count += 1
+                DELETE FROM daily_rollups
+                WHERE user_id NOT IN (SELECT id FROM users)
+                   OR NOT EXISTS (
+                       SELECT 1 FROM time_entries e
+                       WHERE e.user_id = daily_rollups.user_id
+                         AND e.ticket_key = daily_rollups.ticket_key
+                         AND e.start_ts >= CAST(strftime('%s', daily_rollups.day) AS INTEGER)
+                         AND e.start_ts < CAST(strftime('%s', daily_rollups.day) AS INTEGER) + 86400
+                         AND e.end_ts IS NOT NULL
+                   )
+            ''')
+            return cursor.rowcount
+    
+    def optimize_database(self):
+        """Let SQLite refresh the statistics the query planner relies on."""
+        with self.db.connection() as conn:
+            conn.execute('PRAGMA optimize')
+    
+    def checkpoint_wal(self):
+        """Copy the WAL back into the database file and truncate it.
         
-        conn.commit()
-        conn.close()
-        return deleted_count
+        Returns (busy, wal_pages, checkpointed_pages) as reported by SQLite.
+        """
+        with self.db.connection() as conn:
+            return tuple(conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone())
     
     def save_ticket_order(self, user_id: int, ticket_order: List[str]):
         """Save the user's custom ticket order."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        
         order_json = json.dumps(ticket_order)
-        cursor.execute('''
-            INSERT OR REPLACE INTO user_ticket_order (user_id, ticket_order, updated_at)
-            VALUES (?, ?, ?)
-        ''', (user_id, order_json, datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO user_ticket_order (user_id, ticket_order, updated_at)
+                VALUES (?, ?, ?)
+            ''', (user_id, order_json, datetime.now().isoformat()))
+            self._data_changed(cursor, user_id, 'tickets')
         return True
     
     def get_ticket_by_id(self, user_id: int, ticket_id: str):
         """Get a specific ticket by ID for a user."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, user_id, name, color, jira_ticket, matrix_ticket 
-            FROM tickets WHERE id = ? AND user_id = ?
-        ''', (ticket_id, user_id))
-        row = cursor.fetchone()
-        conn.close()
-        if row:
-            return Ticket(
-                id=row[0], user_id=row[1], name=row[2], color=row[3],
-                jira_ticket=row[4], matrix_ticket=row[5]
-            )
-        return None
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, user_id, name, color, jira_ticket, matrix_ticket 
+                FROM tickets WHERE id = ? AND user_id = ?
+            ''', (ticket_id, user_id))
+            row = cursor.fetchone()
+        return Ticket._make(row) if row else None
     
     def add_ticket(self, user_id: int, name: str, color: str, jira_ticket: str = "", matrix_ticket: str = ""):
         """Add a new ticket for a user."""
         ticket_id = str(uuid.uuid4())
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO tickets (id, user_id, name, color, jira_ticket, matrix_ticket)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (ticket_id, user_id, name, color, jira_ticket, matrix_ticket))
-        conn.commit()
-        conn.close()
+        with self.db.connection(immediate=True) as conn:
+            cursor = conn.cursor()
+            ticket_key = self._ticket_key(cursor, user_id, name)
+            cursor.execute('''
+                INSERT INTO tickets (id, user_id, name, color, jira_ticket, matrix_ticket, ticket_key)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (ticket_id, user_id, name, color, jira_ticket, matrix_ticket, ticket_key))
+            self._data_changed(cursor, user_id, 'tickets')
         return ticket_id
     
     def update_ticket(self, user_id: int, ticket_id: str, name: str, color: str, jira_ticket: str = "", matrix_ticket: str = ""):
-        """Update a ticket (only if it belongs to the user)."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE tickets 
-            SET name = ?, color = ?, jira_ticket = ?, matrix_ticket = ?
-            WHERE id = ? AND user_id = ?
-        ''', (name, color, jira_ticket, matrix_ticket, ticket_id, user_id))
-        conn.commit()
-        conn.close()
-        return cursor.rowcount > 0
+        """Update a ticket (only if it belongs to the user).
+        
+        A rename renames the ticket's key, so existing entries follow it.
+        """
+        with self.db.connection(immediate=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE tickets 
+                SET name = ?, color = ?, jira_ticket = ?, matrix_ticket = ?
+                WHERE id = ? AND user_id = ?
+                RETURNING ticket_key
+            ''', (name, color, jira_ticket, matrix_ticket, ticket_id, user_id))
+            row = cursor.fetchone()
+            if not row:
+                return False
+            
+            ticket_key = row[0]
+            self._data_changed(cursor, user_id, 'tickets')
+            cursor.execute('SELECT name FROM ticket_keys WHERE key = ?', (ticket_key,))
+            if cursor.fetchone()[0] != name:
+                cursor.execute('SELECT COUNT(*) FROM tickets WHERE ticket_key = ?', (ticket_key,))
+                if cursor.fetchone()[0] > 1:
+                    # Another ticket shares the old name - leave its history alone
+                    new_key = self._rename_ticket_key(cursor, user_id, None, name)
+                    cursor.execute('UPDATE tickets SET ticket_key = ? WHERE id = ?', (new_key, ticket_id))
+                else:
+                    self._rename_ticket_key(cursor, user_id, ticket_key, name)
+                    # Entry lists and summaries show the key's name
+                    self._data_changed(cursor, user_id, 'entries')
+                    self._timer_changed(cursor, user_id)
+            return True
     
     def delete_ticket(self, user_id: int, ticket_id: str):
         """Delete a ticket (only if it belongs to the user)."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM tickets WHERE id = ? AND user_id = ?', (ticket_id, user_id))
-        conn.commit()
-        conn.close()
-        return cursor.rowcount > 0
-    
-    def get_entries(self, user_id: int):
-        """Get all time entries for a specific user."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, user_id, ticket_name, start_time, end_time, memo
-            FROM time_entries WHERE user_id = ? ORDER BY start_time DESC
-        ''', (user_id,))
-        entries = []
-        for row in cursor.fetchall():
-            entries.append(TimeEntry(
-                id=row[0], user_id=row[1], ticket_name=row[2],
-                start_time=row[3], end_time=row[4], memo=row[5]
-            ))
-        conn.close()
-        return entries
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM tickets WHERE id = ? AND user_id = ?', (ticket_id, user_id))
+            changed = cursor.rowcount > 0
+            if changed:
+                self._data_changed(cursor, user_id, 'tickets')
+            return changed
     
-    def get_time_summary(self, user_id: int, start_date: str, end_date: str):
-        """Get time summary for a user within a date range."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
+    def get_entries(self, user_id: int, start: Optional[str] = None, end: Optional[str] = None,
+                    limit: Optional[int] = None, cursor: Optional[str] = None):
+        """Get time entries for a user, newest first.
         
-        start_datetime = f"{start_date}T00:00:00"
-        end_datetime = f"{end_date}T23:59:59"
+        ``start``/``end`` are inclusive dates (YYYY-MM-DD). ``cursor`` is the
+        value of ``entry_cursor()`` for the last entry of the previous page;
+        together with ``limit`` it pages through history without OFFSET.
         
-        cursor.execute('''
-            SELECT ticket_name, 
-                   SUM(CASE 
-                       WHEN end_time IS NOT NULL 
-                       THEN (julianday(end_time) - julianday(start_time)) * 24
-                       ELSE 0 
-                   END) as total_hours
-            FROM time_entries 
-            WHERE user_id = ? 
-                AND start_time >= ? 
-                AND start_time <= ?
-                AND end_time IS NOT NULL
-            GROUP BY ticket_name
-            ORDER BY total_hours DESC
-        ''', (user_id, start_datetime, end_datetime))
+        Complete lists of past days are cached unless they contain a running
+        entry; pages and ranges that include today are always read fresh.
+        """
+        if limit or cursor or not end or end >= datetime.now().strftime('%Y-%m-%d'):
+            return self._query_entries(user_id, start, end, limit, cursor)
+        
+        return self._cached(user_id, 'entries', (start, end),
+                            lambda: self._query_entries(user_id, start, end),
+                            cacheable=lambda entries: all(entry.end_time for entry in entries))
+    
+    def _query_entries(self, user_id: int, start: Optional[str] = None, end: Optional[str] = None,
+                       limit: Optional[int] = None, cursor: Optional[str] = None):
+        conditions = ['e.user_id = ?']
+        params = [user_id]
+        if start:
+            conditions.append('e.start_ts >= ?')
+            params.append(day_start_ts(start))
+        if end:
+            conditions.append('e.start_ts < ?')
+            params.append(day_start_ts(end, offset_days=1))
+        if cursor:
+            cursor_start, cursor_id = parse_entry_cursor(cursor)
+            conditions.append('(e.start_ts, e.id) < (?, ?)')
+            params.extend([cursor_start, cursor_id])
+        
+        query = f'''
+            SELECT e.id, e.user_id, k.name, e.start_time, e.end_time, e.memo,
+                   (e.end_ts - e.start_ts) / 3600.0
+            FROM time_entries e
+            JOIN ticket_keys k ON k.key = e.ticket_key
+            WHERE {' AND '.join(conditions)}
+            ORDER BY e.start_ts DESC, e.id DESC
+        '''
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        
+        with self.db.connection() as conn:
+            db_cursor = conn.cursor()
+            db_cursor.execute(query, params)
+            return list(map(TimeEntry._make, db_cursor.fetchall()))
+    
+    def get_entries_page(self, user_id: int, start: Optional[str] = None, end: Optional[str] = None,
+                         limit: int = 100, cursor: Optional[str] = None):
+        """Get one page of entries plus the cursor for the next page (or None)."""
+        entries = self.get_entries(user_id, start, end, limit + 1, cursor)
+        if len(entries) > limit:
+            entries = entries[:limit]
+            return entries, entry_cursor(entries[-1])
+        return entries, None
+    
+    def get_day_totals(self, user_id: int, start: str, end: str):
+        """Get {date: hours} for every day in [start, end] that has entries.
+        
+        Running entries count towards a day's existence but not its total.
+        """
+        return self._cached(user_id, 'day_totals', (start, end),
+                            lambda: self._query_day_totals(user_id, start, end))
+    
+    def _query_day_totals(self, user_id: int, start: str, end: str):
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT day, SUM(seconds) / 3600.0 FROM daily_rollups
+                WHERE user_id = ? AND day >= ? AND day <= ?
+                GROUP BY day
+            ''', (user_id, start, end))
+            totals = {row[0]: row[1] for row in cursor.fetchall()}
+            
+            # Days whose only entries are still open have no rollup rows
+            cursor.execute('''
+                SELECT DISTINCT substr(start_time, 1, 10) FROM time_entries
+                WHERE user_id = ? AND start_ts >= ? AND start_ts < ? AND end_ts IS NULL
+            ''', (user_id, day_start_ts(start), day_start_ts(end, offset_days=1)))
+            for row in cursor.fetchall():
+                totals.setdefault(row[0], 0)
+        return totals
+    
+    def get_entry_dates(self, user_id: int, before: str, limit: int):
+        """Get up to ``limit`` dates with entries before ``before``, newest first.
+        
+        Walks the (user_id, start_ts) index with one seek per date instead
+        of scanning the user's whole history for DISTINCT dates.
+        """
+        dates = []
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            bound = day_start_ts(before)
+            while len(dates) < limit:
+                cursor.execute('''
+                    SELECT date(MAX(start_ts), 'unixepoch') FROM time_entries
+                    WHERE user_id = ? AND start_ts < ?
+                ''', (user_id, bound))
+                row = cursor.fetchone()
+                if not row or not row[0]:
+                    break
+                date = row[0]
+                dates.append(date)
+                bound = day_start_ts(date)
+        return dates
+    
+    def get_current_entry(self, user_id: int):
+        """Get the running entry of a user, or None."""
+        found, entry = self.running.lookup(user_id)
+        if found:
+            return entry
+        
+        token = self.running.read_token(user_id)
+        with self.db.connection() as conn:
+            entry = self._read_current_entry(conn.cursor(), user_id)
+        self.running.fill(user_id, entry, token)
+        return entry
+    
+    def get_time_summary(self, user_id: int, start_date: str, end_date: str):
+        """Get time summary for a user within a date range (cached)."""
+        return self._cached(user_id, 'summary', (start_date, end_date),
+                            lambda: self._query_time_summary(user_id, start_date, end_date))
+    
+    def _query_time_summary(self, user_id: int, start_date: str, end_date: str):
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            # Aggregate by key first, then resolve each key's name once
+            cursor.execute('''
+                SELECT k.name, totals.hours
+                FROM (
+                    SELECT ticket_key, SUM(seconds) / 3600.0 AS hours
+                    FROM daily_rollups
+                    WHERE user_id = ? AND day >= ? AND day <= ?
+                    GROUP BY ticket_key
+                ) totals
+                JOIN ticket_keys k ON k.key = totals.ticket_key
+            ''', (user_id, start_date, end_date))
+            rows = cursor.fetchall()
+        
+        # Keys of a deleted and a re-created ticket can share a name
+        hours_by_name = defaultdict(float)
+        for ticket_name, hours in rows:
+            hours_by_name[ticket_name] += hours
         
         summary = {}
         total_time = 0
-        for row in cursor.fetchall():
-            ticket_name = row[0]
-            hours = round(row[1], 2)
+        for ticket_name, hours in sorted(hours_by_name.items(), key=lambda item: item[1], reverse=True):
+            hours = round(hours, 2)
             summary[ticket_name] = hours
             total_time += hours
         
-        conn.close()
         return summary, round(total_time, 2)
     
+    def rebuild_rollups(self, user_id: Optional[int] = None):
+        """Recompute the daily rollups from the raw entries."""
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            rows = rebuild_rollups(cursor, user_id)
+            cursor.execute('''
+                INSERT INTO user_data_versions (user_id, entries, updated_ts)
+                SELECT id, 1, ? FROM users WHERE ? IS NULL OR id = ?
+                ON CONFLICT (user_id) DO UPDATE SET
+                    entries = entries + 1, updated_ts = excluded.updated_ts
+            ''', (int(time.time()), user_id, user_id))
+            return rows
+    
+    def switch_timer(self, user_id: int, ticket_name: Optional[str]):
+        """Stop the running timer and start one for ``ticket_name`` atomically.
+        
+        One BEGIN IMMEDIATE transaction and one commit, so concurrent switches
+        of the same user serialize and there is never a moment with zero or
+        two running timers. ``ticket_name=None`` only stops.
+        Returns (stopped_entry, started_entry), either may be None.
+        """
+        now = datetime.now().isoformat()
+        now_ts = to_epoch(now)
+        
+        with self.db.connection(immediate=True) as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE time_entries SET end_time = ?, end_ts = ?
+                WHERE id = (SELECT entry_id FROM current_entries WHERE user_id = ?) AND user_id = ?
+                RETURNING id, user_id, (SELECT name FROM ticket_keys WHERE key = ticket_key),
+                          start_time, end_time, memo, (end_ts - start_ts) / 3600.0
+            ''', (now, now_ts, user_id, user_id))
+            row = cursor.fetchone()
+            stopped = TimeEntry._make(row) if row else None
+            
+            started = None
+            if ticket_name:
+                started = TimeEntry(id=str(uuid.uuid4()), user_id=user_id,
+                                    ticket_name=ticket_name, start_time=now, end_time=None)
+                cursor.execute('''
+                    INSERT INTO time_entries (id, user_id, ticket_key, start_time, start_ts)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (started.id, user_id, self._ticket_key(cursor, user_id, ticket_name), now, now_ts))
+                cursor.execute('''
+                    INSERT INTO current_entries (user_id, entry_id) VALUES (?, ?)
+                    ON CONFLICT (user_id) DO UPDATE SET entry_id = excluded.entry_id
+                ''', (user_id, started.id))
+            else:
+                cursor.execute('DELETE FROM current_entries WHERE user_id = ?', (user_id,))
+            
+            if stopped:
+                refresh_rollups(cursor, user_id, [stopped.start_time])
+            if stopped or started:
+                self._data_changed(cursor, user_id, 'entries')
+                self._timer_changed(cursor, user_id)
+        
+        return stopped, started
+    
     def start_time_entry(self, user_id: int, ticket_name: str):
         """Start a new time entry for a user."""
-        self.stop_current_entry(user_id)
+        _, started = self.switch_timer(user_id, ticket_name)
+        return started.id
+    
+    def stop_current_entry(self, user_id: int):
+        """Stop the current running entry for a user."""
+        self.switch_timer(user_id, None)
+    
+    def get_current_entry_id(self, user_id: int):
+        """Get the current running entry ID for a user."""
+        entry = self.get_current_entry(user_id)
+        return entry.id if entry else None
+    
+    def update_entry(self, user_id: int, entry_id: str, start_time: str, end_time: str, memo: str):
+        """Update a time entry (only if it belongs to the user).
         
-        entry_id = str(uuid.uuid4())
-        start_time = datetime.now().isoformat()
+        Returns (previous_start_time, updated_entry), or None if there is no
+        such entry. Raises ValueError for a missing or malformed time and
+        EntrySpanError for an end before the start, before anything is written.
+        """
+        start_time, start_ts = parse_entry_time(start_time)
+        end_time, end_ts = parse_entry_time(end_time, required=False)
+        check_entry_span(start_ts, end_ts)
         
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
+        with self.db.connection(immediate=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT start_time FROM time_entries WHERE id = ? AND user_id = ?', (entry_id, user_id))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            
+            previous_start_time = row[0]
+            cursor.execute('''
+                UPDATE time_entries 
+                SET start_time = ?, end_time = ?, start_ts = ?, end_ts = ?, memo = ?
+                WHERE id = ? AND user_id = ?
+                RETURNING id, user_id, (SELECT name FROM ticket_keys WHERE key = ticket_key),
+                          start_time, end_time, memo, (end_ts - start_ts) / 3600.0
+            ''', (start_time, end_time, start_ts, end_ts, memo, entry_id, user_id))
+            entry = TimeEntry._make(cursor.fetchone())
+            refresh_rollups(cursor, user_id, [previous_start_time, start_time])
+            self._data_changed(cursor, user_id, 'entries')
+            self._timer_changed(cursor, user_id)
+            return previous_start_time, entry
+    
+    def delete_entry(self, user_id: int, entry_id: str):
+        """Delete a time entry (only if it belongs to the user).
         
-        cursor.execute('''
-            INSERT INTO time_entries (id, user_id, ticket_name, start_time)
-            VALUES (?, ?, ?, ?)
-        ''', (entry_id, user_id, ticket_name, start_time))
+        Returns the start_time of the deleted entry, or None if there was none.
+        """
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('DELETE FROM current_entries WHERE user_id = ? AND entry_id = ?', (user_id, entry_id))
+            cursor.execute('''
+                DELETE FROM time_entries WHERE id = ? AND user_id = ?
+                RETURNING start_time
+            ''', (entry_id, user_id))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            
+            refresh_rollups(cursor, user_id, [row[0]])
+            self._data_changed(cursor, user_id, 'entries')
+            self._timer_changed(cursor, user_id)
+            return row[0]
+    
+    def get_current_duration(self, user_id: int):
+        """Get the duration of the current running entry for a user."""
+        entry = self.get_current_entry(user_id)
+        if entry and not entry.end_time:
+            start = datetime.fromisoformat(entry.start_time)
+            return (datetime.now() - start).total_seconds()
+        return 0
+    
+    def apply_entry_batch(self, user_id: int, items, atomic: bool = True):
+        """Create, update and delete many entries of a user in one transaction.
         
-        cursor.execute('''
-            INSERT OR REPLACE INTO current_entries (user_id, entry_id)
-            VALUES (?, ?)
-        ''', (user_id, entry_id))
+        ``items`` are dicts with ``op`` ('create', 'update' or 'delete'),
+        ``id`` (update/delete), ``ticket_name`` (create) and ``start_time``,
+        ``end_time``, ``memo``. Updates only change the fields they carry.
+        Every op type is written with one executemany, so the whole batch
+        costs a single commit. An entry id may appear only once per batch.
         
-        conn.commit()
-        conn.close()
-        return entry_id
-    
-    def stop_current_entry(self, user_id: int):
-        """Stop the current running entry for a user."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
+        With ``atomic`` one invalid item rejects the whole batch, otherwise
+        the valid items are still applied. Returns (results, days): one
+        result dict per item (``index``, ``op``, ``success`` and ``id`` or
+        ``error``) and the start times of all touched days.
+        """
+        results = [{'index': index, 'op': item.get('op') if isinstance(item, dict) else None, 'success': False}
+                   for index, item in enumerate(items)]
+        creates, updates, deletes = [], [], []
+        seen_ids = set()
         
-        cursor.execute('SELECT entry_id FROM current_entries WHERE user_id = ?', (user_id,))
-        row = cursor.fetchone()
+        for result, item in zip(results, items):
+            if not isinstance(item, dict) or item.get('op') not in ('create', 'update', 'delete'):
+                result['error'] = 'Unknown op'
+                continue
+            op = item['op']
+            entry_id = item.get('id')
+            if op != 'create':
+                if not isinstance(entry_id, str) or not entry_id:
+                    result['error'] = 'Missing id'
+                    continue
+                if entry_id in seen_ids:
+                    result['error'] = 'Duplicate id in batch'
+                    continue
+                seen_ids.add(entry_id)
+            
+            if op == 'create':
+                ticket_name = item.get('ticket_name')
+                if not isinstance(ticket_name, str) or not ticket_name.strip():
+                    result['error'] = 'Invalid ticket name'
+                    continue
+                try:
+                    start = parse_entry_time(item.get('start_time'))
+                    # Open entries belong to the timer, not to batches
+                    end = parse_entry_time(item.get('end_time'))
+                except (TypeError, ValueError):
+                    result['error'] = 'Invalid time'
+                    continue
+                creates.append((result, ticket_name.strip(), start, end, str(item.get('memo') or '')))
+            elif op == 'update':
+                try:
+                    start = parse_entry_time(item.get('start_time')) if 'start_time' in item else None
+                    end = parse_entry_time(item.get('end_time'), required=False) if 'end_time' in item else None
+                except (TypeError, ValueError):
+                    result['error'] = 'Invalid time'
+                    continue
+                updates.append((result, entry_id, start, end, item.get('memo')))
+            else:
+                deletes.append((result, entry_id))
         
-        if row:
-            entry_id = row[0]
-            end_time = datetime.now().isoformat()
+        days = []
+        with self.db.connection(immediate=True) as conn:
+            cursor = conn.cursor()
+            
+            existing = {}
+            if seen_ids:
+                cursor.execute('''
+                    SELECT id, start_time, end_time, memo, start_ts, end_ts FROM time_entries
+                    WHERE user_id = ? AND id IN (SELECT value FROM json_each(?))
+                ''', (user_id, json.dumps(sorted(seen_ids))))
+                existing = {row[0]: row for row in cursor.fetchall()}
+            
+            update_rows = []
+            for result, entry_id, start, end, memo in updates:
+                row = existing.get(entry_id)
+                if row is None:
+                    result['error'] = 'Entry not found'
+                    continue
+                start_time, start_ts = start or (row[1], row[4])
+                end_time, end_ts = end or (row[2], row[5])
+                try:
+                    check_entry_span(start_ts, end_ts)
+                except EntrySpanError as e:
+                    result['error'] = str(e)
+                    continue
+                update_rows.append((result, (start_time, end_time, start_ts, end_ts,
+                                             row[3] if memo is None else str(memo), entry_id, user_id)))
+                days.extend([row[1], start_time])
             
+            for result, _, start, end, _ in creates:
+                try:
+                    check_entry_span(start[1], end[1])
+                except EntrySpanError as e:
+                    result['error'] = str(e)
+            create_rows = [item for item in creates if 'error' not in item[0]]
+            
+            delete_ids = []
+            for result, entry_id in deletes:
+                if entry_id not in existing:
+                    result['error'] = 'Entry not found'
+                    continue
+                delete_ids.append((result, entry_id))
+                days.append(existing[entry_id][1])
+            
+            if atomic and any('error' in result for result in results):
+                return results, []
+            
+            ticket_keys = {name: self._ticket_key(cursor, user_id, name)
+                           for name in {item[1] for item in create_rows}}
+            insert_rows = []
+            for result, ticket_name, (start_time, start_ts), (end_time, end_ts), memo in create_rows:
+                result['id'] = str(uuid.uuid4())
+                insert_rows.append((result['id'], user_id, ticket_keys[ticket_name], start_time, end_time,
+                                    start_ts, end_ts, memo))
+                days.append(start_time)
+            
+            cursor.executemany('''
+                INSERT INTO time_entries (id, user_id, ticket_key, start_time, end_time, start_ts, end_ts, memo)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', insert_rows)
+            cursor.executemany('''
+                UPDATE time_entries
+                SET start_time = ?, end_time = ?, start_ts = ?, end_ts = ?, memo = ?
+                WHERE id = ? AND user_id = ?
+            ''', [params for _, params in update_rows])
+            cursor.executemany('DELETE FROM current_entries WHERE user_id = ? AND entry_id = ?',
+                               [(user_id, entry_id) for _, entry_id in delete_ids])
+            cursor.executemany('DELETE FROM time_entries WHERE id = ? AND user_id = ?',
+                               [(entry_id, user_id) for _, entry_id in delete_ids])
+            
+            for result, params in update_rows:
+                result['id'] = params[5]
+            for result, entry_id in delete_ids:
+                result['id'] = entry_id
+            for result in results:
+                result['success'] = 'error' not in result
+            
+            if insert_rows or update_rows or delete_ids:
+                refresh_rollups(cursor, user_id, days)
+                self._data_changed(cursor, user_id, 'entries')
+                if update_rows or delete_ids:
+                    self._timer_changed(cursor, user_id)
+        
+        return results, days
+    
+    def open_import_job(self, source: str, fmt: str, checksum: str, user_id: Optional[int] = None,
+                        restart: bool = False):
+        """Resume the unfinished import of the same file, or start a new one.
+        
+        A job matches on the file's checksum and the target user
+        (None = users taken from the file). With ``restart`` an unfinished
+        job is abandoned and the file is read from the beginning; entries
+        that are already in the database are skipped as duplicates then.
+        """
+        now = int(time.time())
+        with self.db.connection(immediate=True) as conn:
+            cursor = conn.cursor()
             cursor.execute('''
-                UPDATE time_entries SET end_time = ? WHERE id = ? AND user_id = ?
-            ''', (end_time, entry_id, user_id))
+                SELECT id, user_id, source, format, checksum, status, position, inserted,
+                       duplicates, failed, seconds, error
+                FROM import_jobs
+                WHERE checksum = ? AND user_id IS ? AND status != 'done'
+                ORDER BY created_ts DESC LIMIT 1
+            ''', (checksum, user_id))
+            row = cursor.fetchone()
+            if row and not restart:
+                cursor.execute('''
+                    UPDATE import_jobs SET status = 'running', error = NULL, updated_ts = ? WHERE id = ?
+                ''', (now, row[0]))
+                return ImportJob(*row[:5], 'running', *row[6:11])
+            if row:
+                cursor.execute('''
+                    UPDATE import_jobs SET status = 'abandoned', updated_ts = ? WHERE id = ?
+                ''', (now, row[0]))
             
-            cursor.execute('DELETE FROM current_entries WHERE user_id = ?', (user_id,))
+            job = ImportJob(id=str(uuid.uuid4()), user_id=user_id, source=source, format=fmt, checksum=checksum)
+            cursor.execute('''
+                INSERT INTO import_jobs (id, user_id, source, format, checksum, created_ts, updated_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (job.id, user_id, source, fmt, checksum, now, now))
+        return job
+    
+    def get_import_job(self, job_id: str, user_id: Optional[int] = None):
+        """The import job ``job_id``, or None (also if it targets another user)."""
+        with self.db.connection() as conn:
+            row = conn.execute('''
+                SELECT id, user_id, source, format, checksum, status, position, inserted,
+                       duplicates, failed, seconds, error
+                FROM import_jobs WHERE id = ? AND user_id IS ?
+            ''', (job_id, user_id)).fetchone()
+        return ImportJob(*row) if row else None
+    
+    def import_entry_batch(self, job: ImportJob, rows, position: int, failed: int = 0, seconds: float = 0.0):
+        """Insert one batch of parsed import rows and advance the job, atomically.
         
-        conn.commit()
-        conn.close()
+        ``rows`` are (user_id, ticket_name, start_time, end_time, start_ts,
+        end_ts, memo, jira_ticket, matrix_ticket) tuples. Entries that already
+        exist with the same ticket, start and end - in the database or earlier
+        in the batch - are skipped. Tickets the user doesn't have yet (active
+        or archived) are created. ``position``, ``failed`` and ``seconds`` are
+        the job's new totals; since they are stored in the same transaction as
+        the entries, a resumed job never imports a row twice.
+        
+        Rollups and data versions are left to finish_import_job().
+        Returns (inserted, duplicates) of this batch.
+        """
+        with self.db.connection(immediate=True) as conn:
+            cursor = conn.cursor()
+            
+            ticket_keys = {}
+            for user_id, name, _, _, _, _, _, jira_ticket, matrix_ticket in rows:
+                if (user_id, name) in ticket_keys:
+                    continue
+                key = self._ticket_key(cursor, user_id, name)
+                ticket_keys[user_id, name] = key
+                cursor.execute('SELECT 1 FROM tickets WHERE user_id = ? AND ticket_key = ? LIMIT 1', (user_id, key))
+                if cursor.fetchone() is None:
+                    cursor.execute('''
+                        INSERT INTO tickets (id, user_id, name, color, jira_ticket, matrix_ticket, ticket_key)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (str(uuid.uuid4()), user_id, name, '#656d76', jira_ticket, matrix_ticket, key))
+            
+            # One indexed lookup per user for all start times of the batch
+            seen = set()
+            for user_id in {row[0] for row in rows}:
+                cursor.execute('''
+                    SELECT ticket_key, start_ts, end_ts FROM time_entries
+                    WHERE user_id = ? AND start_ts IN (SELECT value FROM json_each(?))
+                ''', (user_id, json.dumps(sorted({row[4] for row in rows if row[0] == user_id}))))
+                seen.update((user_id, *found) for found in cursor.fetchall())
+            
+            insert_rows = []
+            for user_id, name, start_time, end_time, start_ts, end_ts, memo, _, _ in rows:
+                key = (user_id, ticket_keys[user_id, name], start_ts, end_ts)
+                if key in seen:
+                    continue
+                seen.add(key)
+                insert_rows.append((str(uuid.uuid4()), user_id, key[1], start_time, end_time, start_ts, end_ts, memo))
+            
+            cursor.executemany('''
+                INSERT INTO time_entries (id, user_id, ticket_key, start_time, end_time, start_ts, end_ts, memo)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', insert_rows)
+            
+            inserted, duplicates = len(insert_rows), len(rows) - len(insert_rows)
+            cursor.execute('''
+                UPDATE import_jobs
+                SET position = ?, inserted = inserted + ?, duplicates = duplicates + ?, failed = ?,
+                    seconds = ?, updated_ts = ?
+                WHERE id = ?
+            ''', (position, inserted, duplicates, failed, seconds, int(time.time()), job.id))
+        
+        job.position, job.failed, job.seconds = position, failed, seconds
+        job.inserted += inserted
+        job.duplicates += duplicates
+        return inserted, duplicates
+    
+    def finish_import_job(self, job: ImportJob, error: Optional[str] = None):
+        """Mark the job done (or failed) and bring rollups and versions up to date.
+        
+        Runs after a failure too, so the part that was imported shows up
+        correctly until the job is resumed. Rollups are rebuilt for the
+        target user, or for everybody when the users came from the file.
+        """
+        job.status, job.error = ('failed', error) if error else ('done', None)
+        with self.db.connection(immediate=True) as conn:
+            cursor = conn.cursor()
+            rebuild_rollups(cursor, job.user_id)
+            if job.user_id is None:
+                user_ids = [row[0] for row in cursor.execute('SELECT id FROM users').fetchall()]
+            else:
+                user_ids = [job.user_id]
+            for user_id in user_ids:
+                self._data_changed(cursor, user_id, 'tickets', 'entries')
+            cursor.execute('''
+                UPDATE import_jobs SET status = ?, error = ?, updated_ts = ? WHERE id = ?
+            ''', (job.status, error, int(time.time()), job.id))
+        self.optimize_database()
+    
+    def iter_export_rows(self, start: str, end: str, user_id: Optional[int] = None,
+                         batch_size: int = EXPORT_BATCH_SIZE):
+        """Yield finished entries between the dates ``start`` and ``end``
+        (inclusive) as tuples in EXPORT_COLUMNS order, for one user or all.
+        
+        Rows are fetched ``batch_size`` at a time from one cursor on a
+        dedicated snapshot connection, so memory stays constant however
+        many rows there are. Ticket metadata comes from the (preferably
+        active) ticket that uses the entry's key.
+        """
+        start_ts, end_ts = day_start_ts(start), day_start_ts(end, offset_days=1)
+        with self.db.reader() as conn:
+            cursor = conn.execute(f'''
+                SELECT u.username, e.id, substr(e.start_time, 1, 10), e.start_time, e.end_time,
+                       round((e.end_ts - e.start_ts) / 3600.0, 4), k.name,
+                       coalesce(t.jira_ticket, ''), coalesce(t.matrix_ticket, ''), e.memo
+                FROM time_entries e
+                JOIN users u ON u.id = e.user_id
+                JOIN ticket_keys k ON k.key = e.ticket_key
+                LEFT JOIN tickets t ON t.id = (
+                    SELECT id FROM tickets WHERE ticket_key = e.ticket_key ORDER BY archived LIMIT 1
+                )
+                WHERE e.start_ts >= ? AND e.start_ts < ? AND e.end_ts IS NOT NULL
+                      {'AND e.user_id = ?' if user_id is not None else ''}
+                ORDER BY e.user_id, e.start_ts, e.id
+            ''', (start_ts, end_ts) + ((user_id,) if user_id is not None else ()))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+    
+    def get_timer_state(self, user_id: int):
+        """Snapshot of the running timer as sent to the browser."""
+        entry = self.get_current_entry(user_id)
+        if not entry:
+            return {'running': False}
+        return {
+            'running': True,
+            'entry_id': entry.id,
+            'ticket_name': entry.ticket_name,
+            'start_time': entry.start_time,
+            'elapsed': (datetime.now() - datetime.fromisoformat(entry.start_time)).total_seconds()
+        }
+
+# ===== EXPORT =====
+
+EXPORT_COLUMNS = ('user', 'entry_id', 'date', 'start_time', 'end_time', 'duration_hours',
+                  'ticket', 'jira_ticket', 'matrix_ticket', 'memo')
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+def export_chunks(rows, fmt: str, rows_per_chunk: int = 500):
+    """Encode export rows as CSV (with header) or NDJSON, yielding text chunks.
+    
+    Only one chunk is buffered at a time, so this streams as well as ``rows``.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(EXPORT_COLUMNS)
+    
+    for count, row in enumerate(rows, 1):
+        if writer:
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False))
+            buffer.write('\n')
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+# ===== IMPORT =====
+#
+# Imports read the export columns (plus a few aliases), so an export of one
+# instance can be loaded into another. CSV and NDJSON are streamed; a JSON
+# array is loaded as a whole.
+
+IMPORT_FORMATS = ('csv', 'ndjson', 'json')
+IMPORT_ERROR_SAMPLES = 20
+
+def import_format(filename: str, fmt: Optional[str] = None):
+    """Explicit ``fmt`` or the one matching the file extension (None if unknown)."""
+    if fmt:
+        return fmt if fmt in IMPORT_FORMATS else None
+    ext = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    return {'jsonl': 'ndjson'}.get(ext, ext) if ext in IMPORT_FORMATS + ('jsonl',) else None
+
+def file_checksum(stream, chunk_size: int = 1 << 20):
+    """sha256 of a binary stream; the stream is rewound afterwards."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+def iter_import_records(stream, fmt: str):
+    """Yield the records of a text stream as dicts (invalid lines as None)."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'ndjson':
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield record if isinstance(record, dict) else None
+    else:
+        records = json.load(stream)
+        if not isinstance(records, list):
+            raise ValueError('JSON-Import erwartet ein Array von Objekten')
+        for record in records:
+            yield record if isinstance(record, dict) else None
+
+def _import_time(value):
+    """Normalized local ISO timestamp and its epoch seconds."""
+    moment = datetime.fromisoformat(str(value).strip())
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    moment = moment.replace(microsecond=0)
+    return moment.isoformat(), calendar.timegm(moment.timetuple())
+
+def parse_import_record(record):
+    """Validate one record; returns the row tuple for import_entry_batch()
+    without the leading user_id, or raises ValueError.
+
+    ``ticket`` (or ``ticket_name``) and ``start_time`` are required, plus
+    ``end_time`` or ``duration_hours``. ``memo``, ``jira_ticket`` and
+    ``matrix_ticket`` are optional.
+    """
+    if record is None:
+        raise ValueError('Unlesbare Zeile')
+    ticket_name = str(record.get('ticket') or record.get('ticket_name') or '').strip()
+    if not ticket_name:
+        raise ValueError('Ticket fehlt')
+    try:
+        start_time, start_ts = _import_time(record.get('start_time') or '')
+        if record.get('end_time'):
+            end_time, end_ts = _import_time(record['end_time'])
+        elif record.get('duration_hours') not in (None, ''):
+            end_moment = datetime.fromisoformat(start_time) + timedelta(hours=float(record['duration_hours']))
+            end_time, end_ts = _import_time(end_moment.isoformat())
+        else:
+            raise ValueError('Ende fehlt')
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Ungültige Zeit ({e})")
+    if end_ts < start_ts:
+        raise ValueError('Ende vor Start')
+    return (ticket_name, start_time, end_time, start_ts, end_ts, str(record.get('memo') or ''),
+            str(record.get('jira_ticket') or '').strip(), str(record.get('matrix_ticket') or '').strip())
+
+def run_import(job: ImportJob, records, batch_size: int = IMPORT_BATCH_SIZE, progress=None):
+    """Import ``records`` into ``job``, continuing at ``job.position``.
+    
+    Records are validated and written ``batch_size`` at a time, one
+    transaction per batch. Without a target user on the job, each record's
+    ``user`` column names the owner. ``progress(job, rows_per_second)`` is
+    called after every batch.
+    
+    Returns a report dict with this run's throughput and the first
+    IMPORT_ERROR_SAMPLES invalid records (by record number); the job
+    counters hold the totals. On an exception the job is marked failed
+    before it propagates.
+    """
+    started = time.monotonic()
+    base_seconds, resumed_at = job.seconds, job.position
+    errors = []
+    users = {}
+    
+    def user_for(record):
+        if job.user_id is not None:
+            return job.user_id
+        username = str(record.get('user') or '').strip()
+        if username not in users:
+            user = timesheet.get_user_by_username(username) if username else None
+            users[username] = user.id if user else None
+        if users[username] is None:
+            raise ValueError(f"Unbekannter Benutzer '{username}'")
+        return users[username]
+    
+    def rate():
+        elapsed = time.monotonic() - started
+        return (job.position - resumed_at) / elapsed if elapsed > 0 else 0.0
+    
+    try:
+        position, failed = job.position, job.failed
+        records = itertools.islice(records, job.position, None)
+        while True:
+            batch, rows = list(itertools.islice(records, batch_size)), []
+            if not batch:
+                break
+            for record in batch:
+                position += 1
+                try:
+                    row = parse_import_record(record)
+                    rows.append((user_for(record),) + row)
+                except ValueError as e:
+                    failed += 1
+                    if len(errors) < IMPORT_ERROR_SAMPLES:
+                        errors.append({'record': position, 'error': str(e)})
+            timesheet.import_entry_batch(job, rows, position, failed,
+                                         base_seconds + time.monotonic() - started)
+            if progress:
+                progress(job, rate())
+    except Exception as e:
+        timesheet.finish_import_job(job, error=str(e) or e.__class__.__name__)
+        raise
+    
+    timesheet.finish_import_job(job)
+    return {
+        'job_id': job.id,
+        'resumed_at': resumed_at,
+        'records': job.position - resumed_at,
+        'seconds': round(time.monotonic() - started, 3),
+        'rows_per_second': round(rate(), 1),
+        'errors': errors,
+    }
+
+class ImportRunner:
+    """Runs uploaded imports one at a time on a background thread.
     
-    def get_current_entry_id(self, user_id: int):
-        """Get the current running entry ID for a user."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        cursor.execute('SELECT entry_id FROM current_entries WHERE user_id = ?', (user_id,))
-        row = cursor.fetchone()
-        conn.close()
-        return row[0] if row else None
+    The upload is spooled to a file first, so the request returns right
+    away and the client polls the job. Progress is kept in import_jobs as
+    for the CLI: if the process goes away, uploading the same file again
+    resumes the job. The reports of the last ``max_reports`` runs (error
+    samples, throughput) are kept in this process.
+    """
     
-    def update_entry(self, user_id: int, entry_id: str, start_time: str, end_time: str, memo: str):
-        """Update a time entry (only if it belongs to the user)."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE time_entries 
-            SET start_time = ?, end_time = ?, memo = ?
-            WHERE id = ? AND user_id = ?
-        ''', (start_time, end_time if end_time else None, memo, entry_id, user_id))
-        conn.commit()
-        conn.close()
-        return cursor.rowcount > 0
+    def __init__(self, max_reports: int = 100):
+        self.max_reports = max_reports
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='import')
+        self._lock = threading.Lock()
+        self._active = set()
+        self._reports = OrderedDict()
     
-    def delete_entry(self, user_id: int, entry_id: str):
-        """Delete a time entry (only if it belongs to the user)."""
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
+    def submit(self, job: ImportJob, path: str):
+        """Queue ``job`` to read ``path``, which is deleted afterwards.
         
-        cursor.execute('DELETE FROM current_entries WHERE user_id = ? AND entry_id = ?', (user_id, entry_id))
-        cursor.execute('DELETE FROM time_entries WHERE id = ? AND user_id = ?', (entry_id, user_id))
-        
-        conn.commit()
-        conn.close()
-        return cursor.rowcount > 0
+        Returns the future, or None if the job is already queued here.
+        """
+        with self._lock:
+            if job.id in self._active:
+                os.remove(path)
+                return None
+            self._active.add(job.id)
+        return self._executor.submit(self._run, job, path)
     
-    def get_current_duration(self, user_id: int):
-        """Get the duration of the current running entry for a user."""
-        entry_id = self.get_current_entry_id(user_id)
-        if not entry_id:
-            return 0
-        
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        cursor.execute('SELECT start_time FROM time_entries WHERE id = ? AND end_time IS NULL', (entry_id,))
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            start = datetime.fromisoformat(row[0])
-            return (datetime.now() - start).total_seconds()
-        return 0
+    def _run(self, job: ImportJob, path: str):
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as stream:
+                report = run_import(job, iter_import_records(stream, job.format))
+        except Exception as e:
+            if job.status == 'running':
+                timesheet.finish_import_job(job, error=str(e))
+            report = {'job_id': job.id, 'error': str(e)}
+            print(f"⚠️  Import {job.id} fehlgeschlagen: {e}")
+        finally:
+            os.remove(path)
+            with self._lock:
+                self._active.discard(job.id)
+        with self._lock:
+            self._reports[job.id] = report
+            while len(self._reports) > self.max_reports:
+                self._reports.popitem(last=False)
+        return report
+    
+    def report(self, job_id: str):
+        with self._lock:
+            return self._reports.get(job_id)
+
+imports = ImportRunner()
+
+# ===== MAINTENANCE =====
+
+@dataclass
+class MaintenanceJob:
+    name: str
+    interval: float
+    func: object
+    next_run: float = 0.0
+    runs: int = 0
+    failures: int = 0
+    last_run: Optional[str] = None
+    last_duration: Optional[float] = None
+    last_result: object = None
+    last_error: Optional[str] = None
+
+class MaintenanceScheduler:
+    """Runs periodic database jobs on a background thread.
+    
+    With several worker processes only the one holding the lock file runs
+    jobs; the others keep trying to take the lock, so another worker takes
+    over when that process exits. Each job records run metrics in stats().
+    """
+    
+    def __init__(self, poll_interval: float = 5.0):
+        self.poll_interval = poll_interval
+        self.jobs = {}
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_path = None
+        self._lock_file = None
+    
+    def add_job(self, name: str, interval: float, func):
+        """Register ``func`` to run every ``interval`` seconds (0 disables it)."""
+        if interval > 0:
+            self.jobs[name] = MaintenanceJob(name=name, interval=interval, func=func)
+    
+    def start(self, lock_path: Optional[str] = None, delay: float = MAINTENANCE_STARTUP_DELAY):
+        """Start the scheduler thread; the first runs happen after ``delay`` seconds."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._lock_path = lock_path
+        first_run = time.monotonic() + delay
+        for job in self.jobs.values():
+            job.next_run = first_run
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='maintenance', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+    
+    def _is_leader(self):
+        """Take (or keep) the lock file that elects one process to run jobs."""
+        if fcntl is None or self._lock_path is None or self._lock_file is not None:
+            return True
+        lock_file = open(self._lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+    
+    def _loop(self):
+        while not self._stop.wait(self.poll_interval):
+            if self._is_leader():
+                self.run_pending()
+    
+    def run_pending(self):
+        """Run every job whose interval has elapsed."""
+        now = time.monotonic()
+        for job in list(self.jobs.values()):
+            if job.next_run <= now:
+                self.run_job(job.name)
+    
+    def run_job(self, name: str):
+        """Run one job now and record its metrics; errors are logged, not raised."""
+        job = self.jobs[name]
+        with self._run_lock:
+            started = time.monotonic()
+            job.last_run = datetime.now().isoformat()
+            try:
+                job.last_result = job.func()
+                job.last_error = None
+            except Exception as e:
+                job.failures += 1
+                job.last_error = str(e)
+                print(f"⚠️  Wartung '{name}' fehlgeschlagen: {e}")
+            job.runs += 1
+            job.last_duration = time.monotonic() - started
+            job.next_run = time.monotonic() + job.interval
+        return job
+    
+    def stats(self):
+        """Run metrics per job."""
+        return {
+            job.name: {
+                'interval': job.interval,
+                'runs': job.runs,
+                'failures': job.failures,
+                'last_run': job.last_run,
+                'last_duration': job.last_duration,
+                'last_result': job.last_result,
+                'last_error': job.last_error,
+            }
+            for job in self.jobs.values()
+        }
 
+# Configured by create_app()
 timesheet = TimesheetManager()
 
+maintenance = MaintenanceScheduler()
+maintenance.add_job('archive-cleanup', MAINTENANCE_ARCHIVE_CLEANUP_INTERVAL, timesheet.cleanup_all_archived_tickets)
+maintenance.add_job('rollup-compaction', MAINTENANCE_ROLLUP_COMPACTION_INTERVAL, timesheet.compact_rollups)
+maintenance.add_job('optimize', MAINTENANCE_OPTIMIZE_INTERVAL, timesheet.optimize_database)
+maintenance.add_job('wal-checkpoint', MAINTENANCE_WAL_CHECKPOINT_INTERVAL, timesheet.checkpoint_wal)
+
+bp = Blueprint('main', __name__)
+
 def get_current_user_id():
     """Get the current user ID from session."""
     return session.get('user_id')
@@ -558,34 +2845,120 @@ def get_current_user_id():
 def require_login():
     """Redirect to login if no user is logged in."""
     if not get_current_user_id():
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     return None
 
+def is_admin(user: Optional[User]):
+    """True for users listed in ADMIN_USERS."""
+    return user is not None and user.username in current_app.config['ADMIN_USERS']
+
+def conditional(*groups: str, page: bool = False):
+    """Answer GETs with 304 Not Modified while the user's ``groups`` data is unchanged.
+    
+    The ETag covers the user's data versions, the URL, today's date and the
+    deployed code/templates, so the 304 path costs one primary-key lookup
+    and never runs the view. ``page=True`` marks full pages, which show
+    pending flash messages (base.html): while one is pending they are
+    rendered without validators, so the message is neither hidden behind
+    a 304 nor replayed from the browser cache later.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = get_current_user_id()
+            if user_id is None or request.method != 'GET' or (page and session.get('_flashes')):
+                return view(*args, **kwargs)
+            
+            versions = timesheet.get_data_versions(user_id)
+            etag = hashlib.sha1('|'.join([
+                current_app.config['ETAG_SALT'], str(user_id), request.full_path,
+                datetime.now().strftime('%Y-%m-%d'),
+                *(str(getattr(versions, group)) for group in groups)
+            ]).encode()).hexdigest()
+            # No Last-Modified: a date can't express the deploy or the day
+            # change the ETag covers, so If-Modified-Since would serve stale pages
+            not_modified = request.if_none_match.contains_weak(etag)
+            response = Response(status=304) if not_modified else make_response(view(*args, **kwargs))
+            
+            if response.status_code in (200, 304):
+                response.set_etag(etag)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            response.vary.add('Cookie')
+            return response
+        return wrapper
+    return decorator
+
 # ===== AUTHENTICATION ROUTES =====
 
-@app.route('/login', methods=['GET', 'POST'])
+login_limiter = LoginRateLimiter()
+
+class LoginRefused(Exception):
+    """A password check turned away before (or instead of) hashing."""
+    
+    def __init__(self, message: str, status: int, retry_after: int):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+def check_login(username: str, password: str):
+    """``timesheet.authenticate_user()`` behind the login rate limits.
+    
+    Returns the user or None; raises LoginRefused when the client is over
+    its limit or the password pool is saturated.
+    """
+    retry_after = login_limiter.attempt(request.remote_addr or '', username)
+    if retry_after:
+        minutes = (retry_after + 59) // 60
+        raise LoginRefused(f'Zu viele Anmeldeversuche. Bitte in {minutes} Minute(n) erneut versuchen.',
+                           429, retry_after)
+    user = hash_or_refuse(timesheet.authenticate_user, username, password)
+    if user:
+        login_limiter.succeeded(username)
+    else:
+        login_limiter.failed(username)
+    return user
+
+def hash_or_refuse(function, *args):
+    """Call a manager method that hashes a password, mapping PasswordHashBusy to LoginRefused."""
+    try:
+        return function(*args)
+    except PasswordHashBusy:
+        raise LoginRefused('Der Server ist gerade ausgelastet. Bitte in ein paar Sekunden erneut versuchen.',
+                           503, 5) from None
+
+def refused_response(refused: LoginRefused, template: str, **context):
+    flash(str(refused), 'error')
+    response = make_response(render_template(template, **context), refused.status)
+    response.headers['Retry-After'] = str(refused.retry_after)
+    return response
+
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form.get('username', '').strip()
         password = request.form.get('password', '')
         
-        user = timesheet.authenticate_user(username, password)
+        try:
+            user = check_login(username, password)
+        except LoginRefused as refused:
+            return refused_response(refused, 'login.html', allow_registration=ALLOW_REGISTRATION)
         if user:
             session['user_id'] = user.id
             flash(f'Willkommen zurück, {user.username}!', 'success')
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
         else:
             flash('Ungültiger Benutzername oder Passwort', 'error')
     
     # Pass registration status to template
     return render_template('login.html', allow_registration=ALLOW_REGISTRATION)
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     # Check if registration is allowed
     if not ALLOW_REGISTRATION:
         flash('Registrierung ist derzeit deaktiviert. Bitte kontaktieren Sie den Administrator.', 'error')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     if request.method == 'POST':
         username = request.form.get('username', '').strip()
@@ -599,23 +2972,26 @@ def register():
         elif password != password_confirm:
             flash('Passwörter stimmen nicht überein', 'error')
         else:
-            user_id = timesheet.add_user(username, password)
+            try:
+                user_id = hash_or_refuse(timesheet.add_user, username, password)
+            except LoginRefused as refused:
+                return refused_response(refused, 'register.html')
             if user_id:
                 session['user_id'] = user_id
                 flash(f'Willkommen, {username}! Ihr Account wurde erstellt.', 'success')
-                return redirect(url_for('index'))
+                return redirect(url_for('main.index'))
             else:
                 flash('Benutzername existiert bereits', 'error')
     
     return render_template('register.html')
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     session.pop('user_id', None)
     flash('Sie wurden abgemeldet', 'info')
-    return redirect(url_for('login'))
+    return redirect(url_for('main.login'))
 
-@app.route('/change_password', methods=['GET', 'POST'])
+@bp.route('/change_password', methods=['GET', 'POST'])
 def change_password():
     redirect_response = require_login()
     if redirect_response:
@@ -629,17 +3005,22 @@ def change_password():
         new_password = request.form.get('new_password', '')
         new_password_confirm = request.form.get('new_password_confirm', '')
         
-        # Verify current password
-        if not timesheet.authenticate_user(current_user.username, current_password):
-            flash('Aktuelles Passwort ist falsch', 'error')
-        elif len(new_password) < 6:
+        # Cheap checks first: each password check costs a hash
+        if len(new_password) < 6:
             flash('Neues Passwort muss mindestens 6 Zeichen lang sein', 'error')
         elif new_password != new_password_confirm:
             flash('Neue Passwörter stimmen nicht überein', 'error')
         else:
-            if timesheet.change_password(user_id, new_password):
+            try:
+                verified = check_login(current_user.username, current_password)
+                changed = verified and hash_or_refuse(timesheet.change_password, user_id, new_password)
+            except LoginRefused as refused:
+                return refused_response(refused, 'change_password.html', current_user=current_user)
+            if not verified:
+                flash('Aktuelles Passwort ist falsch', 'error')
+            elif changed:
                 flash('Passwort erfolgreich geändert', 'success')
-                return redirect(url_for('index'))
+                return redirect(url_for('main.index'))
             else:
                 flash('Fehler beim Ändern des Passworts', 'error')
     
@@ -647,7 +3028,8 @@ def change_password():
 
 # ===== APPLICATION ROUTES =====
 
-@app.route('/')
+@bp.route('/')
+@conditional('tickets', 'entries', page=True)
 def index():
     redirect_response = require_login()
     if redirect_response:
@@ -656,27 +3038,77 @@ def index():
     user_id = get_current_user_id()
     current_user = timesheet.get_user_by_id(user_id)
     
-    entries = timesheet.get_entries(user_id)
-    entries_by_date = defaultdict(list)
-    for entry in entries:
-        entry_date = entry.start_time[:10]
-        entries_by_date[entry_date].append(entry)
-    
-    today = datetime.now().strftime('%Y-%m-%d')
+    now = datetime.now()
+    today = now.strftime('%Y-%m-%d')
+    window_start = (now - timedelta(days=INDEX_WINDOW_DAYS - 1)).strftime('%Y-%m-%d')
     
-    # Cleanup old archived tickets automatically
-    timesheet.cleanup_old_archived_tickets(user_id)
+    # Headers for the recent window; only today's rows are rendered up front,
+    # other days are fetched when expanded and older days on demand
+    day_totals = timesheet.get_day_totals(user_id, window_start, today)
+    today_entries = timesheet.get_entries(user_id, start=today, end=today)
+    has_older_entries = bool(timesheet.get_entry_dates(user_id, before=window_start, limit=1))
+    current_entry = timesheet.get_current_entry(user_id)
     
     return render_template('timesheet.html', 
                          current_user=current_user,
                          tickets=timesheet.get_tickets(user_id),
                          archived_tickets=timesheet.get_archived_tickets(user_id),
-                         entries=entries,
-                         entries_by_date=dict(entries_by_date),
+                         day_totals=day_totals,
+                         entries_by_date=group_entries_by_date(today_entries),
                          today=today,
-                         current_entry_id=timesheet.get_current_entry_id(user_id))
+                         older_before=window_start if has_older_entries else None,
+                         current_entry_id=current_entry.id if current_entry else None,
+                         current_ticket_name=current_entry.ticket_name if current_entry else None)
+
+@bp.route('/entries/older')
+@conditional('entries')
+def older_entries():
+    """HTML fragment with the headers of the next INDEX_WINDOW_DAYS days that have entries."""
+    redirect_response = require_login()
+    if redirect_response:
+        return '', 401
+    
+    user_id = get_current_user_id()
+    before = request.args.get('before', '')
+    try:
+        dates = timesheet.get_entry_dates(user_id, before=before, limit=INDEX_WINDOW_DAYS)
+    except ValueError:
+        return '', 400
+    
+    day_totals = timesheet.get_day_totals(user_id, dates[-1], dates[0]) if dates else {}
+    has_older_entries = bool(dates) and bool(timesheet.get_entry_dates(user_id, before=dates[-1], limit=1))
+    
+    return render_template('components/_date_sections.html',
+                         day_totals=day_totals,
+                         entries_by_date={},
+                         today=datetime.now().strftime('%Y-%m-%d'),
+                         older_before=dates[-1] if has_older_entries else None)
+
+@bp.route('/entries/day/<date>')
+@conditional('entries')
+def day_entries(date):
+    """Entries of one day as table rows, or as JSON with ?format=json."""
+    redirect_response = require_login()
+    if redirect_response:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    user_id = get_current_user_id()
+    try:
+        entries = timesheet.get_entries(user_id, start=date, end=date)
+    except ValueError:
+        return jsonify({'error': 'Invalid date'}), 400
+    
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'date': date,
+            'entries': [entry_to_dict(entry) for entry in entries],
+            'total_hours': round(timesheet.get_day_totals(user_id, date, date).get(date, 0), 2)
+        })
+    
+    return render_template('components/_entry_rows.html', day_entries=entries)
 
-@app.route('/summary')
+@bp.route('/summary')
+@conditional('entries', page=True)
 def summary():
     redirect_response = require_login()
     if redirect_response:
@@ -722,32 +3154,29 @@ def summary():
         start_date = request.args.get('start_date', today.strftime('%Y-%m-%d'))
         end_date = request.args.get('end_date', today.strftime('%Y-%m-%d'))
     
+    # Fall back to today for malformed custom dates
+    try:
+        day_start(start_date)
+        day_start(end_date)
+    except ValueError:
+        start_date = end_date = today.strftime('%Y-%m-%d')
+    
     summary_data, total_time = timesheet.get_time_summary(user_id, start_date, end_date)
     
     # Get detailed entries for the period
-    entries = timesheet.get_entries(user_id)
     period_entries = [
-        entry for entry in entries
-        if entry.end_time and start_date <= entry.start_time[:10] <= end_date
+        entry for entry in timesheet.get_entries(user_id, start=start_date, end=end_date)
+        if entry.end_time
     ]
     
     # Group entries by date
-    entries_by_date = defaultdict(list)
-    for entry in period_entries:
-        entry_date = entry.start_time[:10]
-        entries_by_date[entry_date].append(entry)
-    
-    # Calculate daily totals
-    daily_totals = {}
-    for date, date_entries in entries_by_date.items():
-        daily_total = 0
-        for entry in date_entries:
-            if entry.end_time:
-                start = datetime.fromisoformat(entry.start_time)
-                end = datetime.fromisoformat(entry.end_time)
-                hours = (end - start).total_seconds() / 3600
-                daily_total += hours
-        daily_totals[date] = round(daily_total, 2)
+    entries_by_date = group_entries_by_date(period_entries)
+    
+    # Daily totals come straight from the rollups
+    daily_totals = {
+        date: round(hours, 2)
+        for date, hours in timesheet.get_day_totals(user_id, start_date, end_date).items()
+    }
     
     return render_template('summary.html', 
                          current_user=current_user,
@@ -756,10 +3185,10 @@ def summary():
                          start_date=start_date,
                          end_date=end_date,
                          period=period,
-                         entries_by_date=dict(entries_by_date),
+                         entries_by_date=entries_by_date,
                          daily_totals=daily_totals)
 
-@app.route('/add_ticket', methods=['POST'])
+@bp.route('/add_ticket', methods=['POST'])
 def add_ticket():
     redirect_response = require_login()
     if redirect_response:
@@ -774,9 +3203,9 @@ def add_ticket():
     if name:
         timesheet.add_ticket(user_id, name, color, jira_ticket, matrix_ticket)
     
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/update_ticket', methods=['POST'])
+@bp.route('/update_ticket', methods=['POST'])
 def update_ticket():
     redirect_response = require_login()
     if redirect_response:
@@ -792,9 +3221,10 @@ def update_ticket():
     if ticket_id and name:
         timesheet.update_ticket(user_id, ticket_id, name, color, jira_ticket, matrix_ticket)
     
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/get_ticket/<ticket_id>')
+@bp.route('/get_ticket/<ticket_id>')
+@conditional('tickets')
 def get_ticket(ticket_id):
     redirect_response = require_login()
     if redirect_response:
@@ -814,7 +3244,7 @@ def get_ticket(ticket_id):
     else:
         return jsonify({'error': 'Ticket not found'}), 404
 
-@app.route('/save_ticket_order', methods=['POST'])
+@bp.route('/save_ticket_order', methods=['POST'])
 def save_ticket_order():
     redirect_response = require_login()
     if redirect_response:
@@ -835,10 +3265,10 @@ def save_ticket_order():
         timesheet.save_ticket_order(user_id, filtered_order)
         return jsonify({'success': True})
     except Exception as e:
-        app.logger.error(f"Error saving ticket order: {e}")
+        current_app.logger.error(f"Error saving ticket order: {e}")
         return jsonify({'success': False, 'error': 'Database error'})
 
-@app.route('/start_timer/<ticket_name>')
+@bp.route('/start_timer/<ticket_name>')
 def start_timer(ticket_name):
     redirect_response = require_login()
     if redirect_response:
@@ -846,9 +3276,9 @@ def start_timer(ticket_name):
     
     user_id = get_current_user_id()
     timesheet.start_time_entry(user_id, ticket_name)
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/stop_timer')
+@bp.route('/stop_timer')
 def stop_timer():
     redirect_response = require_login()
     if redirect_response:
@@ -856,9 +3286,9 @@ def stop_timer():
     
     user_id = get_current_user_id()
     timesheet.stop_current_entry(user_id)
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/update_entry', methods=['POST'])
+@bp.route('/update_entry', methods=['POST'])
 def update_entry():
     redirect_response = require_login()
     if redirect_response:
@@ -870,10 +3300,16 @@ def update_entry():
     end_time = request.form.get('end_time')
     memo = request.form.get('memo', '')
     
-    timesheet.update_entry(user_id, entry_id, start_time, end_time, memo)
-    return redirect(url_for('index'))
+    try:
+        if timesheet.update_entry(user_id, entry_id, start_time, end_time, memo) is None:
+            flash('Eintrag nicht gefunden', 'error')
+    except EntrySpanError:
+        flash('Die Endzeit liegt vor der Startzeit - der Eintrag wurde nicht geändert', 'error')
+    except (TypeError, ValueError):
+        flash('Ungültige Start- oder Endzeit - der Eintrag wurde nicht geändert', 'error')
+    return redirect(url_for('main.index'))
 
-@app.route('/archive_ticket/<ticket_id>')
+@bp.route('/archive_ticket/<ticket_id>')
 def archive_ticket(ticket_id):
     redirect_response = require_login()
     if redirect_response:
@@ -881,9 +3317,9 @@ def archive_ticket(ticket_id):
     
     user_id = get_current_user_id()
     timesheet.archive_ticket(user_id, ticket_id)
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/restore_ticket/<ticket_id>')
+@bp.route('/restore_ticket/<ticket_id>')
 def restore_ticket(ticket_id):
     redirect_response = require_login()
     if redirect_response:
@@ -891,9 +3327,9 @@ def restore_ticket(ticket_id):
     
     user_id = get_current_user_id()
     timesheet.restore_ticket(user_id, ticket_id)
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/delete_ticket/<ticket_id>')
+@bp.route('/delete_ticket/<ticket_id>')
 def delete_ticket(ticket_id):
     redirect_response = require_login()
     if redirect_response:
@@ -901,9 +3337,9 @@ def delete_ticket(ticket_id):
     
     user_id = get_current_user_id()
     timesheet.delete_ticket(user_id, ticket_id)
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/delete_entry/<entry_id>')
+@bp.route('/delete_entry/<entry_id>')
 def delete_entry(entry_id):
     redirect_response = require_login()
     if redirect_response:
@@ -911,9 +3347,9 @@ def delete_entry(entry_id):
     
     user_id = get_current_user_id()
     timesheet.delete_entry(user_id, entry_id)
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/current_duration')
+@bp.route('/current_duration')
 def current_duration():
     redirect_response = require_login()
     if redirect_response:
@@ -921,24 +3357,834 @@ def current_duration():
     
     user_id = get_current_user_id()
     duration = timesheet.get_current_duration(user_id)
-    return jsonify({'duration': duration})
+    response = jsonify({'duration': duration})
+    # Changes with the clock, not with the data - never revalidate
+    response.cache_control.no_store = True
+    return response
 
-if __name__ == '__main__':
-    os.makedirs('templates', exist_ok=True)
+@bp.route('/events')
+def timer_events():
+    """Server-sent events: the running timer on connect and after every change.
+    
+    The browser ticks locally from ``elapsed``; the stream only carries
+    start/stop/edit changes plus a comment line per heartbeat.
+    """
+    redirect_response = require_login()
+    if redirect_response:
+        return '', 401
+    
+    user_id = get_current_user_id()
+    events = timesheet.timer_events
+    if not events.open_stream():
+        # EventSource gives up on a non-200 answer; timer.js then polls /current_duration
+        response = Response('Too many open event streams\n', status=503, mimetype='text/plain')
+        response.headers['Retry-After'] = str(int(SSE_HEARTBEAT))
+        return response
+    
+    def stream():
+        channel = events.subscribe(user_id)
+        try:
+            started = time.monotonic()
+            last_key = None
+            yield "retry: 3000\n\n"
+            while True:
+                state = timesheet.get_timer_state(user_id)
+                key = (state.get('entry_id'), state.get('start_time'))
+                if key != last_key:
+                    last_key = key
+                    yield f"event: timer\ndata: {json.dumps(state)}\n\n"
+                else:
+                    yield ": heartbeat\n\n"
+                
+                if SSE_MAX_LIFETIME and time.monotonic() - started > SSE_MAX_LIFETIME:
+                    # Let EventSource reconnect so long-lived streams get rebalanced
+                    return
+                try:
+                    channel.get(timeout=SSE_HEARTBEAT)
+                except queue.Empty:
+                    pass
+        finally:
+            events.unsubscribe(user_id, channel)
+    
+    response = Response(stream(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Runs when the server closes the response, even if the stream never started
+    response.call_on_close(events.close_stream)
+    return response
+
+# ===== JSON API =====
+
+def entry_to_dict(entry: TimeEntry):
+    return {
+        'id': entry.id,
+        'ticket_name': entry.ticket_name,
+        'start_time': entry.start_time,
+        'end_time': entry.end_time,
+        'memo': entry.memo,
+        'duration_hours': round(entry.duration, 4) if entry.duration is not None else None
+    }
+
+def ticket_to_dict(ticket: Ticket):
+    return {
+        'id': ticket.id,
+        'name': ticket.name,
+        'color': ticket.color,
+        'jira_ticket': ticket.jira_ticket,
+        'matrix_ticket': ticket.matrix_ticket
+    }
+
+def mutation_result(user_id, entries=(), removed_entries=(), tickets=(), archived_tickets=(),
+                    removed_tickets=(), dates=()):
+    """Response body of the JSON mutation endpoints.
+    
+    Carries only what changed: entries and tickets with their rendered
+    fragment (``html``), the totals of every touched day and the timer state,
+    so the page can patch itself instead of reloading.
+    """
+    timer = timesheet.get_timer_state(user_id)
+    current_ticket_name = timer.get('ticket_name')
+    
+    dates = {start_time[:10] for start_time in dates if start_time}
+    dates.update(entry.start_time[:10] for entry in entries)
+    day_totals = {}
+    if dates:
+        totals = timesheet.get_day_totals(user_id, min(dates), max(dates))
+        for date in sorted(dates):
+            hours = totals.get(date, 0)
+            day_totals[date] = {'hours': round(hours, 4), 'label': format_hours(hours)}
+    
+    return {
+        'success': True,
+        'entries': [dict(entry_to_dict(entry), date=entry.start_time[:10],
+                         html=render_template('components/_entry_rows.html', day_entries=[entry]))
+                    for entry in entries],
+        'removed_entries': list(removed_entries),
+        'tickets': [dict(ticket_to_dict(ticket), archived=False,
+                         html=render_template('components/_ticket_button.html', ticket=ticket,
+                                              current_ticket_name=current_ticket_name))
+                    for ticket in tickets] +
+                   [dict(ticket_to_dict(ticket), archived=True,
+                         html=render_template('components/_archived_ticket.html', ticket=ticket))
+                    for ticket in archived_tickets],
+        'removed_tickets': list(removed_tickets),
+        'day_totals': day_totals,
+        'timer': timer
+    }
+
+def ticket_fields(data):
+    """Validated ticket fields from a JSON body, or None if the name is missing."""
+    name = data.get('name')
+    if not isinstance(name, str) or not name.strip():
+        return None
+    return {
+        'name': name.strip(),
+        'color': str(data.get('color') or '#656d76'),
+        'jira_ticket': str(data.get('jira_ticket') or '').strip(),
+        'matrix_ticket': str(data.get('matrix_ticket') or '').strip()
+    }
+
+@bp.route('/api/timer/switch', methods=['POST'])
+def api_switch_timer():
+    """Stop the running timer and start ``ticket_name`` (or just stop if null)."""
+    redirect_response = require_login()
+    if redirect_response:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+    
+    user_id = get_current_user_id()
+    data = request.get_json(silent=True)
+    if data is None or 'ticket_name' not in data:
+        return jsonify({'success': False, 'error': 'Invalid data'}), 400
+    
+    ticket_name = data['ticket_name']
+    if ticket_name is not None and (not isinstance(ticket_name, str) or not ticket_name.strip()):
+        return jsonify({'success': False, 'error': 'Invalid ticket name'}), 400
+    
+    stopped, started = timesheet.switch_timer(user_id, ticket_name.strip() if ticket_name else None)
+    result = mutation_result(user_id, entries=[entry for entry in (stopped, started) if entry])
+    result['stopped'] = entry_to_dict(stopped) if stopped else None
+    result['started'] = entry_to_dict(started) if started else None
+    return jsonify(result)
+
+@bp.route('/api/export')
+def api_export():
+    """Stream finished entries with ticket metadata as CSV or NDJSON.
+    
+    ``start``/``end`` default to the current month and the export covers
+    the caller's own entries. ``user=<name>`` selects another user and
+    ``all=1`` everybody; both are reserved for ADMIN_USERS.
+    """
+    redirect_response = require_login()
+    if redirect_response:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    current_user = timesheet.get_user_by_id(get_current_user_id())
+    today = datetime.now()
+    fmt = request.args.get('format', 'csv')
+    start = request.args.get('start') or today.replace(day=1).strftime('%Y-%m-%d')
+    end = request.args.get('end') or today.strftime('%Y-%m-%d')
+    username = request.args.get('user')
+    export_all = request.args.get('all') == '1'
+    
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Invalid format'}), 400
+    try:
+        day_start(start)
+        day_start(end)
+    except ValueError:
+        return jsonify({'error': 'Invalid date'}), 400
+    
+    if export_all or (username and username != current_user.username):
+        if not is_admin(current_user):
+            return jsonify({'error': 'Forbidden'}), 403
+    if export_all:
+        user_id, label = None, 'alle'
+    elif username and username != current_user.username:
+        user = timesheet.get_user_by_username(username)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        user_id, label = user.id, user.username
+    else:
+        user_id, label = current_user.id, current_user.username
+    
+    rows = timesheet.iter_export_rows(start, end, user_id=user_id)
+    response = Response(export_chunks(rows, fmt), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="zeiterfassung_{label}_{start}_{end}.{fmt}"'
+    response.cache_control.no_store = True
+    return response
+
+@bp.route('/api/import', methods=['POST'])
+def api_import():
+    """Start importing an uploaded CSV/NDJSON/JSON file into the current user's entries.
+    
+    Multipart field ``file``; ``format`` overrides the file extension. The
+    ``user`` column is ignored. The import runs in the background: the 202
+    answer carries the job, GET /api/import/<id> reports its progress.
+    Uploading the same file again after a failure resumes the import where
+    it stopped.
+    """
+    redirect_response = require_login()
+    if redirect_response:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+    
+    try:
+        upload = request.files.get('file')
+    except RequestEntityTooLarge:
+        return jsonify({'success': False, 'error': f'File larger than {IMPORT_MAX_UPLOAD_MB} MB'}), 413
+    if upload is None or not upload.filename:
+        return jsonify({'success': False, 'error': 'No file'}), 400
+    fmt = import_format(upload.filename, request.form.get('format'))
+    if fmt is None:
+        return jsonify({'success': False, 'error': 'Invalid format'}), 400
+    
+    user_id = get_current_user_id()
+    checksum = file_checksum(upload.stream)
+    os.makedirs(current_app.config['IMPORT_DIR'], exist_ok=True)
+    path = os.path.join(current_app.config['IMPORT_DIR'], f'{uuid.uuid4()}.{fmt}')
+    upload.save(path)
+    job = timesheet.open_import_job(upload.filename, fmt, checksum, user_id=user_id)
+    imports.submit(job, path)
+    return jsonify({'success': True, 'job': asdict(job),
+                    'status_url': url_for('main.api_import_status', job_id=job.id)}), 202
+
+@bp.route('/api/import/<job_id>')
+def api_import_status(job_id):
+    """Progress of an import job of the current user, plus the report once it ran here."""
+    redirect_response = require_login()
+    if redirect_response:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+    
+    job = timesheet.get_import_job(job_id, user_id=get_current_user_id())
+    if job is None:
+        return jsonify({'success': False, 'error': 'Import not found'}), 404
+    return jsonify({'success': True, 'job': asdict(job), 'report': imports.report(job_id)})
+
+@bp.route('/api/entries/batch', methods=['POST'])
+def api_entry_batch():
+    """Apply a list of entry creates/updates/deletes in one transaction.
+    
+    Body: ``{"items": [{"op": "update", "id": ..., "end_time": ...}, ...],
+    "atomic": true}``. Answers with one result per item; an atomic batch
+    with an invalid item is rejected as a whole (400).
+    """
+    redirect_response = require_login()
+    if redirect_response:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+    
+    user_id = get_current_user_id()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('items'), list) or not data['items']:
+        return jsonify({'success': False, 'error': 'Invalid data'}), 400
+    if len(data['items']) > ENTRY_BATCH_MAX_ITEMS:
+        return jsonify({'success': False, 'error': f'At most {ENTRY_BATCH_MAX_ITEMS} items per batch'}), 413
+    
+    atomic = data.get('atomic', True) is not False
+    results, days = timesheet.apply_entry_batch(user_id, data['items'], atomic=atomic)
+    failed = sum(1 for result in results if not result['success'])
+    if atomic and failed:
+        return jsonify({'success': False, 'error': 'Batch rejected', 'results': results}), 400
+    
+    result = mutation_result(user_id, dates=days)
+    result.update(results=results, applied=len(results) - failed, failed=failed)
+    return jsonify(result)
+
+@bp.route('/api/entries/<entry_id>', methods=['POST'])
+def api_update_entry(entry_id):
+    """Change start, end and memo of an entry; the JSON body carries all three."""
+    redirect_response = require_login()
+    if redirect_response:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+    
+    user_id = get_current_user_id()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not data.get('start_time'):
+        return jsonify({'success': False, 'error': 'Invalid data'}), 400
+    
+    try:
+        updated = timesheet.update_entry(user_id, entry_id, data['start_time'],
+                                         data.get('end_time') or None, data.get('memo') or '')
+    except EntrySpanError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'Invalid time'}), 400
+    if updated is None:
+        return jsonify({'success': False, 'error': 'Entry not found'}), 404
+    
+    previous_start_time, entry = updated
+    return jsonify(mutation_result(user_id, entries=[entry], dates=[previous_start_time]))
+
+@bp.route('/api/entries/<entry_id>', methods=['DELETE'])
+def api_delete_entry(entry_id):
+    redirect_response = require_login()
+    if redirect_response:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+    
+    user_id = get_current_user_id()
+    start_time = timesheet.delete_entry(user_id, entry_id)
+    if start_time is None:
+        return jsonify({'success': False, 'error': 'Entry not found'}), 404
+    return jsonify(mutation_result(user_id, removed_entries=[entry_id], dates=[start_time]))
+
+@bp.route('/api/tickets', methods=['POST'])
+def api_add_ticket():
+    redirect_response = require_login()
+    if redirect_response:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+    
+    user_id = get_current_user_id()
+    fields = ticket_fields(request.get_json(silent=True) or {})
+    if not fields:
+        return jsonify({'success': False, 'error': 'Invalid ticket name'}), 400
+    
+    ticket_id = timesheet.add_ticket(user_id, **fields)
+    return jsonify(mutation_result(user_id, tickets=[Ticket(id=ticket_id, user_id=user_id, **fields)]))
+
+@bp.route('/api/tickets/<ticket_id>', methods=['POST'])
+def api_update_ticket(ticket_id):
+    redirect_response = require_login()
+    if redirect_response:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+    
+    user_id = get_current_user_id()
+    fields = ticket_fields(request.get_json(silent=True) or {})
+    if not fields:
+        return jsonify({'success': False, 'error': 'Invalid ticket name'}), 400
+    
+    if not timesheet.update_ticket(user_id, ticket_id, **fields):
+        return jsonify({'success': False, 'error': 'Ticket not found'}), 404
+    return jsonify(mutation_result(user_id, tickets=[Ticket(id=ticket_id, user_id=user_id, **fields)]))
+
+@bp.route('/api/tickets/<ticket_id>/archive', methods=['POST'])
+def api_archive_ticket(ticket_id):
+    redirect_response = require_login()
+    if redirect_response:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+    
+    user_id = get_current_user_id()
+    if not timesheet.archive_ticket(user_id, ticket_id):
+        return jsonify({'success': False, 'error': 'Ticket not found'}), 404
+    return jsonify(mutation_result(user_id, archived_tickets=[timesheet.get_ticket_by_id(user_id, ticket_id)]))
+
+@bp.route('/api/tickets/<ticket_id>/restore', methods=['POST'])
+def api_restore_ticket(ticket_id):
+    redirect_response = require_login()
+    if redirect_response:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+    
+    user_id = get_current_user_id()
+    if not timesheet.restore_ticket(user_id, ticket_id):
+        return jsonify({'success': False, 'error': 'Ticket not found'}), 404
+    return jsonify(mutation_result(user_id, tickets=[timesheet.get_ticket_by_id(user_id, ticket_id)]))
+
+@bp.route('/api/tickets/<ticket_id>', methods=['DELETE'])
+def api_delete_ticket(ticket_id):
+    redirect_response = require_login()
+    if redirect_response:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+    
+    user_id = get_current_user_id()
+    if not timesheet.delete_ticket(user_id, ticket_id):
+        return jsonify({'success': False, 'error': 'Ticket not found'}), 404
+    return jsonify(mutation_result(user_id, removed_tickets=[ticket_id]))
+
+@bp.route('/api/entries')
+@conditional('entries')
+def api_entries():
+    """Entries of the current user, newest first, paged with a keyset cursor."""
+    redirect_response = require_login()
+    if redirect_response:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    user_id = get_current_user_id()
+    try:
+        limit = min(max(int(request.args.get('limit', API_PAGE_SIZE)), 1), API_PAGE_SIZE)
+        entries, next_cursor = timesheet.get_entries_page(
+            user_id,
+            start=request.args.get('start') or None,
+            end=request.args.get('end') or None,
+            limit=limit,
+            cursor=request.args.get('cursor') or None)
+    except ValueError:
+        return jsonify({'error': 'Invalid parameters'}), 400
+    
+    return jsonify({
+        'entries': [entry_to_dict(entry) for entry in entries],
+        'next_cursor': next_cursor
+    })
+
+@bp.route('/static/dist/<path:filename>')
+def dist_asset(filename):
+    """Serve a fingerprinted build file, precompressed if the client accepts it.
+    
+    The name changes with the content, so browsers may keep it forever.
+    """
+    path = safe_join(os.path.join(current_app.static_folder, build_assets.DIST_DIR), filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    
+    mimetype = mimetypes.guess_type(path)[0]
+    encoding = None
+    for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[candidate] and os.path.isfile(path + suffix):
+            encoding = candidate
+            path += suffix
+            break
+    
+    response = send_file(path, mimetype=mimetype, conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
+@bp.route('/api/stats')
+def api_stats():
+    """Cache and maintenance counters of this worker process (admins only)."""
+    redirect_response = require_login()
+    if redirect_response:
+        return jsonify({'error': 'Not authenticated'}), 401
+    # The counters cover all users
+    if not is_admin(timesheet.get_user_by_id(get_current_user_id())):
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    return jsonify({
+        'pid': os.getpid(),
+        'cache': timesheet.cache.stats(),
+        'maintenance': maintenance.stats()
+    })
+
+# ===== METRICS =====
+
+@bp.before_app_request
+def start_request_metrics():
+    if instrumentation.enabled:
+        g.metrics_frame = instrumentation.push()
+
+@bp.after_app_request
+def record_request_metrics(response):
+    frame = g.pop('metrics_frame', None)
+    if frame is not None:
+        seconds = instrumentation.pop(frame)
+        instrumentation.record_request(request.endpoint or 'unmatched', request.method,
+                                       response.status_code, frame, seconds)
+        response.headers['Server-Timing'] = (
+            f'db;dur={frame.sql_seconds * 1000:.1f};desc="{frame.queries} queries", '
+            f'render;dur={frame.render_seconds * 1000:.1f}, total;dur={seconds * 1000:.1f}'
+        )
+    return response
+
+@bp.teardown_app_request
+def abort_request_metrics(error):
+    # Only still set if the view raised and after_request didn't run
+    frame = g.pop('metrics_frame', None)
+    if frame is not None:
+        instrumentation.record_request(request.endpoint or 'unmatched', request.method, 500,
+                                       frame, instrumentation.pop(frame))
+
+def _render_started(sender, **extra):
+    g.render_started = time.perf_counter()
+
+def _render_finished(sender, **extra):
+    started = g.pop('render_started', None)
+    if started is not None:
+        instrumentation.render(time.perf_counter() - started)
+
+def _is_loopback(address: Optional[str]):
+    try:
+        return ipaddress.ip_address(address or '').is_loopback
+    except ValueError:
+        return False
+
+@bp.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint; values are per worker process.
+    
+    Needs METRICS_TOKEN as bearer token. Without a configured token it
+    only answers loopback clients (e.g. curl inside the container), so the
+    per-route numbers never leak through a public router.
+    """
+    if not instrumentation.enabled:
+        abort(404)
+    token = current_app.config['METRICS_TOKEN']
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    elif not _is_loopback(request.remote_addr):
+        abort(404)
+    
+    cache = timesheet.cache.stats()
+    extra = [
+        ('timesheet_process_id', 'gauge', 'PID of the worker that answered this scrape', (), os.getpid()),
+        ('timesheet_db_pool_idle_connections', 'gauge', 'Open connections waiting in the pool', (),
+         timesheet.db._idle.qsize() if timesheet.db else 0),
+        ('timesheet_sse_streams', 'gauge', 'Open /events streams', (), timesheet.timer_events.streams),
+        ('timesheet_sse_rejected_total', 'counter', '/events streams refused because all slots were taken', (),
+         timesheet.timer_events.rejected),
+        ('timesheet_cache_entries', 'gauge', 'Results held in the read cache', (), cache['entries']),
+        ('timesheet_cache_evictions_total', 'counter', 'Read cache evictions', (), cache['evictions']),
+    ]
+    for kind, counts in cache['by_kind'].items():
+        for outcome in ('hits', 'misses'):
+            extra.append((f'timesheet_cache_{outcome}_total', 'counter', f'Read cache {outcome}',
+                          (('kind', kind),), counts[outcome]))
+    passwords = timesheet.passwords.stats()
+    extra += [
+        ('timesheet_password_hash_in_flight', 'gauge', 'Password hashes running or waiting for the pool', (),
+         passwords['in_flight']),
+        ('timesheet_password_hash_total', 'counter', 'Password hashes computed', (), passwords['completed']),
+        ('timesheet_password_hash_rejected_total', 'counter', 'Password checks refused because the pool was full',
+         (), passwords['rejected']),
+        ('timesheet_login_rate_limited_total', 'counter', 'Login attempts refused by the rate limits', (),
+         login_limiter.refused),
+    ]
+    for name, job in maintenance.stats().items():
+        extra.append(('timesheet_maintenance_runs_total', 'counter', 'Maintenance job runs',
+                      (('job', name),), job['runs']))
+        extra.append(('timesheet_maintenance_failures_total', 'counter', 'Failed maintenance job runs',
+                      (('job', name),), job['failures']))
+    
+    response = Response(instrumentation.prometheus(extra), mimetype='text/plain; version=0.0.4')
+    response.cache_control.no_store = True
+    return response
+
+# ===== PROFILING =====
+#
+# A profiled request runs under cProfile from before_request to
+# after_request and leaves two files in PROFILE_DIR: the raw .pstats
+# (python -m pstats, snakeviz, ...) and .collapsed stacks for flamegraph.pl
+# or speedscope. cProfile records caller/callee pairs, not whole stacks, so
+# the stacks are rebuilt from that graph and a function called from several
+# places has its time split in proportion to the calls.
+
+def _profile_label(func):
+    filename, line, name = func
+    if filename == '~':  # built-in
+        label = name
+    else:
+        label = f"{name} ({os.path.basename(filename)}:{line})"
+    return label.replace(';', ',')
+
+def collapsed_stacks(stats, min_fraction: float = 1e-4):
+    """Folded stacks ("root;caller;callee microseconds") from pstats data.
+    
+    Walks the call graph from the functions without callers and hands each
+    callee the share of its cumulative time that came through this path.
+    Recursion is cut where a function already is on the stack and paths
+    below ``min_fraction`` of the total are dropped, which keeps the walk
+    bounded.
+    """
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+    roots = [func for func, (_, _, _, _, callers) in stats.items() if not callers]
+    min_seconds = sum(stats[func][3] for func in roots) * min_fraction
+    
+    folded = defaultdict(float)
+    
+    def walk(func, seconds, path):
+        cumulative = stats[func][3]
+        share = seconds / cumulative if cumulative else 0.0
+        path = path + (func,)
+        own = stats[func][2] * share
+        if own >= min_seconds:
+            folded[';'.join(_profile_label(f) for f in path)] += own
+        for callee, edge_seconds in callees[func].items():
+            if callee not in path and edge_seconds * share >= min_seconds:
+                walk(callee, edge_seconds * share, path)
+    
+    for func in roots:
+        walk(func, stats[func][3], ())
+    return [f"{stack} {round(seconds * 1e6)}" for stack, seconds in sorted(folded.items()) if seconds >= 5e-7]
+
+def save_profile(profiler, name: str, directory: str = PROFILE_DIR, keep: int = PROFILE_KEEP):
+    """Write ``name``.pstats and ``name``.collapsed; prune beyond ``keep`` profiles."""
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, name)
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(base + '.pstats')
+    with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+        f.write('\n'.join(collapsed_stacks(stats.stats)) + '\n')
+    
+    profiles = sorted(entry for entry in os.listdir(directory) if entry.endswith('.pstats'))
+    for old in profiles[:max(0, len(profiles) - keep)]:
+        for ext in ('.pstats', '.collapsed'):
+            try:
+                os.remove(os.path.join(directory, old[:-len('.pstats')] + ext))
+            except FileNotFoundError:
+                pass
+
+def _profile_requested():
+    """Explicit request by an admin, or a random sample."""
+    if request.headers.get('X-Profile') == '1' or request.args.get('profile') == '1':
+        user_id = get_current_user_id()
+        if user_id and is_admin(timesheet.get_user_by_id(user_id)):
+            return True
+    rate = current_app.config['PROFILE_SAMPLE_RATE']
+    return rate > 0 and random.random() < rate
+
+@bp.before_app_request
+def start_profile():
+    if request.endpoint in ('main.metrics', 'static') or not _profile_requested():
+        return
+    profiler = cProfile.Profile()
+    g.profile = (profiler, time.perf_counter())
+    profiler.enable()
+
+@bp.after_app_request
+def finish_profile(response):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+    profiler, started = profile
+    profiler.disable()
+    name = (f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'unmatched'}-"
+            f"{(time.perf_counter() - started) * 1000:.0f}ms-{os.getpid()}-{uuid.uuid4().hex[:6]}")
+    try:
+        save_profile(profiler, name, current_app.config['PROFILE_DIR'])
+        response.headers['X-Profile'] = name
+    except OSError as e:
+        current_app.logger.error(f"Error saving profile {name}: {e}")
+    return response
+
+@bp.teardown_app_request
+def abort_profile(error):
+    # The view raised: stop profiling this thread, nothing worth saving
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile[0].disable()
+
+# ===== ADMIN COMMANDS =====
+
+@click.command('rebuild-rollups')
+@with_appcontext
+def rebuild_rollups_command():
+    """Recompute the daily rollup table from all time entries."""
+    started = time.monotonic()
+    rows = timesheet.rebuild_rollups()
+    print(f"✅ {rows} Rollup-Zeilen in {time.monotonic() - started:.2f}s neu berechnet")
+
+@click.command('export-entries')
+@click.option('--format', 'fmt', type=click.Choice(sorted(EXPORT_FORMATS)), default='csv', show_default=True)
+@click.option('--start', required=True, help='Erster Tag (YYYY-MM-DD)')
+@click.option('--end', required=True, help='Letzter Tag (YYYY-MM-DD)')
+@click.option('--user', 'username', default=None, help='Benutzername (Standard: alle)')
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='Zieldatei (Standard: stdout)')
+@with_appcontext
+def export_entries_command(fmt, start, end, username, output):
+    """Export finished entries with ticket metadata as CSV or NDJSON."""
+    try:
+        day_start(start)
+        day_start(end)
+    except ValueError:
+        raise click.BadParameter('Datum im Format YYYY-MM-DD erwartet')
+    user_id = None
+    if username:
+        user = timesheet.get_user_by_username(username)
+        if not user:
+            raise click.BadParameter(f"Unbekannter Benutzer '{username}'")
+        user_id = user.id
+    
+    for chunk in export_chunks(timesheet.iter_export_rows(start, end, user_id=user_id), fmt):
+        output.write(chunk)
+
+@click.command('import-entries')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), default=None, help='Standard: aus der Dateiendung')
+@click.option('--user', 'username', default=None, help='Alle Zeilen diesem Benutzer zuordnen (Standard: Spalte "user")')
+@click.option('--batch-size', type=int, default=IMPORT_BATCH_SIZE, show_default=True, help='Zeilen pro Transaktion')
+@click.option('--restart', is_flag=True, help='Unterbrochenen Import verwerfen und von vorne beginnen')
+@with_appcontext
+def import_entries_command(path, fmt, username, batch_size, restart):
+    """Bulk-import time entries from CSV, NDJSON or JSON (resumable)."""
+    fmt = import_format(path, fmt)
+    if fmt is None:
+        raise click.BadParameter('Format nicht erkennbar, bitte --format angeben')
+    user_id = None
+    if username:
+        user = timesheet.get_user_by_username(username)
+        if not user:
+            raise click.BadParameter(f"Unbekannter Benutzer '{username}'")
+        user_id = user.id
+    
+    with open(path, 'rb') as f:
+        checksum = file_checksum(f)
+    job = timesheet.open_import_job(os.path.basename(path), fmt, checksum, user_id=user_id, restart=restart)
+    if job.position:
+        print(f"↻ Setze Import {job.id} bei Datensatz {job.position:,} fort")
+    
+    def progress(job, rate):
+        print(f"  {job.position:>10,} Datensätze  {job.inserted:>10,} neu  {job.duplicates:>8,} doppelt  "
+              f"{job.failed:>6,} fehlerhaft  {rate:>9,.0f}/s")
+    
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        try:
+            report = run_import(job, iter_import_records(f, fmt), batch_size=batch_size, progress=progress)
+        except Exception as e:
+            print(f"❌ Import {job.id} abgebrochen bei Datensatz {job.position:,}: {e}")
+            print("   Erneut aufrufen, um fortzusetzen.")
+            raise SystemExit(1)
+    
+    for error in report['errors']:
+        print(f"  ⚠️  Datensatz {error['record']}: {error['error']}")
+    print(f"✅ Import {job.id}: {job.inserted:,} neu, {job.duplicates:,} doppelt, {job.failed:,} fehlerhaft; "
+          f"{report['records']:,} Datensätze in {report['seconds']:.1f}s ({report['rows_per_second']:,.0f}/s)")
+
+@click.command('run-maintenance')
+@click.argument('jobs', nargs=-1)
+@with_appcontext
+def run_maintenance_command(jobs):
+    """Run maintenance jobs now (default: all)."""
+    for name in jobs or list(maintenance.jobs):
+        if name not in maintenance.jobs:
+            raise click.BadParameter(f"Unbekannter Job '{name}' (verfügbar: {', '.join(maintenance.jobs)})")
+        job = maintenance.run_job(name)
+        if job.last_error:
+            print(f"❌ {name}: {job.last_error}")
+        else:
+            print(f"✅ {name}: {job.last_result} in {job.last_duration:.2f}s")
+
+# ===== TEMPLATE FILTERS =====
+
+def as_datetime(date_str):
+    return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+
+def format_hours(hours):
+    """Format hours as HH:MM"""
+    total_minutes = int(hours * 60)
+    h = total_minutes // 60
+    m = total_minutes % 60
+    return f"{h:02d}:{m:02d}"
+
+def asset_urls(bundle):
+    """URLs to load for a bundle from build_assets.BUNDLES.
+    
+    One fingerprinted file after a build, the individual source files
+    otherwise (development without ``python build_assets.py``).
+    """
+    manifest = current_app.extensions.get('assets', {})
+    if bundle in manifest:
+        return [url_for('main.dist_asset', filename=manifest[bundle])]
+    return [url_for('static', filename=source) for source in build_assets.BUNDLES[bundle]]
+
+# ===== APPLICATION FACTORY =====
+
+def _asset_manifest_path(app):
+    return os.path.join(app.static_folder, build_assets.DIST_DIR, build_assets.MANIFEST)
+
+def _load_asset_manifest(app):
+    try:
+        with open(_asset_manifest_path(app), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def _deployment_fingerprint(app):
+    """Hash of the app's code, template and asset manifest mtimes, used to salt ETags.
+    
+    Identical in every worker, but changes with each deployment so pages
+    rendered by old templates or pointing at old asset bundles aren't
+    revalidated.
+    """
+    digest = hashlib.sha1()
+    paths = [os.path.abspath(__file__)]
+    if os.path.exists(_asset_manifest_path(app)):
+        paths.append(_asset_manifest_path(app))
+    for root, _, files in os.walk(os.path.join(app.root_path, app.template_folder)):
+        paths.extend(os.path.join(root, name) for name in files)
+    for path in sorted(paths):
+        digest.update(f"{path}:{os.path.getmtime(path)}".encode())
+    return digest.hexdigest()[:16]
+
+def create_app(config: Optional[dict] = None):
+    """Build the Flask app; used by wsgi.py, the flask CLI and __main__.
+    
+    ``config`` overrides the settings taken from the environment
+    (e.g. ``{'DATABASE': '/tmp/test.db'}``).
+    """
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = SECRET_KEY
+    app.config['DATABASE'] = DATABASE
+    app.config['MAINTENANCE_ENABLED'] = MAINTENANCE_ENABLED
+    app.config['ADMIN_USERS'] = ADMIN_USERS
+    app.config['METRICS_TOKEN'] = METRICS_TOKEN
+    app.config['PROFILE_SAMPLE_RATE'] = PROFILE_SAMPLE_RATE
+    app.config['PROFILE_DIR'] = PROFILE_DIR
+    app.config['IMPORT_DIR'] = IMPORT_DIR
+    app.config['MAX_CONTENT_LENGTH'] = IMPORT_MAX_UPLOAD_MB * 1024 * 1024
+    if config:
+        app.config.update(config)
+    app.config.setdefault('ETAG_SALT', _deployment_fingerprint(app))
+    app.config.setdefault('TRUSTED_PROXIES', TRUSTED_PROXIES)
+    if app.config['TRUSTED_PROXIES']:
+        # Login rate limits are keyed on remote_addr, which is the proxy's otherwise
+        proxies = app.config['TRUSTED_PROXIES']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
     
-    from datetime import datetime
+    app.add_template_filter(as_datetime, 'as_datetime')
+    app.add_template_filter(format_hours, 'format_hours')
+    app.add_template_global(asset_urls, 'asset_urls')
+    app.extensions['assets'] = _load_asset_manifest(app)
+    app.register_blueprint(bp)
+    before_render_template.connect(_render_started, app)
+    template_rendered.connect(_render_finished, app)
+    app.cli.add_command(rebuild_rollups_command)
+    app.cli.add_command(run_maintenance_command)
+    app.cli.add_command(export_entries_command)
+    app.cli.add_command(import_entries_command)
     
-    @app.template_filter('as_datetime')
-    def as_datetime(date_str):
-        return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+    timesheet.init_app(app)
+    return app
+
+def start_maintenance(app):
+    """Start the background maintenance thread for a serving process."""
+    if app.config['MAINTENANCE_ENABLED']:
+        maintenance.start(lock_path=app.config['DATABASE'] + '.maintenance.lock')
+
+if __name__ == '__main__':
+    os.makedirs('templates', exist_ok=True)
     
-    @app.template_filter('format_hours')
-    def format_hours(hours):
-        """Format hours as HH:MM"""
-        total_minutes = int(hours * 60)
-        h = total_minutes // 60
-        m = total_minutes % 60
-        return f"{h:02d}:{m:02d}"
+    app = create_app()
+    start_maintenance(app)
     
     print("Multiuser Timesheet-Webapp mit Login wird gestartet...")
     print(f"Database: {DATABASE}")
@@ -947,6 +4193,7 @@ if __name__ == '__main__':
         print("ℹ️  Neue Registrierungen sind deaktiviert")
     print("Standard-Login: demoUser / demo123")
     print("Öffnen Sie http://localhost:5000 in Ihrem Browser")
+    print("ℹ️  Entwicklungsserver - im Betrieb: gunicorn -c gunicorn.conf.py wsgi:app")
     
     host = '0.0.0.0' if os.environ.get('FLASK_ENV') == 'production' else '127.0.0.1'
     app.run(debug=False, host=host, port=5000)
@@ -0,0 +1,5 @@
+"""WSGI entry point for production servers: gunicorn -c gunicorn.conf.py wsgi:app"""
+from timesheet_app import create_app, start_maintenance
+
+app = create_app()
+start_maintenance(app)